@@ -3,11 +3,13 @@ This module initializes the blueprints and registers them with the Flask-Smorest
 """
 
 from typing import Protocol
-from . import base, ingredient, item, product, recipe, static
+from .. import core
+from . import base, craft, ingredient, item, product, recipe, static
 
 
 class App(Protocol):
     register_blueprint: callable
+    teardown_appcontext: callable
 
 
 def init(api: App, app: App, base_url: str = ""):
@@ -32,8 +34,17 @@ def init(api: App, app: App, base_url: str = ""):
     for backend, frontend in endpoints:
         api.register_blueprint(backend)
         base_blp.register_blueprint(frontend)
+    api.register_blueprint(craft.init(base_url))
     app.register_blueprint(base_blp)
     app.register_blueprint(static.init())
+    app.teardown_appcontext(release)
+
+
+def release(error: BaseException | None) -> None:
+    """
+    Releases the resources the core holds for the thread that served the request.
+    """
+    core.release()
 
 
 __all__ = ["init"]
@@ -4,11 +4,10 @@ Endpoints for the base blueprint aka "/"
 
 import logging
 
-from bs4 import BeautifulSoup
-from flask import Response, redirect, url_for
+from flask import Response, jsonify, redirect, url_for
 from flask_smorest import Blueprint
 
-from .. import MAJOR_VERSION
+from .. import MAJOR_VERSION, core
 from ..views import (
     Anchor,
     Aside,
@@ -21,6 +20,7 @@ from ..views import (
     ListItem,
     Title,
     UnorderedList,
+    prettify,
 )
 
 logger = logging.getLogger(__name__)
@@ -70,9 +70,7 @@ def init(endpoints, url_prefix: str | None = None):
                 with Div(style={"text-align": "center"}):
                     context += "Welcome to Craftsman! a web application for calculating recipe costs and production rates."
 
-        links_html = context.render(
-            formatter=lambda x: BeautifulSoup(x, "html5lib").prettify()
-        )
+        links_html = context.render(formatter=prettify)
         return Response(links_html, mimetype="text/html")
 
     @blp.route("/api")
@@ -85,4 +83,15 @@ def init(endpoints, url_prefix: str | None = None):
             return redirect(f"{url_prefix}/api/v{MAJOR_VERSION}/docs")
         return redirect(f"/api/v{MAJOR_VERSION}/docs")
 
+    @blp.route("/metrics")
+    @blp.response(
+        200,
+        description="Storage metrics, such as the checkpoint interval and duration.",
+    )
+    def metrics():
+        """
+        Returns the metrics of the storage backend as JSON.
+        """
+        return jsonify(core.metrics())
+
     return blp
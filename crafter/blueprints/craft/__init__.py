@@ -0,0 +1,14 @@
+from flask_smorest import Blueprint
+
+from ... import core
+from .api import init as init_api
+
+
+def init(url_prefix: str) -> Blueprint:
+    """
+    Initializes the craft backend.
+    """
+    return init_api(url_prefix, core.engine())
+
+
+__all__ = ["init"]
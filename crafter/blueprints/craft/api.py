@@ -0,0 +1,87 @@
+"""
+Blueprint for craft routes
+"""
+
+from flask_smorest import Blueprint
+
+from ... import MAJOR_VERSION
+from ...core import CraftEngine
+from ...schemas import (
+    CraftBatchQuery,
+    CraftBatchSchema,
+    CraftCycleSchema,
+    CraftPathSchema,
+    CraftQuerySchema,
+    CraftSchema,
+    CraftSolveQuerySchema,
+    CraftTotalsSchema,
+    CraftTreeQuerySchema,
+    CraftTreeSchema,
+)
+
+
+def init(url_prefix: str, engine: CraftEngine) -> Blueprint:
+    """
+    Registers the craft blueprint with the given API instance.
+    """
+    blp = Blueprint(
+        "Craft",
+        __name__,
+        description="Endpoints for crafting recipes.",
+        url_prefix=f"{url_prefix}/api/v{MAJOR_VERSION}/craft",
+    )
+
+    @blp.route("/<int:recipe_id>/<scale>", methods=["POST"])
+    @blp.arguments(CraftPathSchema, location="path")
+    @blp.response(200, CraftSchema)
+    def craft_recipe(path, **_):
+        """
+        Craft a recipe at scale, returning the items it consumes and produces with
+        their rates multiplied by the scale.
+        """
+        return engine.craft(path["recipe_id"], path["scale"])
+
+    @blp.route("/batch", methods=["POST"])
+    @blp.arguments(CraftQuerySchema(many=True))
+    @blp.arguments(CraftBatchQuery, location="query")
+    @blp.response(200, CraftBatchSchema)
+    def craft_batch(crafts, query):
+        """
+        Craft every recipe of the list at its scale in a single pass, returning the
+        result of each craft in order, and the net rate of every item over the
+        whole batch when balance is set.
+        """
+        return engine.batch(crafts, query["balance"])
+
+    @blp.route("/solve", methods=["POST"])
+    @blp.arguments(CraftSolveQuerySchema)
+    @blp.response(200, CraftTotalsSchema)
+    def craft_solve(query):
+        """
+        Solve for the crafts of every recipe needed to produce the target items at
+        their rates, returning them with the raw materials consumed and the net
+        items produced.
+        """
+        return engine.solve(query["TARGETS"], query["MODE"])
+
+    @blp.route("/tree", methods=["PUT"])
+    @blp.arguments(CraftTreeQuerySchema)
+    @blp.response(200, CraftTreeSchema)
+    def craft_tree(query):
+        """
+        Craft a recipe at scale along with the precursor recipes producing its
+        ingredients, up to depth or down to the raw materials, returning the tree
+        and its flattened totals.
+        """
+        return engine.tree(query["RECIPE_ID"], query["SCALE"], query["DEPTH"])
+
+    @blp.route("/cycles", methods=["GET"])
+    @blp.response(200, CraftCycleSchema(many=True))
+    def craft_cycles():
+        """
+        Get the cycles of the recipe graph, the recipes depending on each other
+        through the items they consume and produce, alternatives included.
+        """
+        return engine.cycles()
+
+    return blp
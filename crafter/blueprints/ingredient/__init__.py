@@ -1,11 +1,11 @@
 from flask_smorest import Blueprint
 
-from ...core import IngredientTable
+from ... import core
 from .api import init as init_api
 from .ui import init as init_ui
 
 
 def init(url_prefix: str) -> tuple[Blueprint, Blueprint]:
     """Initializes the ingredient blueprint and its UI."""
-    table = IngredientTable()
+    table = core.table("ingredients")
     return init_api(url_prefix, table), init_ui(table)
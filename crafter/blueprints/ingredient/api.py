@@ -3,7 +3,9 @@ from flask_smorest import Blueprint
 
 from ... import MAJOR_VERSION
 from ...core import IngredientTable
-from ...schemas import IngredientSchema, IngredientQuery
+from ...schemas import IngredientSchema, IngredientQuery, PageQuery, ProjectionQuery
+from ..projection import projection, respond
+from ..streaming import BATCH_SIZE, stream_ndjson, wants_stream
 
 
 def init(url_prefix: str, table: IngredientTable) -> Blueprint:
@@ -18,12 +20,29 @@ def init(url_prefix: str, table: IngredientTable) -> Blueprint:
     )
 
     @blp.route("/", methods=["GET"])
+    @blp.arguments(PageQuery, location="query")
     @blp.response(200, IngredientSchema(many=True))
-    def get_all_ingredients():
+    def get_all_ingredients(page):
         """
-        Retrieve all ingredients.
+        Retrieve all ingredients, or one page of them ordered by ID when a limit or
+        cursor is given. The cursor of the next page is sent in the X-Next-Cursor
+        header. With stream set, or when only NDJSON is accepted, the whole table
+        is streamed as newline delimited JSON instead. The fields parameter limits
+        the fields returned for each entry.
         """
-        return table.get_many()
+        schema = projection(IngredientSchema, page, many=True)
+        columns = page.get("columns")
+        if wants_stream(page):
+            return stream_ndjson(
+                table.iter_many(BATCH_SIZE, columns), schema or IngredientSchema()
+            )
+        if "limit" not in page and "after" not in page:
+            return respond(table.get_many(columns), schema)
+        ingredients, cursor = table.get_page(
+            page.get("after"), page.get("limit", 100), columns
+        )
+        headers = None if cursor is None else {"X-Next-Cursor": str(cursor)}
+        return respond(ingredients, schema, headers)
 
     @blp.route("/", methods=["POST"])
     @blp.arguments(IngredientSchema(many=True))
@@ -35,12 +54,14 @@ def init(url_prefix: str, table: IngredientTable) -> Blueprint:
         return table.add_many(ingredients)
 
     @blp.route("/<int:ingredient_id>", methods=["GET"])
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, IngredientSchema)
-    def get_ingredient(ingredient_id):
+    def get_ingredient(options, ingredient_id):
         """
         Retrieve an ingredient by its ID.
         """
-        return table.get_one(ingredient_id)
+        schema = projection(IngredientSchema, options)
+        return respond(table.get_one(ingredient_id, options.get("columns")), schema)
 
     @blp.route("/<int:ingredient_id>", methods=["PUT"])
     @blp.arguments(IngredientSchema)
@@ -53,12 +74,14 @@ def init(url_prefix: str, table: IngredientTable) -> Blueprint:
 
     @blp.route("/query", methods=["POST"])
     @blp.arguments(IngredientQuery)
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, IngredientSchema(many=True))
-    def query_ingredients(query):
+    def query_ingredients(query, options):
         """
         Query for ingredients.
         """
-        return table.query(query)
+        schema = projection(IngredientSchema, options, many=True)
+        return respond(table.query(query, options.get("columns")), schema)
 
     @blp.route("/<int:ingredient_id>", methods=["DELETE"])
     @blp.response(200)
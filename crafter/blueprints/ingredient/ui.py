@@ -1,6 +1,5 @@
 import logging
 
-from bs4 import BeautifulSoup
 from flask import Response, redirect, request, url_for
 from flask_smorest import Blueprint
 
@@ -20,6 +19,7 @@ from ...views import (
     ListItem,
     Title,
     UnorderedList,
+    prettify,
 )
 
 logger = logging.getLogger(__name__)
@@ -263,9 +263,7 @@ def init(table: TableProtocol) -> Blueprint:
                             submission_endpoint,
                         )
 
-        html_content = context.render(
-            formatter=lambda x: BeautifulSoup(x, "html5lib").prettify()
-        )
+        html_content = context.render(formatter=prettify)
         return Response(html_content, mimetype="text/html")
 
     @blp.route("/", methods=["POST"])
@@ -1,13 +1,23 @@
+from flask import abort
 from flask_smorest import Blueprint
 
 from ... import MAJOR_VERSION
-from ...core import ItemTable
-from ...schemas import ItemQuery, ItemSchema
+from ...core import CraftEngine, ItemTable
+from ...schemas import (
+    ItemQuery,
+    ItemRecipeSchema,
+    ItemSchema,
+    PageQuery,
+    ProjectionQuery,
+)
+from ..projection import projection, respond
+from ..streaming import BATCH_SIZE, stream_ndjson, wants_stream
 
 
-def init(url_prefix: str, table: ItemTable) -> Blueprint:
+def init(url_prefix: str, table: ItemTable, engine: CraftEngine) -> Blueprint:
     """
-    Initializes the API blueprint for item management endpoints.
+    Initializes the API blueprint for item management endpoints, looking up the
+    recipes of an item through the given craft engine.
     """
     blp = Blueprint(
         "Items",
@@ -17,12 +27,29 @@ def init(url_prefix: str, table: ItemTable) -> Blueprint:
     )
 
     @blp.route("/", methods=["GET"])
+    @blp.arguments(PageQuery, location="query")
     @blp.response(200, ItemSchema(many=True))
-    def get_all_items():
+    def get_all_items(page):
         """
-        Retrieve all items.
+        Retrieve all items, or one page of them ordered by ID when a limit or
+        cursor is given. The cursor of the next page is sent in the X-Next-Cursor
+        header. With stream set, or when only NDJSON is accepted, the whole table
+        is streamed as newline delimited JSON instead. The fields parameter limits
+        the fields returned for each entry.
         """
-        return table.get_many()
+        schema = projection(ItemSchema, page, many=True)
+        columns = page.get("columns")
+        if wants_stream(page):
+            return stream_ndjson(
+                table.iter_many(BATCH_SIZE, columns), schema or ItemSchema()
+            )
+        if "limit" not in page and "after" not in page:
+            return respond(table.get_many(columns), schema)
+        items, cursor = table.get_page(
+            page.get("after"), page.get("limit", 100), columns
+        )
+        headers = None if cursor is None else {"X-Next-Cursor": str(cursor)}
+        return respond(items, schema, headers)
 
     @blp.route("/", methods=["POST"])
     @blp.arguments(ItemSchema(many=True))
@@ -34,12 +61,14 @@ def init(url_prefix: str, table: ItemTable) -> Blueprint:
         return table.add_many(items)
 
     @blp.route("/<int:item_id>", methods=["GET"])
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, ItemSchema)
-    def get_item(item_id):
+    def get_item(options, item_id):
         """
         Retrieve an item by its ID.
         """
-        return table.get_one(item_id)
+        schema = projection(ItemSchema, options)
+        return respond(table.get_one(item_id, options.get("columns")), schema)
 
     @blp.route("/<int:item_id>", methods=["PUT"])
     @blp.arguments(ItemSchema)
@@ -58,13 +87,35 @@ def init(url_prefix: str, table: ItemTable) -> Blueprint:
         """
         return table.delete(item_id)
 
+    @blp.route("/<int:item_id>/producers", methods=["GET"])
+    @blp.response(200, ItemRecipeSchema(many=True))
+    def get_item_producers(item_id):
+        """
+        Retrieve the recipes producing an item, with the rate each produces it at.
+        """
+        if item_id not in table:
+            abort(404, description=f"Item with id {item_id} not found")
+        return engine.producers(item_id)
+
+    @blp.route("/<int:item_id>/consumers", methods=["GET"])
+    @blp.response(200, ItemRecipeSchema(many=True))
+    def get_item_consumers(item_id):
+        """
+        Retrieve the recipes consuming an item, with the rate each consumes it at.
+        """
+        if item_id not in table:
+            abort(404, description=f"Item with id {item_id} not found")
+        return engine.consumers(item_id)
+
     @blp.route("/query", methods=["POST"])
     @blp.arguments(ItemQuery)
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, ItemSchema(many=True))
-    def query_items(query):
+    def query_items(query, options):
         """
         Query for items.
         """
-        return table.query(query)
+        schema = projection(ItemSchema, options, many=True)
+        return respond(table.query(query, options.get("columns")), schema)
 
     return blp
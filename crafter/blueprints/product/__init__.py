@@ -1,6 +1,6 @@
 from flask_smorest import Blueprint
 
-from ...core import ProductTable
+from ... import core
 from .api import init as init_api
 from .ui import init as init_ui
 
@@ -9,7 +9,7 @@ def init(url_prefix: str) -> tuple[Blueprint, Blueprint]:
     """
     Initializes the product frontend and backend.
     """
-    table = ProductTable()
+    table = core.table("products")
     return init_api(url_prefix, table), init_ui(table)
 
 
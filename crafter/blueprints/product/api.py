@@ -2,7 +2,9 @@ from flask_smorest import Blueprint
 
 from ... import MAJOR_VERSION
 from ...core import ProductTable
-from ...schemas import ProductSchema, ProductQuery
+from ...schemas import ProductSchema, ProductQuery, PageQuery, ProjectionQuery
+from ..projection import projection, respond
+from ..streaming import BATCH_SIZE, stream_ndjson, wants_stream
 
 
 def init(url_prefix: str, table: ProductTable) -> Blueprint:
@@ -17,12 +19,29 @@ def init(url_prefix: str, table: ProductTable) -> Blueprint:
     )
 
     @blp.route("/", methods=["GET"])
+    @blp.arguments(PageQuery, location="query")
     @blp.response(200, ProductSchema(many=True))
-    def get_all_products():
+    def get_all_products(page):
         """
-        Retrieve all products.
+        Retrieve all products, or one page of them ordered by ID when a limit or
+        cursor is given. The cursor of the next page is sent in the X-Next-Cursor
+        header. With stream set, or when only NDJSON is accepted, the whole table
+        is streamed as newline delimited JSON instead. The fields parameter limits
+        the fields returned for each entry.
         """
-        return table.get_many()
+        schema = projection(ProductSchema, page, many=True)
+        columns = page.get("columns")
+        if wants_stream(page):
+            return stream_ndjson(
+                table.iter_many(BATCH_SIZE, columns), schema or ProductSchema()
+            )
+        if "limit" not in page and "after" not in page:
+            return respond(table.get_many(columns), schema)
+        products, cursor = table.get_page(
+            page.get("after"), page.get("limit", 100), columns
+        )
+        headers = None if cursor is None else {"X-Next-Cursor": str(cursor)}
+        return respond(products, schema, headers)
 
     @blp.route("/", methods=["POST"])
     @blp.arguments(ProductSchema(many=True))
@@ -34,12 +53,14 @@ def init(url_prefix: str, table: ProductTable) -> Blueprint:
         return table.add_many(products)
 
     @blp.route("/<int:product_id>", methods=["GET"])
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, ProductSchema)
-    def get_product(product_id):
+    def get_product(options, product_id):
         """
         Retrieve a product by its ID.
         """
-        return table.get_one(product_id)
+        schema = projection(ProductSchema, options)
+        return respond(table.get_one(product_id, options.get("columns")), schema)
 
     @blp.route("/<int:product_id>", methods=["PUT"])
     @blp.arguments(ProductSchema)
@@ -60,11 +81,13 @@ def init(url_prefix: str, table: ProductTable) -> Blueprint:
 
     @blp.route("/query", methods=["POST"])
     @blp.arguments(ProductQuery)
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, ProductSchema(many=True))
-    def query_products(query):
+    def query_products(query, options):
         """
         Query for products.
         """
-        return table.query(query)
+        schema = projection(ProductSchema, options, many=True)
+        return respond(table.query(query, options.get("columns")), schema)
 
     return blp
@@ -0,0 +1,46 @@
+"""
+Helpers for serializing only the fields a client asked for.
+"""
+
+from functools import lru_cache
+
+from flask import jsonify
+import flask_smorest
+from marshmallow import Schema
+
+
+@lru_cache(maxsize=256)
+def _projected(schema: type[Schema], columns: tuple[str, ...], many: bool) -> Schema:
+    return schema(only=columns, many=many)
+
+
+def projection(schema: type[Schema], args: dict, many: bool = False) -> Schema | None:
+    """
+    Returns a cached instance of the schema limited to the requested fields, or
+    None when every field was requested.
+    """
+    columns = args.get("columns")
+    if not columns:
+        return None
+    try:
+        return _projected(schema, tuple(sorted(set(columns))), many)
+    except ValueError:
+        unknown = sorted(set(columns) - set(schema._declared_fields))
+        flask_smorest.abort(
+            422,
+            errors={
+                "query": {"fields": [f"Unknown field {name}." for name in unknown]}
+            },
+        )
+
+
+def respond(content, schema: Schema | None, headers: dict | None = None):
+    """
+    Returns the content for the endpoint to send. Projected content is dumped with
+    the projected schema here, everything else is left to the response schema.
+    """
+    if schema is None:
+        return (content, headers) if headers else content
+    response = jsonify(schema.dump(content))
+    response.headers.update(headers or {})
+    return response
@@ -1,6 +1,6 @@
 from flask_smorest import Blueprint
 
-from ...core import RecipeTable
+from ... import core
 from .api import init as init_api
 from .ui import init as init_ui
 
@@ -9,7 +9,7 @@ def init(url_prefix: str) -> tuple[Blueprint, Blueprint]:
     """
     Initializes the recipe frontend and backend.
     """
-    table = RecipeTable()
+    table = core.table("recipes")
     return init_api(url_prefix, table), init_ui(table)
 
 
@@ -6,7 +6,9 @@ from flask_smorest import Blueprint
 
 from ... import MAJOR_VERSION
 from ...core import RecipeTable
-from ...schemas import RecipeQuery, RecipeSchema
+from ...schemas import RecipeQuery, RecipeSchema, PageQuery, ProjectionQuery
+from ..projection import projection, respond
+from ..streaming import BATCH_SIZE, stream_ndjson, wants_stream
 
 
 def init(url_prefix: str, table: RecipeTable) -> Blueprint:
@@ -21,12 +23,29 @@ def init(url_prefix: str, table: RecipeTable) -> Blueprint:
     )
 
     @blp.route("/", methods=["GET"])
+    @blp.arguments(PageQuery, location="query")
     @blp.response(200, RecipeSchema(many=True))
-    def get_all_recipes():
+    def get_all_recipes(page):
         """
-        Retrieve all recipes.
+        Retrieve all recipes, or one page of them ordered by ID when a limit or
+        cursor is given. The cursor of the next page is sent in the X-Next-Cursor
+        header. With stream set, or when only NDJSON is accepted, the whole table
+        is streamed as newline delimited JSON instead. The fields parameter limits
+        the fields returned for each entry.
         """
-        return table.get_many()
+        schema = projection(RecipeSchema, page, many=True)
+        columns = page.get("columns")
+        if wants_stream(page):
+            return stream_ndjson(
+                table.iter_many(BATCH_SIZE, columns), schema or RecipeSchema()
+            )
+        if "limit" not in page and "after" not in page:
+            return respond(table.get_many(columns), schema)
+        recipes, cursor = table.get_page(
+            page.get("after"), page.get("limit", 100), columns
+        )
+        headers = None if cursor is None else {"X-Next-Cursor": str(cursor)}
+        return respond(recipes, schema, headers)
 
     @blp.route("/", methods=["POST"])
     @blp.arguments(RecipeSchema(many=True))
@@ -38,12 +57,14 @@ def init(url_prefix: str, table: RecipeTable) -> Blueprint:
         return table.add_many(recipes)
 
     @blp.route("/<int:recipe_id>", methods=["GET"])
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, RecipeSchema)
-    def get_recipe(recipe_id):
+    def get_recipe(options, recipe_id):
         """
         Retrieve a recipe by its ID.
         """
-        return table.get_one(recipe_id)
+        schema = projection(RecipeSchema, options)
+        return respond(table.get_one(recipe_id, options.get("columns")), schema)
 
     @blp.route("/<int:recipe_id>", methods=["PUT"])
     @blp.arguments(RecipeSchema)
@@ -64,11 +85,13 @@ def init(url_prefix: str, table: RecipeTable) -> Blueprint:
 
     @blp.route("/query", methods=["POST"])
     @blp.arguments(RecipeQuery)
+    @blp.arguments(ProjectionQuery, location="query")
     @blp.response(200, RecipeSchema(many=True))
-    def query_recipes(query):
+    def query_recipes(query, options):
         """
         Query recipes by the given query.
         """
-        return table.query(query)
+        schema = projection(RecipeSchema, options, many=True)
+        return respond(table.query(query, options.get("columns")), schema)
 
     return blp
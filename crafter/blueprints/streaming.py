@@ -0,0 +1,36 @@
+"""
+Helpers for streaming whole tables as newline delimited JSON.
+"""
+
+from collections.abc import Iterable
+import json
+
+from flask import Response, request, stream_with_context
+from marshmallow import Schema
+
+NDJSON = "application/x-ndjson"
+BATCH_SIZE = 1000
+
+
+def wants_stream(page: dict) -> bool:
+    """
+    Returns whether the client asked for a streamed response, either with the
+    stream query parameter or by accepting only NDJSON.
+    """
+    if page.get("stream"):
+        return True
+    return request.accept_mimetypes.best == NDJSON
+
+
+def stream_ndjson(batches: Iterable[list], schema: Schema) -> Response:
+    """
+    Streams the records one JSON document per line, serializing a batch at a time
+    so only one batch is held in memory.
+    """
+
+    def generate():
+        for batch in batches:
+            lines = (json.dumps(entry) for entry in schema.dump(batch, many=True))
+            yield "".join(f"{line}\n" for line in lines)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON)
@@ -2,15 +2,24 @@
 Module for the core of the server.
 """
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import logging
 import os.path
-from utils import read, write
+
+import pandas as pd
+from utils import pd_read, read, write_atomic
 
 from .product import ProductTable
-from .base import TableProtocol
+from .base import BridgeTableProtocol, TableProtocol
 from .item import ItemTable
 from .recipe import RecipeTable
 from .ingredient import IngredientTable
+from .checkpoint import Checkpointer, serialize
+from .craft import CraftEngine
+from .graph import INGREDIENTS, PRODUCTS, RecipeGraph
+from .journal import Journal
+from .transaction import attach, reading, transaction
+from . import sqlite
 
 
 tables: list[tuple[str, TableProtocol]] = [
@@ -20,45 +29,296 @@ tables: list[tuple[str, TableProtocol]] = [
     ("products", ProductTable),
 ]
 
+backends: dict[str, list[tuple[str, TableProtocol]]] = {
+    "memory": tables,
+    "sqlite": sqlite.tables,
+}
+_backend = "memory"
+_checkpointer: Checkpointer | None = None
+_graph = RecipeGraph()
+
+EXTENSION = "yaml"
+SNAPSHOT = "npz"
+
+# Table referenced by each foreign key column of the memory tables.
+REFERENCES = {"ITEM_ID": "items", "RECIPE_ID": "recipes"}
+JOURNAL = "journal.log"
+
 logger = logging.getLogger(__name__)
 
 
-def init(path: str) -> None:
+def init(
+    path: str,
+    backend: str = "memory",
+    database: str | None = None,
+    interval: float = 60,
+    read_only: bool = False,
+) -> None:
     """
     Initialize the db tables.
+
+    The memory backend loads the archive at path, from its binary snapshot where
+    there is one, replays the journal of the writes made since it was last written
+    and then journals every write, while the tables that changed are written back
+    every interval seconds. The recipe graph is built from the loaded ingredients
+    and products, and kept up to date by every write to them.
+
+    The sqlite backend opens the database file, by default next to the archive, and
+    only imports the archive into a new one.
+
+    With read_only, nothing next to the archive is written: the journal is replayed
+    as it is and no write is journaled or checkpointed, and a missing database is
+    imported in memory.
     """
-    extension = "yaml"
-    for name, table in tables:
+    global _backend, _checkpointer
+    _backend = backend
+    if backend == "sqlite":
+        database = database or os.path.join(path, "crafter.sqlite3")
+        if read_only and not os.path.exists(database):
+            database = ":memory:"
+        connection = sqlite.open_database(database)
+        if connection.is_empty():
+            load(path, sqlite.tables)
+        else:
+            logger.info("Opened %s", connection.path)
+        return connection.close
+
+    load_snapshot(path)
+    _graph.watch(INGREDIENTS, IngredientTable().storage())
+    _graph.watch(PRODUCTS, ProductTable().storage())
+    storages = {name: table().storage() for name, table in tables}
+    journal = Journal(os.path.join(path, JOURNAL), storages, read_only)
+    _checkpointer = Checkpointer(path, SNAPSHOT, storages, journal, interval)
+    replayed = journal.replay()
+    if replayed:
+        logger.info("Replayed %d transactions from %s", replayed, journal.path)
+        if not read_only:
+            _checkpointer.checkpoint()
+    for name, report in memory_report().items():
+        logger.info(
+            "%s: %d rows, %.1f bytes per row",
+            name,
+            report["rows"],
+            report["bytes_per_row"],
+        )
+    if read_only:
+        return journal.close
+    attach(journal)
+    _checkpointer.start()
+
+    def offload() -> None:
+        """
+        Stop checkpointing, then detach and close the journal, every write is
+        already on disk.
+        """
+        _checkpointer.stop()
+        with transaction():
+            attach(None)
+        journal.close()
+
+    return offload
+
+
+def load(path: str, targets: list[tuple[str, TableProtocol]]) -> None:
+    """
+    Load the YAML archive at path into the given tables.
+    """
+    for name, table in targets:
         logger.info("Initializing %s", name)
-        full_path = os.path.join(path, f"{name}.{extension}")
+        full_path = os.path.join(path, f"{name}.{EXTENSION}")
         try:
-            content = read(full_path)
+            content = read(full_path) or []
             for i in content:
                 if "ITEM_ID" in i and isinstance(i["ITEM_ID"], str):
                     i["ITEM_ID"] = int(i["ITEM_ID"])
-            table().add_many(content)
+            if content:
+                table().add_many(content)
         except FileNotFoundError:
             logger.error("File not found: %s", full_path)
 
-    def offload() -> None:
-        """
-        Offload the db tables.
-        """
-        for name, table in tables:
-            logger.info("Offloading %s", name)
+
+def load_snapshot(path: str) -> dict[str, dict[str, list]]:
+    """
+    Load the archive at path into the memory tables and return the integrity report.
+
+    The tables are loaded concurrently, from their binary snapshot with one bulk
+    read per column where there is one, and otherwise from their YAML file parsed in
+    a separate process. Rows are appended without checking them one by one, a single
+    vectorized pass over the loaded tables then reports duplicated keys and foreign
+    keys referencing no row.
+    """
+    sources = {}
+    for name, _ in tables:
+        for extension in (SNAPSHOT, EXTENSION):
             full_path = os.path.join(path, f"{name}.{extension}")
-            content = table().get_many()
-            for i in content:
-                if "ITEM_ID" in i and isinstance(i["ITEM_ID"], str):
-                    i["ITEM_ID"] = int(i["ITEM_ID"])
-            write(full_path, content)
+            if os.path.exists(full_path):
+                sources[name] = full_path
+                break
+        else:
+            logger.error("File not found: %s", full_path)
+    parsing = [name for name, source in sources.items() if source.endswith(EXTENSION)]
+    # The parses are submitted before any thread is started, the pool forks its
+    # workers on the first one.
+    processes = ProcessPoolExecutor(len(parsing)) if parsing else None
+    try:
+        parsed = {name: processes.submit(_parse, sources[name]) for name in parsing}
 
-    return offload
+        def restore(name: str, table) -> None:
+            source = sources[name]
+            frame = parsed[name].result() if name in parsed else pd_read(source)
+            logger.info("Initializing %s from %s", name, source)
+            table().storage().extend(frame)
+
+        with ThreadPoolExecutor(len(tables)) as threads:
+            futures = [
+                threads.submit(restore, name, table)
+                for name, table in tables
+                if name in sources
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        if processes is not None:
+            processes.shutdown()
+    report = integrity_report()
+    for name, columns in report.items():
+        for column, values in columns.items():
+            logger.warning(
+                "%s: %d invalid %s values, such as %s",
+                name,
+                len(values),
+                column,
+                values[:10],
+            )
+    return report
+
+
+def integrity_report() -> dict[str, dict[str, list]]:
+    """
+    Report, for each memory table, the primary keys held by several rows and the
+    foreign keys referencing no row of their table.
+    """
+    with reading():
+        storages = {name: table().storage() for name, table in tables}
+        frames = {name: storage.frame for name, storage in storages.items()}
+    report = {}
+    for name, storage in storages.items():
+        frame = frames[name]
+        problems = {}
+        keys = frame[storage.key]
+        duplicated = keys[keys.duplicated()].unique()
+        if len(duplicated):
+            problems[storage.key] = duplicated.tolist()
+        for column in storage.foreign_columns:
+            target = REFERENCES[column]
+            referenced = frames[target][storages[target].key]
+            orphans = frame.loc[~frame[column].isin(referenced), column].unique()
+            if len(orphans):
+                problems[column] = orphans.tolist()
+        if problems:
+            report[name] = problems
+    return report
+
+
+def _parse(path: str) -> pd.DataFrame:
+    return pd.DataFrame(read(path) or [])
+
+
+def export(path: str, extension: str = EXTENSION) -> None:
+    """
+    Write every memory table to path in the given format, YAML by default.
+    """
+    with reading():
+        snapshots = {name: table().storage().snapshot() for name, table in tables}
+    for name, snapshot in snapshots.items():
+        logger.info("Exporting %s", name)
+        write_atomic(
+            os.path.join(path, f"{name}.{extension}"),
+            serialize(snapshot.frame, extension),
+        )
+
+
+def table(name: str) -> TableProtocol:
+    """
+    Returns the table with the given name from the backend selected by init.
+    """
+    return dict(backends[_backend])[name]()
+
+
+def graph() -> RecipeGraph:
+    """
+    Returns the recipe graph of the backend selected by init.
+    """
+    if _backend == "sqlite":
+        return sqlite.database().graph()
+    return _graph
+
+
+def release() -> None:
+    """
+    Releases what the backend selected by init holds for the current thread, the
+    SQLite connection it opened. Called at the end of every request, as the server
+    may serve each one from a new thread.
+    """
+    if _backend == "sqlite":
+        sqlite.database().release()
+
+
+def engine() -> CraftEngine:
+    """
+    Returns a craft engine over the tables and the recipe graph of the backend
+    selected by init.
+    """
+    return CraftEngine(table("recipes"), table("ingredients"), table("products"), graph)
+
+
+def metrics() -> dict:
+    """
+    Report the checkpoint metrics of the memory backend and the size of the recipe
+    graph.
+    """
+    with reading():
+        report = {"graph": graph().metrics()}
+    if _backend == "memory" and _checkpointer is not None:
+        report["checkpoint"] = _checkpointer.metrics()
+    return report
+
+
+def memory_report() -> dict[str, dict]:
+    """
+    Report the row count and column memory of each db table.
+    """
+    report = {}
+    for name, table in tables:
+        storage = table().storage()
+        rows = len(storage)
+        size = storage.memory_usage()
+        report[name] = {
+            "rows": rows,
+            "bytes": size,
+            "bytes_per_row": size / rows if rows else 0.0,
+        }
+    return report
 
 
 __all__ = [
     "init",
+    "load",
+    "load_snapshot",
+    "export",
+    "engine",
+    "graph",
+    "integrity_report",
+    "metrics",
+    "table",
+    "backends",
+    "memory_report",
+    "reading",
+    "transaction",
     "TableProtocol",
+    "BridgeTableProtocol",
+    "CraftEngine",
+    "RecipeGraph",
     "ItemTable",
     "RecipeTable",
     "IngredientTable",
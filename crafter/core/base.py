@@ -2,7 +2,10 @@
 Module for the base classes and protocols.
 """
 
-from typing import Dict, List, Protocol
+from typing import Dict, Iterator, List, Protocol, Tuple
+
+import numpy as np
+import pandas as pd
 
 
 class TableProtocol(Protocol):
@@ -15,12 +18,24 @@ class TableProtocol(Protocol):
         Protocol for adding multiple entries to the table.
         """
 
-    def get_many(self) -> List:
+    def get_many(self, columns: List | None = None) -> List:
         """
         Protocol for getting all entries from the table.
         """
 
-    def get_one(self, entry_entry_id: int) -> Dict:
+    def iter_many(self, batch_size: int, columns: List | None = None) -> Iterator[List]:
+        """
+        Protocol for getting all entries from the table in batches.
+        """
+
+    def get_page(
+        self, after: int | None, limit: int, columns: List | None = None
+    ) -> Tuple[List, int | None]:
+        """
+        Protocol for getting a page of entries ordered by ID, and the next cursor.
+        """
+
+    def get_one(self, entry_entry_id: int, columns: List | None = None) -> Dict:
         """
         Protocol for getting a single entry from the table.
         """
@@ -45,7 +60,59 @@ class TableProtocol(Protocol):
         Protocol for deleting an entry from the table.
         """
 
-    def query(self, query: dict) -> List:
+    def __contains__(self, entry_id: int) -> bool:
+        """
+        Protocol for checking whether an entry exists in the table.
+        """
+
+    def query(self, query: dict, columns: List | None = None) -> List:
         """
         Protocol for querying the table.
         """
+
+
+class BridgeTableProtocol(TableProtocol, Protocol):
+    """
+    Protocol for a bridge table, whose rows reference an item and a recipe.
+    """
+
+    def referencing(self, column: str, key: int, columns: List | None = None) -> List:
+        """
+        Protocol for getting the entries whose foreign key column holds key, through
+        the index on that column.
+        """
+
+
+def batch_conflicts(
+    rows: pd.DataFrame,
+    key: str,
+    table: TableProtocol,
+    references: dict[str, tuple[TableProtocol, str]],
+) -> dict[int, dict[str, list[str]]]:
+    """
+    Collects every primary-key and foreign-key conflict in a batch of rows,
+    keyed by the position of the offending row in the batch.
+    """
+    errors: dict[int, dict[str, list[str]]] = {}
+    if rows.empty:
+        return errors
+
+    def flag(mask: np.ndarray, column: str, message: str) -> None:
+        for position in np.flatnonzero(mask):
+            value = rows[column].iat[position]
+            errors.setdefault(int(position), {}).setdefault(column, []).append(
+                message.format(value)
+            )
+
+    keys = rows[key]
+    flag(keys.duplicated(keep=False).to_numpy(), key, f"{key} {{}} is repeated")
+    taken = [value for value in keys.unique() if value in table]
+    flag(keys.isin(taken).to_numpy(), key, f"{key} {{}} already exists")
+    for column, (reference, name) in references.items():
+        missing = [value for value in rows[column].unique() if value not in reference]
+        flag(
+            rows[column].isin(missing).to_numpy(),
+            column,
+            f"{column} {{}} does not exist in the {name} table",
+        )
+    return errors
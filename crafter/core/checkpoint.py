@@ -0,0 +1,153 @@
+"""
+Module for writing the in-memory tables back to the archive in the background.
+
+A checkpoint writes out only the tables whose storage version moved since the last
+one, as a binary npz snapshot of their typed columns by default. It takes their
+snapshots, and rotates the journal, at a single point between two transactions,
+then serializes the snapshots without holding any lock, so requests keep being
+served meanwhile. Each file is written to a temporary file and renamed over the old
+one, and the rotated journal is only deleted once every file is in place.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from utils import frame_columns, write_atomic
+
+from .journal import Journal
+from .storage import TableStorage, records
+from .transaction import reading
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpointer:
+    """
+    Periodic writer of the changed tables of the memory backend.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        extension: str,
+        storages: dict[str, TableStorage],
+        journal: Journal,
+        interval: float,
+    ):
+        """
+        Creates a checkpointer for the storages, keyed by table name, whose current
+        rows are the ones already in the archive at path. Tables without a file in
+        the given format yet are written by the first checkpoint.
+        """
+        self.path = path
+        self.extension = extension
+        self.storages = storages
+        self.journal = journal
+        self.interval = interval
+        self.saved = {
+            name: storage.version
+            if os.path.exists(os.path.join(path, f"{name}.{extension}"))
+            else None
+            for name, storage in storages.items()
+        }
+        self.checkpoints = 0
+        self.last_checkpoint: float | None = None
+        self.last_duration: float | None = None
+        self.last_tables: list[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def dirty(self) -> list[str]:
+        """
+        Returns the names of the tables changed since the last checkpoint.
+        """
+        return [
+            name
+            for name, storage in self.storages.items()
+            if storage.version != self.saved[name]
+        ]
+
+    def checkpoint(self) -> list[str]:
+        """
+        Writes out the tables changed since the last checkpoint and returns their
+        names.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            with reading():
+                snapshots = {
+                    name: self.storages[name].snapshot() for name in self.dirty()
+                }
+                if snapshots:
+                    self.journal.rotate()
+            for name, snapshot in snapshots.items():
+                logger.info("Checkpointing %s", name)
+                write_atomic(
+                    os.path.join(self.path, f"{name}.{self.extension}"),
+                    serialize(snapshot.frame, self.extension),
+                )
+                self.saved[name] = snapshot.version
+            self.journal.release()
+            self.checkpoints += 1
+            self.last_checkpoint = time.time()
+            self.last_duration = time.perf_counter() - started
+            self.last_tables = list(snapshots)
+            return self.last_tables
+
+    def start(self) -> None:
+        """
+        Starts checkpointing every interval seconds in a daemon thread, unless the
+        interval is not positive.
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="checkpointer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the checkpoint thread, letting a running checkpoint finish.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def metrics(self) -> dict:
+        """
+        Returns the checkpoint interval and the outcome of the last checkpoint.
+        """
+        return {
+            "interval_seconds": self.interval,
+            "checkpoints": self.checkpoints,
+            "last_checkpoint": self.last_checkpoint,
+            "last_duration_seconds": self.last_duration,
+            "last_tables": self.last_tables,
+            "dirty_tables": self.dirty(),
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception:
+                logger.exception("Checkpoint failed")
+
+
+def serialize(frame, extension: str):
+    """
+    Returns the content of a table file in the given format, typed column arrays
+    for the npz snapshot and records for the YAML or JSON archive.
+    """
+    if extension == "npz":
+        return frame_columns(frame)
+    content = records(frame)
+    for i in content:
+        if "ITEM_ID" in i and isinstance(i["ITEM_ID"], str):
+            i["ITEM_ID"] = int(i["ITEM_ID"])
+    return content
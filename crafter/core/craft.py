@@ -0,0 +1,661 @@
+"""
+Module for crafting recipes out of the core tables.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import threading
+
+from flask import abort
+import flask_smorest
+import numpy as np
+
+from .base import BridgeTableProtocol, TableProtocol
+from .cycles import ITEM, RECIPE, Components, recipe_cycles
+from .graph import RecipeGraph
+from .matrix import RateMatrix
+from .solver import TOLERANCE, simplex
+from .transaction import reading
+
+# Modes of CraftEngine.solve.
+TREE = "tree"
+LP = "lp"
+
+
+class CraftEngine:
+    """
+    Computes the items consumed and produced by crafting recipes.
+
+    The ingredients and products of a recipe are found through the RECIPE_ID index
+    of their tables, so crafting costs the same whatever the size of the tables.
+    """
+
+    def __init__(
+        self,
+        recipes: TableProtocol,
+        ingredients: BridgeTableProtocol,
+        products: BridgeTableProtocol,
+        graph: Callable[[], RecipeGraph],
+    ):
+        """
+        Creates an engine crafting from the given tables and the function returning
+        the recipe graph of their rows.
+        """
+        self.recipes = recipes
+        self.ingredients = ingredients
+        self.products = products
+        self.graph = graph
+
+    def craft(self, recipe_id: int, scale: float) -> dict:
+        """
+        Returns the items consumed and produced by crafting the recipe at scale,
+        with the rates of each item summed and multiplied by the scale.
+        """
+        with reading():
+            if recipe_id not in self.recipes:
+                abort(404, description=f"Recipe with id {recipe_id} not found")
+            ingredients = self.ingredients.referencing(
+                "RECIPE_ID", recipe_id, ["ITEM_ID", "RATE"]
+            )
+            products = self.products.referencing(
+                "RECIPE_ID", recipe_id, ["ITEM_ID", "RATE"]
+            )
+        return {
+            "RECIPE_ID": recipe_id,
+            "SCALE": scale,
+            "INGREDIENTS": scaled(ingredients, scale),
+            "PRODUCTS": scaled(products, scale),
+        }
+
+    def producers(self, item_id: int) -> list[dict]:
+        """
+        Returns the recipes producing the item, each with the rate at which it
+        produces the item summed over its rows.
+
+        The rows are found through the ITEM_ID index of the product table and each
+        recipe through its primary key, so the lookup costs the same per recipe
+        returned whatever the size of the tables.
+        """
+        return self._recipes_of(self.products, item_id)
+
+    def consumers(self, item_id: int) -> list[dict]:
+        """
+        Returns the recipes consuming the item, each with the rate at which it
+        consumes the item summed over its rows, found as producers() does through
+        the ingredient table.
+        """
+        return self._recipes_of(self.ingredients, item_id)
+
+    def batch(self, crafts: list[dict], balance: bool = False) -> dict:
+        """
+        Returns the result of crafting every recipe at its scale, as craft() does,
+        and with balance the net rate of every item over the whole batch.
+
+        The rows of every recipe are gathered from the sparse rate matrices of the
+        recipe graph, cached until its version moves, and scaled as single arrays.
+        The balance is the product of the sparse vector of scales with the
+        products minus the ingredients matrix, summed from the same gathered rows.
+        Unknown recipes abort with 404 listing all of them.
+        """
+        recipe_ids = np.array([craft["RECIPE_ID"] for craft in crafts], dtype=np.int64)
+        scales = np.array([craft["SCALE"] for craft in crafts], dtype=np.float64)
+        with reading():
+            missing = [
+                recipe_id
+                for recipe_id in np.unique(recipe_ids).tolist()
+                if recipe_id not in self.recipes
+            ]
+            if missing:
+                flask_smorest.abort(
+                    404,
+                    message=f"{len(missing)} recipes not found",
+                    errors={"RECIPE_ID": missing},
+                )
+            matrix = self.graph().cached("rates", RateMatrix)
+        rows = matrix.rows(recipe_ids)
+        ingredients = matrix.ingredients.gather(rows, scales)
+        products = matrix.products.gather(rows, scales)
+        result = {
+            "RESULTS": [
+                {
+                    "RECIPE_ID": recipe_id,
+                    "SCALE": scale,
+                    "INGREDIENTS": consumed,
+                    "PRODUCTS": produced,
+                }
+                for recipe_id, scale, consumed, produced in zip(
+                    recipe_ids.tolist(),
+                    scales.tolist(),
+                    matrix.split(*ingredients),
+                    matrix.split(*products),
+                )
+            ]
+        }
+        if balance:
+            result["BALANCE"] = matrix.balance(ingredients, products)
+        return result
+
+    def solve(self, targets: list[dict], mode: str = TREE) -> dict:
+        """
+        Returns the crafts of every recipe needed to produce each target item at its
+        rate, with the items consumed from outside and the net items produced.
+
+        The tree mode walks back from every target through the recipe producing it,
+        the one with the lowest RECIPE_ID, expanded as tree() does with its cycles
+        collapsed. The lp mode weighs every recipe producing an item needed along
+        the way, alternatives included, and lets the byproducts of a recipe supply
+        the others. It solves the linear program, built from the rate matrix cached
+        on the recipe graph, for the crafts consuming the least raw materials, the
+        items no recipe produces. Targets no recipe produces abort with 422, as do
+        targets the raw materials cannot produce.
+        """
+        rates: dict[int, float] = {}
+        for target in targets:
+            rates[target["ITEM_ID"]] = rates.get(target["ITEM_ID"], 0) + target["RATE"]
+        with reading():
+            graph = self.graph()
+            unproduced = [
+                item_id
+                for item_id in sorted(rates)
+                if not any(rate > 0 for rate in graph.producers(item_id).values())
+            ]
+            if unproduced:
+                flask_smorest.abort(
+                    422,
+                    message=f"{len(unproduced)} items are not produced by any recipe",
+                    errors={"ITEM_ID": unproduced},
+                )
+            if mode == LP:
+                program = _Program(graph, graph.cached("rates", RateMatrix), rates)
+            else:
+                expansion = graph.cached("expansion", _Expansion)
+                total = _Unit(-1, [], {}, {}, {}, {}, {})
+                with expansion.lock:
+                    for item_id, rate in sorted(rates.items()):
+                        unit, crafts = expansion.supply(item_id, None)
+                        total.include(unit, rate * crafts)
+                return total.totals(1)
+        return program.solve()
+
+    def tree(self, recipe_id: int, scale: float, depth: int | None = None) -> dict:
+        """
+        Returns the craft tree of the recipe at scale along with its flattened
+        totals.
+
+        Every ingredient is expanded into the recipe producing it, the one with the
+        lowest RECIPE_ID when there are several, scaled to supply exactly the rate
+        consumed, down to depth levels below the recipe or to the raw materials no
+        recipe produces. The totals hold the crafts of every recipe in the tree,
+        the items consumed from outside of it and the net items it produces.
+
+        Each recipe is expanded once per remaining depth, crafted once, and the
+        expansion is scaled to every place it occurs in, so subtrees shared by many
+        branches cost a single walk. Expansions are walked on the recipe graph and
+        kept until its version moves, so later requests reuse them. Requests fill
+        the shared expansions one at a time.
+
+        Recipes whose expansion comes back to themselves, as the strongly connected
+        components of the graph of each item to the recipe producing it show, are
+        collapsed into a single node listing the crafts of every recipe of the
+        cycle. Those crafts are solved together as a small linear program for the
+        fewest crafts supplying the item asked of the cycle, or crafting the recipe
+        once when the cycle is the root, without running short of the items passed
+        around inside it. A cycle that cannot do so aborts with 409 and its recipes.
+
+        Trees more than MAX_TREE_DEPTH levels deep abort with 422, the nested
+        nodes would not serialize. Their totals are still found by solve().
+        """
+        with reading():
+            if recipe_id not in self.recipes:
+                abort(404, description=f"Recipe with id {recipe_id} not found")
+            expansion = self.graph().cached("expansion", _Expansion)
+            with expansion.lock:
+                unit = expansion.root(recipe_id, depth)
+        if unit.levels > MAX_TREE_DEPTH:
+            flask_smorest.abort(
+                422,
+                message=f"The tree of recipe {recipe_id} is {unit.levels} levels deep, "
+                f"pass a DEPTH of at most {MAX_TREE_DEPTH} or solve for its totals",
+            )
+        return {"TREE": unit.render(scale), "TOTALS": unit.totals(scale)}
+
+    def cycles(self) -> list[dict]:
+        """
+        Returns the recipes and the items of every cycle of the recipe graph, where
+        an item depends on every recipe producing it, alternatives included.
+
+        The strongly connected components are found by Tarjan's algorithm in a
+        single walk of the graph and kept until its version moves.
+        """
+        with reading():
+            return self.graph().cached("cycles", recipe_cycles)
+
+    def _recipes_of(self, table: BridgeTableProtocol, item_id: int) -> list[dict]:
+        # Joins the rows of the bridge table referencing the item with their recipe,
+        # leaving out the rows whose recipe is missing.
+        with reading():
+            rates: dict[int, float] = {}
+            for row in table.referencing("ITEM_ID", item_id, ["RECIPE_ID", "RATE"]):
+                rates[row["RECIPE_ID"]] = rates.get(row["RECIPE_ID"], 0) + row["RATE"]
+            return [
+                {**self.recipes.get_one(recipe_id), "RATE": rate}
+                for recipe_id, rate in sorted(rates.items())
+                if recipe_id in self.recipes
+            ]
+
+
+@dataclass
+class _Unit:
+    # A recipe crafted once and expanded to some depth. Each ingredient holds the
+    # unit of the recipe producing it with the crafts it takes, or None for a leaf.
+    # A collapsed cycle instead supplies one of the item asked of it, or crafts its
+    # root recipe once, with the crafts of each of its recipes in cycle. Levels
+    # counts the levels of precursor recipes below the unit.
+    recipe_id: int
+    ingredients: list[tuple[int, float, tuple["_Unit", float] | None]]
+    products: dict[int, float]
+    recipes: dict[int, float]
+    consumed: dict[int, float]
+    produced: dict[int, float]
+    supplied: dict[int, float]
+    cycle: dict[int, float] | None = None
+    levels: int = 0
+
+    def render(self, scale: float) -> dict:
+        node = {
+            "RECIPE_ID": self.recipe_id,
+            "SCALE": scale
+            if self.cycle is None
+            else self.cycle.get(self.recipe_id, 0) * scale,
+            "INGREDIENTS": [
+                {
+                    "ITEM_ID": item_id,
+                    "RATE": rate * scale,
+                    "RECIPE": None
+                    if producer is None
+                    else producer[0].render(producer[1] * scale),
+                }
+                for item_id, rate, producer in self.ingredients
+            ],
+            "PRODUCTS": _scale(self.products, scale),
+        }
+        if self.cycle is not None:
+            node["CYCLE"] = [
+                {"RECIPE_ID": recipe_id, "SCALE": crafts * scale}
+                for recipe_id, crafts in sorted(self.cycle.items())
+            ]
+        return node
+
+    def consume(
+        self, item_id: int, rate: float, supply: tuple["_Unit", float] | None
+    ) -> None:
+        # Adds an ingredient, supplied by crafts per rate of the unit, if any.
+        if supply is None:
+            self.ingredients.append((item_id, rate, None))
+            _add(self.consumed, {item_id: rate})
+            return
+        unit, crafts = supply
+        self.levels = max(self.levels, unit.levels + 1)
+        self.ingredients.append((item_id, rate, (unit, rate * crafts)))
+        _add(self.supplied, {item_id: rate})
+        self.include(unit, rate * crafts)
+
+    def include(self, other: "_Unit", crafts: float) -> None:
+        # Adds the totals of crafts times the other unit to the ones of this unit.
+        for totals, other_totals in (
+            (self.recipes, other.recipes),
+            (self.consumed, other.consumed),
+            (self.produced, other.produced),
+            (self.supplied, other.supplied),
+        ):
+            _add(totals, other_totals, crafts)
+
+    def totals(self, scale: float) -> dict:
+        produced = {
+            item_id: rate - self.supplied.get(item_id, 0)
+            for item_id, rate in self.produced.items()
+        }
+        return {
+            "RECIPES": [
+                {"RECIPE_ID": recipe_id, "SCALE": crafts * scale}
+                for recipe_id, crafts in sorted(self.recipes.items())
+            ],
+            "INGREDIENTS": _scale(self.consumed, scale),
+            "PRODUCTS": _scale(
+                {
+                    item_id: rate
+                    for item_id, rate in produced.items()
+                    if rate > _EPSILON * self.produced[item_id]
+                },
+                scale,
+            ),
+        }
+
+
+# Relative rate under which the products of a tree count as used up inside it.
+_EPSILON = 1e-9
+
+# Most levels of precursor recipes a tree() renders below its root.
+MAX_TREE_DEPTH = 64
+
+# Largest tableau, in cells, the lp mode of solve() builds.
+MAX_TABLEAU = 2_000_000
+
+# Largest tableau, in cells, of a cycle collapsed by tree(). Cycles are solved
+# while holding the read lock, which writers then wait for, so the bound is kept
+# to a few tens of milliseconds of simplex.
+MAX_CYCLE_TABLEAU = 125_000
+
+
+class _Program:
+    # The linear program of the lp mode of solve(), built against one version of
+    # the graph and solved without holding the lock.
+
+    def __init__(self, graph: RecipeGraph, matrix: RateMatrix, targets: dict):
+        recipes: set[int] = set()
+        needed = list(targets)
+        seen = set(needed)
+        while needed:
+            for recipe_id, rate in graph.producers(needed.pop()).items():
+                if rate <= 0 or recipe_id in recipes:
+                    continue
+                recipes.add(recipe_id)
+                for item_id in graph.ingredients(recipe_id):
+                    if item_id not in seen:
+                        seen.add(item_id)
+                        needed.append(item_id)
+        self.recipes = np.array(sorted(recipes), dtype=np.int64)
+        rows = matrix.rows(self.recipes)
+        ones = np.ones(len(rows))
+        consumed = matrix.ingredients.gather(rows, ones)
+        produced = matrix.products.gather(rows, ones)
+        columns = np.unique(np.concatenate([consumed[1], produced[1]]))
+        if _tableau(len(columns), len(rows)) > MAX_TABLEAU:
+            flask_smorest.abort(
+                422,
+                message=f"The linear program over {len(rows)} recipes and "
+                f"{len(columns)} items is too large, use the tree mode",
+            )
+        self.net = np.zeros((len(columns), len(rows)))
+        for sign, (lengths, entries, values) in ((1, produced), (-1, consumed)):
+            np.add.at(
+                self.net,
+                (
+                    np.searchsorted(columns, entries),
+                    np.repeat(np.arange(len(rows)), lengths),
+                ),
+                sign * values,
+            )
+        self.items = matrix.items[columns]
+        self.raw = ~matrix.produced[columns]
+        self.demand = np.zeros(len(columns))
+        self.demand[np.searchsorted(self.items, list(targets))] = list(targets.values())
+
+    def solve(self) -> dict:
+        # Minimizes the raw materials consumed, and the crafts to break ties.
+        cost = -self.net[self.raw].sum(axis=0) + _EPSILON
+        crafts = _simplex(cost, self.net[~self.raw], self.demand[~self.raw])
+        if crafts is None:
+            flask_smorest.abort(
+                422, message="The targets cannot be produced from raw materials"
+            )
+        crafts[crafts < TOLERANCE] = 0
+        balance = self.net @ crafts
+        floor = TOLERANCE * max(1.0, float(np.abs(balance).max(initial=0)))
+        recipes = np.flatnonzero(crafts)
+        consumed = np.flatnonzero(self.raw & (balance < -floor))
+        produced = np.flatnonzero(~self.raw & (balance > floor))
+        return {
+            "RECIPES": [
+                {"RECIPE_ID": recipe_id, "SCALE": scale}
+                for recipe_id, scale in zip(
+                    self.recipes[recipes].tolist(), crafts[recipes].tolist()
+                )
+            ],
+            "INGREDIENTS": [
+                {"ITEM_ID": item_id, "RATE": rate}
+                for item_id, rate in zip(
+                    self.items[consumed].tolist(), (-balance[consumed]).tolist()
+                )
+            ],
+            "PRODUCTS": [
+                {"ITEM_ID": item_id, "RATE": rate}
+                for item_id, rate in zip(
+                    self.items[produced].tolist(), balance[produced].tolist()
+                )
+            ],
+        }
+
+
+class _Expansion:
+    # Expands recipes against one version of the graph, memoizing the units, the
+    # producer of every item met along the way and the components of the graph of
+    # an item to its producer, whose cycles are collapsed into a single unit. The
+    # memos are shared by the readers of the version, which fill them holding lock.
+    # Units are only memoized once complete and never change afterwards, so they
+    # are rendered without it.
+    #
+    # A unit is keyed by its node and the depth it is expanded to, the node being
+    # the recipe for a plain unit and the entry of a collapsed cycle, the item asked
+    # of it or its root recipe. Units are built after the units below them with an
+    # explicit stack, so deep chains of recipes do not exhaust the recursion limit.
+
+    def __init__(self, graph: RecipeGraph):
+        self.graph = graph
+        self.lock = threading.Lock()
+        self.units: dict[tuple, _Unit] = {}
+        self.solutions: dict[tuple[int, int], tuple] = {}
+        self.producers: dict[int, tuple[int, float] | None] = {}
+        self.components = Components(self._successors)
+        self.cycles: dict[int, tuple[list[int], list[int]] | None] = {}
+
+    def root(self, recipe_id: int, depth: int | None) -> _Unit:
+        # The unit of the recipe crafted once.
+        node = recipe_id if self.cycle(recipe_id) is None else (RECIPE, recipe_id)
+        return self._unit((node, depth))
+
+    def supply(self, item_id: int, depth: int | None) -> tuple[_Unit, float] | None:
+        # The unit producing the item with its crafts per rate of the item, or None
+        # when no recipe produces it.
+        source = self._source(item_id, depth)
+        if source is None:
+            return None
+        key, crafts = source
+        return self._unit(key), crafts
+
+    def cycle(self, recipe_id: int) -> tuple[list[int], list[int]] | None:
+        # The recipes and the items of the cycle the recipe is part of, if any.
+        index = self.components.index((RECIPE, recipe_id))
+        if index not in self.cycles:
+            members = self.components.members[index]
+            self.cycles[index] = (
+                (
+                    sorted(i for kind, i in members if kind == RECIPE),
+                    sorted(i for kind, i in members if kind == ITEM),
+                )
+                if len(members) > 1
+                else None
+            )
+        return self.cycles[index]
+
+    def producer(self, item_id: int) -> tuple[int, float] | None:
+        # The recipe with the lowest id producing the item and its rate.
+        if item_id not in self.producers:
+            rates = {
+                recipe_id: rate
+                for recipe_id, rate in self.graph.producers(item_id).items()
+                if rate > 0
+            }
+            self.producers[item_id] = min(rates.items()) if rates else None
+        return self.producers[item_id]
+
+    def _unit(self, key: tuple) -> _Unit:
+        stack = [key]
+        while stack:
+            top = stack[-1]
+            if top in self.units:
+                stack.pop()
+                continue
+            missing = [child for child in self._below(top) if child not in self.units]
+            if missing:
+                stack.extend(missing)
+            else:
+                self.units[top] = self._build(top)
+                stack.pop()
+        return self.units[key]
+
+    def _source(self, item_id: int, depth: int | None) -> tuple[tuple, float] | None:
+        # The key of the unit producing the item with its crafts per rate of the
+        # item, or None when no recipe produces it.
+        producer = self.producer(item_id)
+        if producer is None:
+            return None
+        producer_id, produced = producer
+        if self.cycle(producer_id) is None:
+            return (producer_id, depth), 1 / produced
+        return ((ITEM, item_id), depth), 1.0
+
+    def _ingredients(self, node) -> dict[int, float]:
+        # The items a node consumes from outside, per craft of a recipe or for the
+        # entry of a cycle.
+        if isinstance(node, tuple):
+            return self._solve(node)[-1]
+        return self.graph.ingredients(node)
+
+    def _below(self, key: tuple) -> list[tuple]:
+        node, depth = key
+        if depth == 0:
+            return []
+        depth = None if depth is None else depth - 1
+        sources = [self._source(item_id, depth) for item_id in self._ingredients(node)]
+        return [source[0] for source in sources if source is not None]
+
+    def _build(self, key: tuple) -> _Unit:
+        # The unit of the key, the units below it already built.
+        node, depth = key
+        if isinstance(node, tuple):
+            name, crafted, produced, inside, products, _ = self._solve(node)
+            unit = _Unit(
+                name, [], products, dict(crafted), {}, dict(produced), dict(inside)
+            )
+            unit.cycle = crafted
+        else:
+            products = self.graph.products(node)
+            unit = _Unit(node, [], products, {node: 1}, {}, dict(products), {})
+        below = None if depth is None else depth - 1
+        for item_id, rate in sorted(self._ingredients(node).items()):
+            source = None if depth == 0 else self._source(item_id, below)
+            supply = None if source is None else (self.units[source[0]], source[1])
+            unit.consume(item_id, rate, supply)
+        return unit
+
+    def _solve(self, entry: tuple[int, int]) -> tuple:
+        # The crafts of every recipe of the cycle supplying one of the entry item, or
+        # crafting the entry recipe once, with the fewest crafts keeping every item
+        # passed around inside the cycle from running short. Returns the recipe the
+        # unit is named after, the crafts, the items produced, the ones consumed
+        # inside, the net products and the items consumed from outside.
+        if entry in self.solutions:
+            return self.solutions[entry]
+        kind, entry_id = entry
+        name = self.producer(entry_id)[0] if kind == ITEM else entry_id
+        recipes, items = self.cycle(name)
+        rows = {item_id: row for row, item_id in enumerate(items)}
+        if kind == ITEM:
+            rows.setdefault(entry_id, len(rows))
+        if _tableau(len(rows) + (kind == RECIPE), len(recipes)) > MAX_CYCLE_TABLEAU:
+            flask_smorest.abort(
+                422,
+                message=f"The cycle over {len(recipes)} recipes and {len(items)} "
+                "items is too large to collapse",
+                errors={"cycle": recipes},
+            )
+        net = np.zeros((len(rows) + (kind == RECIPE), len(recipes)))
+        demand = np.zeros(len(net))
+        for column, recipe_id in enumerate(recipes):
+            for sign, rates in (
+                (1, self.graph.products(recipe_id)),
+                (-1, self.graph.ingredients(recipe_id)),
+            ):
+                for item_id, rate in rates.items():
+                    if item_id in rows:
+                        net[rows[item_id], column] += sign * rate
+        if kind == ITEM:
+            demand[rows[entry_id]] = 1
+        else:
+            net[-1, recipes.index(entry_id)] = demand[-1] = 1
+        crafts = _simplex(np.ones(len(recipes)), net, demand)
+        if crafts is None:
+            target = f"item {entry_id}" if kind == ITEM else f"recipe {entry_id}"
+            flask_smorest.abort(
+                409,
+                message=f"The cycle of recipe {name} cannot supply {target}",
+                errors={"cycle": recipes},
+            )
+        crafted = {
+            recipe_id: count
+            for recipe_id, count in zip(recipes, crafts.tolist())
+            if count > TOLERANCE
+        }
+        produced: dict[int, float] = {}
+        consumed: dict[int, float] = {}
+        for recipe_id, count in crafted.items():
+            _add(produced, self.graph.products(recipe_id), count)
+            _add(consumed, self.graph.ingredients(recipe_id), count)
+        inside = {
+            item_id: consumed.pop(item_id) for item_id in items if item_id in consumed
+        }
+        products = {
+            item_id: rate - inside.get(item_id, 0)
+            for item_id, rate in produced.items()
+            if rate - inside.get(item_id, 0) > _EPSILON * rate
+        }
+        solution = (name, crafted, produced, inside, products, consumed)
+        self.solutions[entry] = solution
+        return solution
+
+    def _successors(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        kind, node_id = node
+        if kind == RECIPE:
+            return [(ITEM, item_id) for item_id in self.graph.ingredients(node_id)]
+        producer = self.producer(node_id)
+        return [] if producer is None else [(RECIPE, producer[0])]
+
+
+def _tableau(constraints: int, variables: int) -> int:
+    # Cells of the simplex() tableau, with a surplus and an artificial variable per
+    # constraint at most.
+    return constraints * (variables + 2 * constraints + 1)
+
+
+def _simplex(c: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray | None:
+    # Solves the program with simplex(), aborting with 422 when it is unbounded, as
+    # negative rates can make it, or when its basis turns singular.
+    try:
+        return simplex(c, a, b)
+    except (ValueError, np.linalg.LinAlgError) as error:
+        flask_smorest.abort(
+            422, message=f"The linear program cannot be solved: {error}"
+        )
+
+
+def _add(totals: dict[int, float], rates: dict[int, float], scale: float = 1) -> None:
+    for key, rate in rates.items():
+        totals[key] = totals.get(key, 0) + rate * scale
+
+
+def _scale(rates: dict[int, float], scale: float) -> list[dict]:
+    return [
+        {"ITEM_ID": item_id, "RATE": rate * scale}
+        for item_id, rate in sorted(rates.items())
+    ]
+
+
+def scaled(rows: list[dict], scale: float) -> list[dict]:
+    """
+    Sums the rates of the rows per ITEM_ID and multiplies them by the scale.
+    """
+    rates: dict[int, float] = {}
+    for row in rows:
+        rates[row["ITEM_ID"]] = rates.get(row["ITEM_ID"], 0) + row["RATE"]
+    return _scale(rates, scale)
@@ -0,0 +1,126 @@
+"""
+Module for the strongly connected components of the recipe graph.
+"""
+
+from collections.abc import Callable, Hashable, Iterable
+
+from .graph import RecipeGraph
+
+# Kinds of nodes, a recipe depending on the items it consumes and an item on the
+# recipes producing it.
+RECIPE = 0
+ITEM = 1
+
+
+class Components:
+    """
+    Strongly connected components of a directed graph given by the successors of
+    its nodes, found by Tarjan's algorithm.
+
+    Nodes are visited from the ones asked about, so only the part of the graph
+    they reach is walked, and each node is walked once whatever the number of
+    questions. The walk keeps its own stack instead of recursing, so it is not
+    bounded by the depth of the graph. It is not thread-safe, callers sharing the
+    components hold a lock around index().
+    """
+
+    def __init__(self, successors: Callable[[Hashable], Iterable[Hashable]]):
+        """
+        Creates the components of the graph with the given successors.
+        """
+        self.successors = successors
+        self.members: list[list[Hashable]] = []
+        self._component: dict[Hashable, int] = {}
+        self._index: dict[Hashable, int] = {}
+        self._low: dict[Hashable, int] = {}
+        self._stack: list[Hashable] = []
+        self._on_stack: set[Hashable] = set()
+
+    def index(self, node: Hashable) -> int:
+        """
+        Returns the position in members of the component of the node. Components
+        are numbered after every component they reach.
+        """
+        if node not in self._component:
+            self._visit(node)
+        return self._component[node]
+
+    def _visit(self, root: Hashable) -> None:
+        try:
+            self._walk(root)
+        except BaseException:
+            # Forgets the nodes of the interrupted walk, so a later one starts over.
+            for node in self._stack:
+                del self._index[node], self._low[node]
+            self._stack.clear()
+            self._on_stack.clear()
+            raise
+
+    def _walk(self, root: Hashable) -> None:
+        self._open(root)
+        work = [(root, iter(self.successors(root)))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in self._index:
+                    self._open(successor)
+                    work.append((successor, iter(self.successors(successor))))
+                    break
+                if successor in self._on_stack:
+                    self._low[node] = min(self._low[node], self._index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    self._low[parent] = min(self._low[parent], self._low[node])
+                if self._low[node] == self._index[node]:
+                    self._close(node)
+
+    def _open(self, node: Hashable) -> None:
+        self._index[node] = self._low[node] = len(self._index)
+        self._stack.append(node)
+        self._on_stack.add(node)
+
+    def _close(self, root: Hashable) -> None:
+        # Pops the component rooted at the node off the stack.
+        members = []
+        while True:
+            node = self._stack.pop()
+            self._on_stack.discard(node)
+            self._component[node] = len(self.members)
+            members.append(node)
+            if node == root:
+                break
+        self.members.append(members)
+
+
+def recipe_cycles(graph: RecipeGraph) -> list[dict]:
+    """
+    Returns the RECIPES and the ITEMS of every cycle of the graph, the strongly
+    connected components of more than one node where a recipe depends on the items
+    it consumes and an item on every recipe producing it.
+    """
+
+    def successors(node: tuple[int, int]) -> list[tuple[int, int]]:
+        kind, node_id = node
+        if kind == RECIPE:
+            return [(ITEM, item_id) for item_id in graph.ingredients(node_id)]
+        return [
+            (RECIPE, recipe_id)
+            for recipe_id, rate in graph.producers(node_id).items()
+            if rate > 0
+        ]
+
+    components = Components(successors)
+    for recipe_id in sorted(graph.recipes()):
+        components.index((RECIPE, recipe_id))
+    cycles = []
+    for members in components.members:
+        if len(members) > 1:
+            cycles.append(
+                {
+                    "RECIPES": sorted(i for kind, i in members if kind == RECIPE),
+                    "ITEMS": sorted(i for kind, i in members if kind == ITEM),
+                }
+            )
+    return sorted(cycles, key=lambda cycle: cycle["RECIPES"])
@@ -0,0 +1,292 @@
+"""
+Module for the graph between items and the recipes consuming and producing them.
+"""
+
+from collections.abc import Callable
+import functools
+import threading
+from typing import TypeVar
+
+import numpy as np
+import pandas as pd
+
+from .storage import TableStorage
+
+T = TypeVar("T")
+
+# Kinds of edges, named after the bridge table each one is read from.
+INGREDIENTS = "ingredients"
+PRODUCTS = "products"
+
+
+class RecipeGraph:
+    """
+    Bipartite graph of the items consumed and produced by every recipe, as implied
+    by the rows of the ingredient and product tables.
+
+    Adjacency is kept in both directions, from a recipe to its ingredients and
+    products and from an item to the recipes consuming and producing it, with the
+    rates of the rows linking the same pair summed. Every row is remembered by its
+    key, so adding, updating or removing a single row costs O(1) whatever the size
+    of the tables.
+
+    The version is incremented by every change, caches of anything computed from
+    the graph can key on it, as cached() does. Readers hold reading() to see it
+    between two transactions, writers change it from within their transaction.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty graph.
+        """
+        self.version = 0
+        self._edges: dict[str, dict[int, tuple[int, int, float]]] = {
+            INGREDIENTS: {},
+            PRODUCTS: {},
+        }
+        self._counts: dict[str, dict[tuple[int, int], int]] = {
+            INGREDIENTS: {},
+            PRODUCTS: {},
+        }
+        self._recipes: dict[str, dict[int, dict[int, float]]] = {
+            INGREDIENTS: {},
+            PRODUCTS: {},
+        }
+        self._items: dict[str, dict[int, dict[int, float]]] = {
+            INGREDIENTS: {},
+            PRODUCTS: {},
+        }
+        self._keys: dict[str, str] = {}
+        self._cache: dict[str, tuple[int, object]] = {}
+        self._listeners: dict[str, functools.partial] = {}
+        self._lock = threading.Lock()
+        self._cache_lock = threading.RLock()
+
+    def watch(self, kind: str, storage: TableStorage) -> None:
+        """
+        Loads the edges of the given kind from the rows of a memory table storage
+        and keeps them up to date with every write to it.
+        """
+        self._keys[kind] = storage.key
+        self.reload(kind, storage.snapshot().frame)
+        if kind not in self._listeners:
+            self._listeners[kind] = functools.partial(self._changed, kind)
+        storage.listen(self._listeners[kind])
+
+    def reload(self, kind: str, rows: pd.DataFrame) -> None:
+        """
+        Replaces the edges of the given kind with the ones of the rows.
+        """
+        key = self._keys.setdefault(
+            kind, "INGREDIENT_ID" if kind == INGREDIENTS else "PRODUCT_ID"
+        )
+        with self._lock:
+            self._edges[kind] = {}
+            self._counts[kind] = {}
+            self._recipes[kind] = {}
+            self._items[kind] = {}
+            self.version += 1
+        self._extend(kind, rows, key)
+
+    def add(
+        self, kind: str, key: int, recipe_id: int, item_id: int, rate: float
+    ) -> None:
+        """
+        Adds the edge of the row with the given key, replacing its previous one.
+        """
+        with self._lock:
+            self._discard(kind, key)
+            self._add(kind, key, recipe_id, item_id, rate)
+            self.version += 1
+
+    def discard(self, kind: str, key: int) -> None:
+        """
+        Removes the edge of the row with the given key, if there is one.
+        """
+        with self._lock:
+            self._discard(kind, key)
+            self.version += 1
+
+    def ingredients(self, recipe_id: int) -> dict[int, float]:
+        """
+        Returns the rate of every item consumed by the recipe.
+        """
+        return dict(self._recipes[INGREDIENTS].get(recipe_id, {}))
+
+    def products(self, recipe_id: int) -> dict[int, float]:
+        """
+        Returns the rate of every item produced by the recipe.
+        """
+        return dict(self._recipes[PRODUCTS].get(recipe_id, {}))
+
+    def consumers(self, item_id: int) -> dict[int, float]:
+        """
+        Returns the rate at which every recipe consuming the item consumes it.
+        """
+        return dict(self._items[INGREDIENTS].get(item_id, {}))
+
+    def producers(self, item_id: int) -> dict[int, float]:
+        """
+        Returns the rate at which every recipe producing the item produces it.
+        """
+        return dict(self._items[PRODUCTS].get(item_id, {}))
+
+    def recipes(self) -> set[int]:
+        """
+        Returns the recipes with at least one ingredient or product.
+        """
+        return self._recipes[INGREDIENTS].keys() | self._recipes[PRODUCTS].keys()
+
+    def items(self) -> set[int]:
+        """
+        Returns the items consumed or produced by at least one recipe.
+        """
+        return self._items[INGREDIENTS].keys() | self._items[PRODUCTS].keys()
+
+    def edges(self, kind: str) -> tuple[list[int], list[int], list[float]]:
+        """
+        Returns the recipe, the item and the summed rate of every edge of the given
+        kind, as three lists.
+        """
+        recipes: list[int] = []
+        items: list[int] = []
+        rates: list[float] = []
+        for recipe_id, neighbours in self._recipes[kind].items():
+            recipes.extend([recipe_id] * len(neighbours))
+            items.extend(neighbours)
+            rates.extend(neighbours.values())
+        return recipes, items, rates
+
+    def cached(self, name: str, compute: Callable[["RecipeGraph"], T]) -> T:
+        """
+        Returns what compute returns for the graph, computed again only once the
+        version has moved since the last call with the same name. Concurrent
+        readers wait for a single computation.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(name)
+            if entry is None or entry[0] != self.version:
+                entry = (self.version, compute(self))
+                self._cache[name] = entry
+            return entry[1]
+
+    def metrics(self) -> dict:
+        """
+        Returns the version and the size of the graph.
+        """
+        return {
+            "version": self.version,
+            "recipes": len(self.recipes()),
+            "items": len(self.items()),
+            "ingredients": len(self._edges[INGREDIENTS]),
+            "products": len(self._edges[PRODUCTS]),
+        }
+
+    def _changed(self, kind: str, operation: str, payload) -> None:
+        key = self._keys[kind]
+        if operation in ("append", "update"):
+            self.add(
+                kind,
+                payload[key],
+                payload["RECIPE_ID"],
+                payload["ITEM_ID"],
+                payload["RATE"],
+            )
+        elif operation == "extend":
+            self._extend(kind, payload, key)
+        elif operation == "remove":
+            self.discard(kind, payload)
+        elif operation == "restore":
+            self.reload(kind, payload.frame)
+
+    def _extend(self, kind: str, rows: pd.DataFrame, key: str) -> None:
+        if rows.empty:
+            return
+        columns = zip(
+            rows[key].tolist(),
+            rows["RECIPE_ID"].tolist(),
+            rows["ITEM_ID"].tolist(),
+            rows["RATE"].tolist(),
+        )
+        with self._lock:
+            if not self._edges[kind] and not rows[key].duplicated().any():
+                self._load(kind, rows, key)
+            else:
+                for row_key, recipe_id, item_id, rate in columns:
+                    self._discard(kind, row_key)
+                    self._add(kind, row_key, recipe_id, item_id, rate)
+            self.version += 1
+
+    def _load(self, kind: str, rows: pd.DataFrame, key: str) -> None:
+        # Fills the empty edges of a kind with rows of distinct keys, summing the
+        # rates of each pair in one grouping instead of row by row.
+        self._edges[kind] = dict(
+            zip(
+                rows[key].tolist(),
+                zip(
+                    rows["RECIPE_ID"].tolist(),
+                    rows["ITEM_ID"].tolist(),
+                    rows["RATE"].tolist(),
+                ),
+            )
+        )
+        pairs = rows.groupby(["RECIPE_ID", "ITEM_ID"], sort=False)["RATE"].agg(
+            ["sum", "count"]
+        )
+        recipes = pairs.index.get_level_values(0).to_numpy()
+        items = pairs.index.get_level_values(1).to_numpy()
+        rates = pairs["sum"].to_numpy()
+        self._counts[kind] = dict(
+            zip(zip(recipes.tolist(), items.tolist()), pairs["count"].tolist())
+        )
+        self._recipes[kind] = _grouped(recipes, items, rates)
+        self._items[kind] = _grouped(items, recipes, rates)
+
+    def _add(
+        self, kind: str, key: int, recipe_id: int, item_id: int, rate: float
+    ) -> None:
+        self._edges[kind][key] = (recipe_id, item_id, rate)
+        counts = self._counts[kind]
+        counts[recipe_id, item_id] = counts.get((recipe_id, item_id), 0) + 1
+        by_recipe = self._recipes[kind].setdefault(recipe_id, {})
+        by_recipe[item_id] = by_recipe.get(item_id, 0) + rate
+        by_item = self._items[kind].setdefault(item_id, {})
+        by_item[recipe_id] = by_item.get(recipe_id, 0) + rate
+
+    def _discard(self, kind: str, key: int) -> None:
+        edge = self._edges[kind].pop(key, None)
+        if edge is None:
+            return
+        recipe_id, item_id, rate = edge
+        counts = self._counts[kind]
+        counts[recipe_id, item_id] -= 1
+        if counts[recipe_id, item_id]:
+            self._recipes[kind][recipe_id][item_id] -= rate
+            self._items[kind][item_id][recipe_id] -= rate
+            return
+        del counts[recipe_id, item_id]
+        _unlink(self._recipes[kind], recipe_id, item_id)
+        _unlink(self._items[kind], item_id, recipe_id)
+
+
+def _grouped(
+    outer: np.ndarray, inner: np.ndarray, values: np.ndarray
+) -> dict[int, dict[int, float]]:
+    # Builds the adjacency of every outer node in one dict construction per node,
+    # from the pairs sorted by their outer node.
+    order = np.argsort(outer, kind="stable")
+    outer = outer[order]
+    inner, values = inner[order].tolist(), values[order].tolist()
+    starts = np.flatnonzero(np.r_[True, outer[1:] != outer[:-1]])
+    bounds = starts.tolist() + [len(outer)]
+    return {
+        node: dict(zip(inner[start:end], values[start:end]))
+        for node, start, end in zip(outer[starts].tolist(), bounds, bounds[1:])
+    }
+
+
+def _unlink(adjacency: dict[int, dict[int, float]], node: int, other: int) -> None:
+    neighbours = adjacency[node]
+    del neighbours[other]
+    if not neighbours:
+        del adjacency[node]
@@ -0,0 +1,182 @@
+"""
+Module for the in-memory indexes kept alongside the core tables.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+class UniqueIndex:
+    """
+    Hash index mapping the primary key of a table to the row position holding it.
+    """
+
+    def __init__(self, column: str):
+        """
+        Creates an empty index over the given column.
+        """
+        self.column = column
+        self._positions: dict[int, int] = {}
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def get(self, key: int) -> int | None:
+        """
+        Returns the row position of the given key, or None if it is not indexed.
+        """
+        return self._positions.get(key)
+
+    def add(self, key: int, position: int) -> None:
+        """
+        Indexes a single row appended at the given position.
+        """
+        self._positions[key] = position
+
+    def rebuild(self, frame: pd.DataFrame) -> None:
+        """
+        Re-indexes every row of the frame, used after rows were removed.
+        """
+        self._positions = dict(zip(frame[self.column].tolist(), range(len(frame))))
+
+    def extend(self, frame: pd.DataFrame, start: int) -> None:
+        """
+        Indexes rows appended to the table, the first of which sits at position start.
+        """
+        self._positions.update(
+            zip(frame[self.column].tolist(), range(start, start + len(frame)))
+        )
+
+
+class ForeignKeyIndex:
+    """
+    Multi-value index mapping a foreign key to the set of row positions referencing it.
+    """
+
+    def __init__(self, column: str):
+        """
+        Creates an empty index over the given column.
+        """
+        self.column = column
+        self._positions: dict[int, set[int]] = {}
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._positions
+
+    def get(self, key: int) -> set[int]:
+        """
+        Returns the row positions referencing the given key.
+        """
+        return self._positions.get(key, set())
+
+    def add(self, key: int, position: int) -> None:
+        """
+        Indexes a single row appended at the given position.
+        """
+        self._positions.setdefault(key, set()).add(position)
+
+    def rebuild(self, frame: pd.DataFrame) -> None:
+        """
+        Re-indexes every row of the frame, used after rows were removed.
+        """
+        self._positions = {}
+        self.extend(frame, 0)
+
+    def extend(self, frame: pd.DataFrame, start: int) -> None:
+        """
+        Indexes rows appended to the table, the first of which sits at position start.
+        """
+        keys = frame[self.column].to_numpy()
+        if not len(keys):
+            return
+        order = np.argsort(keys, kind="stable")
+        unique, first = np.unique(keys[order], return_index=True)
+        positions = (order + start).tolist()
+        bounds = [*first.tolist(), len(positions)]
+        for key, begin, end in zip(unique.tolist(), bounds, bounds[1:]):
+            self._positions.setdefault(key, set()).update(positions[begin:end])
+
+    def replaced(self, position: int, old_key: int, new_key: int) -> "ForeignKeyIndex":
+        """
+        Returns a copy of the index with the row at position moved from old_key to
+        new_key after an in-place update. The copy shares the position sets of every
+        other key, the index itself is left untouched for existing snapshots.
+        """
+        if old_key == new_key:
+            return self
+        index = ForeignKeyIndex(self.column)
+        index._positions = dict(self._positions)
+        positions = self._positions[old_key] - {position}
+        if positions:
+            index._positions[old_key] = positions
+        else:
+            del index._positions[old_key]
+        index._positions[new_key] = self._positions.get(new_key, set()) | {position}
+        return index
+
+
+class SortedIndex:
+    """
+    Column values in sorted order alongside the row positions holding them, used to
+    answer range and prefix queries with binary searches.
+    """
+
+    def __init__(self, frame: pd.DataFrame, column: str):
+        """
+        Builds the index over the given column of the frame.
+        """
+        self.column = column
+        values = frame[column].to_numpy()
+        self._order = np.argsort(values, kind="stable")
+        self._values = values[self._order]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def extended(self, values: np.ndarray, positions: np.ndarray) -> "SortedIndex":
+        """
+        Returns a copy of the index with the values of rows appended at the given
+        positions merged in, sorting only the new values. The index itself is left
+        untouched for existing snapshots.
+        """
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        at = np.searchsorted(self._values, values, "right")
+        index = copy.copy(self)
+        index._values = np.insert(self._values, at, values)
+        index._order = np.insert(self._order, at, positions[order])
+        return index
+
+    def between(self, low=None, high=None) -> np.ndarray:
+        """
+        Returns the row positions with values strictly between low and high,
+        either bound may be None to leave that side open.
+        """
+        start = 0 if low is None else np.searchsorted(self._values, low, "right")
+        stop = (
+            len(self._values)
+            if high is None
+            else np.searchsorted(self._values, high, "left")
+        )
+        return self._order[start : max(start, stop)]
+
+    def following(self, low, count: int) -> np.ndarray:
+        """
+        Returns the row positions of the first count values greater than low, in
+        value order, starting from the smallest value if low is None.
+        """
+        start = 0 if low is None else np.searchsorted(self._values, low, "right")
+        return self._order[start : start + count]
+
+    def prefixed(self, prefix: str) -> np.ndarray:
+        """
+        Returns the row positions with string values starting with the prefix.
+        """
+        start = np.searchsorted(self._values, prefix, "left")
+        stop = np.searchsorted(self._values, prefix + chr(0x10FFFF), "left")
+        return self._order[start:stop]
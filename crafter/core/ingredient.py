@@ -1,8 +1,22 @@
+from collections.abc import Iterator
+
 from flask import abort
+import flask_smorest
 import pandas as pd
 
+from .base import batch_conflicts
 from .item import ItemTable
 from .recipe import RecipeTable
+from .storage import TableStorage, records
+from .transaction import transactional
+
+
+SCHEMA: dict[str, str] = {
+    "INGREDIENT_ID": "int64",
+    "ITEM_ID": "int64",
+    "RECIPE_ID": "int64",
+    "RATE": "int32",
+}
 
 
 class IngredientTable:
@@ -10,8 +24,10 @@ class IngredientTable:
     Singleton class for managing the 'ingredient' table.
     """
 
-    _ingredients: pd.DataFrame = pd.DataFrame(
-        columns=["INGREDIENT_ID", "ITEM_ID", "RECIPE_ID", "RATE"]
+    _ingredients: TableStorage = TableStorage(
+        "INGREDIENT_ID",
+        SCHEMA,
+        foreign=("ITEM_ID", "RECIPE_ID"),
     )
 
     def __init__(self):
@@ -19,90 +35,120 @@ class IngredientTable:
         Initializes the singleton instance if it doesn't already exist.
         """
         if IngredientTable._ingredients is None:
-            IngredientTable._ingredients = pd.DataFrame(
-                columns=["INGREDIENT_ID", "ITEM_ID", "RECIPE_ID", "RATE"]
+            IngredientTable._ingredients = TableStorage(
+                "INGREDIENT_ID",
+                SCHEMA,
+                foreign=("ITEM_ID", "RECIPE_ID"),
             )
 
-    def get_many(self) -> list:
+    def storage(self) -> TableStorage:
+        """
+        Returns the storage backing the ingredient table.
+        """
+        return IngredientTable._ingredients
+
+    def get_many(self, columns: list[str] | None = None) -> list:
         """
         Returns the current ingredients DataFrame.
         """
-        return IngredientTable._ingredients.to_dict(orient="records")
+        return records(IngredientTable._ingredients.frame, columns)
+
+    def iter_many(
+        self, batch_size: int, columns: list[str] | None = None
+    ) -> Iterator[list]:
+        """
+        Yields every ingredient in batches of at most batch_size records.
+        """
+        for frame in IngredientTable._ingredients.batches(batch_size):
+            yield records(frame, columns)
 
-    def get_one(self, entry_id: int) -> dict:
+    def get_page(
+        self, after: int | None, limit: int, columns: list[str] | None = None
+    ) -> tuple[list, int | None]:
+        """
+        Returns up to limit ingredients with an ID greater than after, and the cursor
+        of the next page.
+        """
+        frame, cursor = IngredientTable._ingredients.page(after, limit)
+        return records(frame, columns), cursor
+
+    def get_one(self, entry_id: int, columns: list[str] | None = None) -> dict:
         """
         Returns the ingredient with the specified INGREDIENT_ID.
         """
-        ingredient_row = IngredientTable._ingredients[
-            IngredientTable._ingredients["INGREDIENT_ID"] == entry_id
-        ]
-        if ingredient_row.empty:
+        snapshot = IngredientTable._ingredients.snapshot()
+        position = snapshot.locate(entry_id)
+        if position is None:
             abort(404, description=f"Ingredient with id {entry_id} not found")
-        return ingredient_row.to_dict(orient="records")[0]
+        return snapshot.row(position, columns)
 
+    @transactional
     def add_one(self, content: dict) -> dict:
         """
         Adds a new ingredient to the table.
         """
-        if (
-            content["INGREDIENT_ID"]
-            in IngredientTable._ingredients["INGREDIENT_ID"].values
-        ):
+        if content["INGREDIENT_ID"] in IngredientTable._ingredients:
             abort(
                 409,
                 description=f"INGREDIENT_ID {content['INGREDIENT_ID']} already exists",
             )
         # Verrify that the RECEIPE_ID AND ITEM_ID exist in the respective tables
-        if not ItemTable().query({"ITEM_ID": content["ITEM_ID"]}):
+        if content["ITEM_ID"] not in ItemTable():
             abort(
                 409,
                 description=f"ITEM_ID {content['ITEM_ID']} does not exist in the item table",
             )
-        if not RecipeTable().query({"RECIPE_ID": content["RECIPE_ID"]}):
+        if content["RECIPE_ID"] not in RecipeTable():
             abort(
                 409,
                 description=f"RECIPE_ID {content['RECIPE_ID']} does not exist in the recipe table",
             )
-        IngredientTable._ingredients = pd.concat(
-            [
-                IngredientTable._ingredients,
-                pd.DataFrame([content]).reindex(
-                    columns=IngredientTable._ingredients.columns
-                ),
-            ],
-            ignore_index=True,
-        )
+        IngredientTable._ingredients.append(content)
         return {"message": "Ingredient added successfully"}
 
+    @transactional
     def add_many(self, content: list) -> dict:
         """
         Adds multiple new ingredients to the table.
-        """
-        for entry in content:
-            self.add_one(entry)
+
+        The whole batch is validated at once and appended with a single concat,
+        every conflicting row is reported in the error response.
+        """
+        rows = pd.DataFrame(content)
+        conflicts = batch_conflicts(
+            rows,
+            "INGREDIENT_ID",
+            self,
+            {"ITEM_ID": (ItemTable(), "item"), "RECIPE_ID": (RecipeTable(), "recipe")},
+        )
+        if conflicts:
+            flask_smorest.abort(
+                409,
+                message=f"{len(conflicts)} ingredients could not be added",
+                errors=conflicts,
+            )
+        IngredientTable._ingredients.extend(rows)
         return {"message": "Ingredients added successfully"}
 
+    @transactional
     def update_or_create(self, entry_id: int, content: dict) -> dict:
         """
         Updates the ingredient with the specified INGREDIENT_ID.
         """
         if entry_id != content["INGREDIENT_ID"]:
-            if entry_id not in IngredientTable._ingredients["INGREDIENT_ID"].values:
+            if entry_id not in IngredientTable._ingredients:
                 abort(404, description=f"Ingredient with id {entry_id} not found")
-            if (
-                content["INGREDIENT_ID"]
-                in IngredientTable._ingredients["INGREDIENT_ID"].values
-            ):
+            if content["INGREDIENT_ID"] in IngredientTable._ingredients:
                 abort(
                     409,
                     description=f"INGREDIENT_ID {content['INGREDIENT_ID']} already exists",
                 )
-            if not ItemTable().query({"ITEM_ID": content["ITEM_ID"]}):
+            if content["ITEM_ID"] not in ItemTable():
                 abort(
                     409,
                     description=f"ITEM_ID {content['ITEM_ID']} does not exist in the item table",
                 )
-            if not RecipeTable().query({"RECIPE_ID": content["RECIPE_ID"]}):
+            if content["RECIPE_ID"] not in RecipeTable():
                 abort(
                     409,
                     description=f"RECIPE_ID {content['RECIPE_ID']} does not exist in the recipe table",
@@ -110,42 +156,54 @@ class IngredientTable:
             self.add_one(content)
             self.delete(entry_id)
             return {"message": "Ingredient updated successfully"}
-        if entry_id in IngredientTable._ingredients["INGREDIENT_ID"].values:
-            if not ItemTable().query({"ITEM_ID": content["ITEM_ID"]}):
+        if entry_id in IngredientTable._ingredients:
+            if content["ITEM_ID"] not in ItemTable():
                 abort(
                     409,
                     description=f"ITEM_ID {content['ITEM_ID']} does not exist in the item table",
                 )
-            if not RecipeTable().query({"RECIPE_ID": content["RECIPE_ID"]}):
+            if content["RECIPE_ID"] not in RecipeTable():
                 abort(
                     409,
                     description=f"RECIPE_ID {content['RECIPE_ID']} does not exist in the recipe table",
                 )
-            IngredientTable._ingredients.loc[
-                IngredientTable._ingredients["INGREDIENT_ID"] == entry_id
-            ] = (
-                pd.DataFrame([content])
-                .reindex(columns=IngredientTable._ingredients.columns)
-                .values
-            )
+            IngredientTable._ingredients.update(entry_id, content)
             return {"message": "Ingredient updated successfully"}
         return self.add_one(content)
 
+    @transactional
     def delete(self, entry_id: int) -> dict:
         """
         Deletes the ingredient with the specified INGREDIENT_ID.
         """
-        if entry_id not in IngredientTable._ingredients["INGREDIENT_ID"].values:
+        if entry_id not in IngredientTable._ingredients:
             abort(404, description=f"Ingredient with id {entry_id} not found")
-        IngredientTable._ingredients = IngredientTable._ingredients[
-            IngredientTable._ingredients["INGREDIENT_ID"] != entry_id
-        ]
+        IngredientTable._ingredients.remove(entry_id)
         return {"message": "Ingredient deleted successfully"}
 
-    def query(self, query: dict) -> list:
+    def __contains__(self, entry_id: int) -> bool:
+        """
+        Returns whether an ingredient with the specified INGREDIENT_ID exists.
+        """
+        return entry_id in IngredientTable._ingredients
+
+    def referencing(
+        self, column: str, key: int, columns: list[str] | None = None
+    ) -> list:
+        """
+        Returns the ingredients whose ITEM_ID or RECIPE_ID column holds key, found
+        through the index on that column.
+        """
+        snapshot = IngredientTable._ingredients.snapshot()
+        return snapshot.rows(sorted(snapshot.positions(column, key)), columns)
+
+    def query(self, query: dict, columns: list[str] | None = None) -> list:
         """
         Queries the ingredient table.
         """
-        return IngredientTable._ingredients.query(
-            " and ".join([f"{key} == {value}" for key, value in query.items()])
-        ).to_dict(orient="records")
+        return records(IngredientTable._ingredients.select(query), columns)
+
+
+# Items and recipes cannot be deleted while a ingredient references them.
+IngredientTable._ingredients.refer("ITEM_ID", ItemTable().storage())
+IngredientTable._ingredients.refer("RECIPE_ID", RecipeTable().storage())
@@ -2,120 +2,159 @@
 Module for managing the 'item' table.
 """
 
+from collections.abc import Iterator
+
 from flask import abort
+import flask_smorest
 import pandas as pd
 
+from .base import batch_conflicts
+from .storage import TableStorage, records
+from .transaction import transactional
+
+
+SCHEMA: dict[str, str] = {"ITEM_ID": "int64", "NAME": "object"}
+
 
 class ItemTable:
     """
     Singleton class for managing the 'item' table.
     """
 
-    _items: pd.DataFrame = pd.DataFrame(columns=["ITEM_ID", "NAME"])
+    _items: TableStorage = TableStorage("ITEM_ID", SCHEMA)
 
     def __init__(self):
         """
         Initializes the singleton instance if it doesn't already exist.
         """
         if ItemTable._items is None:
-            ItemTable._items = pd.DataFrame(columns=["ITEM_ID", "NAME"])
+            ItemTable._items = TableStorage("ITEM_ID", SCHEMA)
+
+    def storage(self) -> TableStorage:
+        """
+        Returns the storage backing the item table.
+        """
+        return ItemTable._items
 
-    def get_many(self) -> list:
+    def get_many(self, columns: list[str] | None = None) -> list:
         """
         Returns the current items DataFrame.
         """
-        return ItemTable._items.to_dict(orient="records")
+        return records(ItemTable._items.frame, columns)
+
+    def iter_many(
+        self, batch_size: int, columns: list[str] | None = None
+    ) -> Iterator[list]:
+        """
+        Yields every item in batches of at most batch_size records.
+        """
+        for frame in ItemTable._items.batches(batch_size):
+            yield records(frame, columns)
 
-    def get_one(self, entry_id: int) -> dict:
+    def get_page(
+        self, after: int | None, limit: int, columns: list[str] | None = None
+    ) -> tuple[list, int | None]:
+        """
+        Returns up to limit items with an ID greater than after, and the cursor
+        of the next page.
+        """
+        frame, cursor = ItemTable._items.page(after, limit)
+        return records(frame, columns), cursor
+
+    def get_one(self, entry_id: int, columns: list[str] | None = None) -> dict:
         """
         Returns the item with the specified ITEM_ID.
         """
-        item_row = ItemTable._items[ItemTable._items["ITEM_ID"] == entry_id]
-        if item_row.empty:
+        snapshot = ItemTable._items.snapshot()
+        position = snapshot.locate(entry_id)
+        if position is None:
             abort(404, description=f"Item with id {entry_id} not found")
-        return item_row.to_dict(orient="records")[0]
+        return snapshot.row(position, columns)
 
     def get_next_id(self) -> int:
         """
         Returns the next available ITEM_ID.
         """
-        if ItemTable._items.empty:
+        if not len(ItemTable._items):
             return 0
-        return int(ItemTable._items["ITEM_ID"].max()) + 1
+        return int(ItemTable._items.frame["ITEM_ID"].max()) + 1
 
+    @transactional
     def add_one(self, content: dict) -> dict:
         """
         Adds a new item to the table.
         """
-        if content["ITEM_ID"] in ItemTable._items["ITEM_ID"].values:
+        if content["ITEM_ID"] in ItemTable._items:
             abort(409, description=f"ITEM_ID {content['ITEM_ID']} already exists")
         if not content["NAME"]:
             abort(400, description="NAME cannot be empty")
-        ItemTable._items = pd.concat(
-            [
-                ItemTable._items,
-                pd.DataFrame([content]).reindex(columns=ItemTable._items.columns),
-            ],
-            ignore_index=True,
-        )
+        ItemTable._items.append(content)
         return {"message": "Item added successfully"}
 
+    @transactional
     def add_many(self, content: list) -> dict:
         """
         Adds multiple new items to the table.
-        """
+
+        Every ITEM_ID repeated in the batch or already in the table is reported in
+        the error response.
+        """
+        rows = pd.DataFrame(content)
+        conflicts = batch_conflicts(rows, "ITEM_ID", self, {})
+        if conflicts:
+            flask_smorest.abort(
+                409,
+                message=f"{len(conflicts)} items could not be added",
+                errors=conflicts,
+            )
         for entry in content:
-            if entry["ITEM_ID"] in ItemTable._items["ITEM_ID"].values:
-                abort(409, description=f"ITEM_ID {entry['ITEM_ID']} already exists")
             if not entry["NAME"]:
                 abort(400, description="NAME cannot be empty")
-        ItemTable._items = pd.concat(
-            [
-                ItemTable._items,
-                pd.DataFrame(pd.DataFrame(content)).reindex(
-                    columns=ItemTable._items.columns
-                ),
-            ],
-            ignore_index=True,
-        )
+        ItemTable._items.extend(rows)
         return {"message": "Items added successfully"}
 
+    @transactional
     def update_or_create(self, entry_id: int, content: dict) -> dict:
         """
         Updates or creates an item with the specified ITEM_ID.
         """
         if entry_id != content["ITEM_ID"]:
-            if entry_id not in ItemTable._items["ITEM_ID"].values:
+            if entry_id not in ItemTable._items:
                 abort(404, description=f"Item with id {entry_id} not found")
-            if content["ITEM_ID"] in ItemTable._items["ITEM_ID"].values:
+            if content["ITEM_ID"] in ItemTable._items:
                 abort(409, description=f"ITEM_ID {content['ITEM_ID']} already exists")
             if not content["NAME"]:
                 abort(400, description="NAME cannot be empty")
             self.add_one(content)
             self.delete(entry_id)
             return {"message": "Item updated successfully"}
-        if entry_id in ItemTable._items["ITEM_ID"].values:
+        if entry_id in ItemTable._items:
             if not content["NAME"]:
                 abort(400, description="NAME cannot be empty")
-            ItemTable._items.loc[ItemTable._items["ITEM_ID"] == entry_id] = (
-                pd.DataFrame([content]).reindex(columns=ItemTable._items.columns).values
-            )
+            ItemTable._items.update(entry_id, content)
             return {"message": "Item updated successfully"}
         return self.add_one(content)
 
+    @transactional
     def delete(self, entry_id: int) -> dict:
         """
         Deletes the item with the specified ITEM_ID.
         """
-        if entry_id not in ItemTable._items["ITEM_ID"].values:
+        if entry_id not in ItemTable._items:
             abort(404, description=f"Item with id {entry_id} not found")
-        ItemTable._items = ItemTable._items[ItemTable._items["ITEM_ID"] != entry_id]
+        if ItemTable._items.referenced(entry_id):
+            abort(409, description=f"ITEM_ID {entry_id} is still referenced")
+        ItemTable._items.remove(entry_id)
         return {"message": "Item deleted successfully"}
 
-    def query(self, query: dict) -> list:
+    def __contains__(self, entry_id: int) -> bool:
+        """
+        Returns whether an item with the specified ITEM_ID exists.
+        """
+        return entry_id in ItemTable._items
+
+    def query(self, query: dict, columns: list[str] | None = None) -> list:
         """
         Queries the item table.
         """
-        return ItemTable._items.query(
-            " and ".join([f"{key} == {value}" for key, value in query.items()])
-        ).to_dict(orient="records")
+        return records(ItemTable._items.select(query), columns)
@@ -0,0 +1,214 @@
+"""
+Module for the write-ahead journal of the in-memory tables.
+
+Every committed transaction is appended to the journal as a single JSON line
+holding the storage operations it made, and is made durable before the write
+returns. Concurrent transactions share a single fsync: whichever thread syncs
+first covers every line appended before it started, the others only wait for it.
+
+On startup the journal is replayed over the last snapshot of the tables. Replay
+applies every operation as an upsert or a removal of whatever is present, so it
+can run again over a snapshot that already holds some of the operations. A
+checkpoint rotates the journal aside and deletes it once the tables are written.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class Journal:
+    """
+    Append-only log of the operations made to a set of table storages.
+
+    Lines are written to the file descriptor unbuffered, so a crash of the process
+    loses none of them, only the ones not synced yet if the system goes down.
+    """
+
+    def __init__(self, path: str, storages: dict, read_only: bool = False):
+        """
+        Opens the journal at the given path for the storages, keyed by table name.
+        A read-only journal can only be replayed, and leaves its files untouched.
+        """
+        self.path = path
+        self.storages = storages
+        self.read_only = read_only
+        self._names = {id(storage): name for name, storage in storages.items()}
+        self._fd = None if read_only else _open(path)
+        self._condition = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+
+    def append(self, changes: list[tuple]) -> int:
+        """
+        Appends the (storage, operation, payload) changes of one transaction as a
+        single line, and returns the sequence number to pass to sync.
+
+        Must be called with the core write lock held, so lines follow the order in
+        which the transactions were applied.
+        """
+        line = json.dumps(
+            [
+                [self._names[id(storage)], operation, payload]
+                for storage, operation, payload in changes
+            ],
+            separators=(",", ":"),
+            default=_plain,
+        )
+        with self._condition:
+            _write(self._fd, line.encode() + b"\n")
+            self._written += 1
+            return self._written
+
+    def sync(self, sequence: int) -> None:
+        """
+        Blocks until the line with the given sequence number is on disk.
+        """
+        with self._condition:
+            while self._synced < sequence:
+                if self._syncing:
+                    self._condition.wait()
+                    continue
+                self._syncing = True
+                target = self._written
+                self._condition.release()
+                try:
+                    os.fsync(self._fd)
+                    synced = target
+                finally:
+                    self._condition.acquire()
+                    self._syncing = False
+                    self._condition.notify_all()
+                self._synced = max(self._synced, synced)
+
+    @property
+    def rotated(self) -> str:
+        """
+        Returns the path the journal is moved to by rotate.
+        """
+        return f"{self.path}.1"
+
+    def replay(self) -> int:
+        """
+        Applies every complete line of the rotated and current journal to the
+        storages and returns how many were applied. A torn line left by a crash, and
+        anything after it, is cut off the journal unless it is read-only.
+        """
+        applied = 0
+        for path in (self.rotated, self.path):
+            if os.path.exists(path):
+                applied += self._replay(path)
+        return applied
+
+    def _replay(self, path: str) -> int:
+        applied = 0
+        end = 0
+        with open(path, "rb") as file:
+            for line in file:
+                try:
+                    changes = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    changes = None
+                if changes is None:
+                    logger.warning("Discarding a torn entry at the end of %s", path)
+                    break
+                for name, operation, payload in changes:
+                    _apply(self.storages[name], operation, payload)
+                applied += 1
+                end += len(line)
+        if not self.read_only:
+            with open(path, "r+b") as file:
+                file.truncate(end)
+        return applied
+
+    def rotate(self) -> None:
+        """
+        Moves the lines written so far aside and starts an empty journal, so they
+        can be released once a checkpoint holds them. Lines left from a checkpoint
+        that did not finish stay in front of them.
+
+        Must be called with the core lock held, so no transaction is appended
+        meanwhile.
+        """
+        with self._condition:
+            while self._syncing:
+                self._condition.wait()
+            os.fsync(self._fd)
+            self._synced = self._written
+            if os.path.exists(self.rotated):
+                with (
+                    open(self.path, "rb") as source,
+                    open(self.rotated, "ab") as target,
+                ):
+                    shutil.copyfileobj(source, target)
+                    target.flush()
+                    os.fsync(target.fileno())
+                os.ftruncate(self._fd, 0)
+            else:
+                os.close(self._fd)
+                os.replace(self.path, self.rotated)
+                self._fd = _open(self.path)
+
+    def release(self) -> None:
+        """
+        Deletes the lines moved aside by rotate, once a checkpoint holds them.
+        """
+        if os.path.exists(self.rotated):
+            os.remove(self.rotated)
+
+    def close(self) -> None:
+        """
+        Syncs and closes the journal.
+        """
+        if self._fd is None:
+            return
+        self.sync(self._written)
+        os.close(self._fd)
+
+
+def _open(path: str) -> int:
+    return os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+
+def _write(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _apply(storage, operation: str, payload) -> None:
+    if operation == "append":
+        _put(storage, payload)
+    elif operation == "extend":
+        rows = pd.DataFrame(payload, columns=storage.columns)
+        present = rows[storage.key].map(storage.__contains__).to_numpy(dtype=bool)
+        for row in rows[present].to_dict(orient="records"):
+            _put(storage, row)
+        storage.extend(rows[~present])
+    elif operation == "update":
+        _put(storage, payload)
+    elif payload in storage:
+        storage.remove(payload)
+
+
+def _put(storage, row: dict) -> None:
+    if row[storage.key] in storage:
+        storage.update(row[storage.key], row)
+    else:
+        storage.append(row)
+
+
+def _plain(value):
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient="list")
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,128 @@
+"""
+Module for the sparse matrices of the rates at which recipes consume and produce
+items.
+"""
+
+import numpy as np
+
+from .graph import INGREDIENTS, PRODUCTS, RecipeGraph
+
+
+class SparseRows:
+    """
+    Matrix in compressed sparse row form, the columns of every row sorted.
+    """
+
+    def __init__(
+        self, shape: tuple[int, int], rows: np.ndarray, columns: np.ndarray, values
+    ):
+        """
+        Creates the matrix of the given shape holding values at the coordinates of
+        rows and columns, which no two entries share.
+        """
+        order = np.lexsort((columns, rows))
+        self.shape = shape
+        self.indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=self.indptr[1:])
+        self.indices = np.asarray(columns, dtype=np.int64)[order]
+        self.data = np.asarray(values, dtype=np.float64)[order]
+
+    def gather(
+        self, rows: np.ndarray, scales: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the entries of the given rows, a row of -1 standing for an empty
+        one, each multiplied by the scale of its row: the number of entries of every
+        row, and the columns and the values of all of them, one row after the other.
+        """
+        present = np.flatnonzero(rows >= 0)
+        starts = np.zeros(len(rows), dtype=np.int64)
+        lengths = np.zeros(len(rows), dtype=np.int64)
+        starts[present] = self.indptr[rows[present]]
+        lengths[present] = self.indptr[rows[present] + 1] - starts[present]
+        ends = np.cumsum(lengths)
+        positions = np.repeat(starts - ends + lengths, lengths) + np.arange(
+            lengths.sum()
+        )
+        values = self.data[positions] * np.repeat(scales, lengths)
+        return lengths, self.indices[positions], values
+
+
+class RateMatrix:
+    """
+    Recipe by item matrices of the ingredient and product rates of a recipe graph.
+
+    Rows follow the recipes of the graph and columns its items, both in ascending
+    order of their ID, so the rates of any set of recipes are read with a few
+    array operations. Items some recipe produces are flagged in produced.
+    """
+
+    def __init__(self, graph: RecipeGraph):
+        """
+        Builds the matrices of the current edges of the graph.
+        """
+        self.recipes = np.array(sorted(graph.recipes()), dtype=np.int64)
+        self.items = np.array(sorted(graph.items()), dtype=np.int64)
+        self.ingredients = self._matrix(graph, INGREDIENTS)
+        self.products = self._matrix(graph, PRODUCTS)
+        self.produced = np.zeros(len(self.items), dtype=bool)
+        self.produced[self.products.indices[self.products.data > 0]] = True
+
+    def rows(self, recipe_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the row of every recipe, -1 for the ones without ingredients or
+        products.
+        """
+        if not len(self.recipes):
+            return np.full(len(recipe_ids), -1, dtype=np.int64)
+        rows = np.searchsorted(self.recipes, recipe_ids)
+        found = self.recipes[np.minimum(rows, len(self.recipes) - 1)] == recipe_ids
+        return np.where(found, rows, -1)
+
+    def split(
+        self, lengths: np.ndarray, columns: np.ndarray, values: np.ndarray
+    ) -> list[list[dict]]:
+        """
+        Returns gathered entries as the list of the item rates of every row.
+        """
+        items = self.items[columns].tolist()
+        values = values.tolist()
+        bounds = [0, *np.cumsum(lengths).tolist()]
+        return [
+            [
+                {"ITEM_ID": item_id, "RATE": rate}
+                for item_id, rate in zip(items[start:end], values[start:end])
+            ]
+            for start, end in zip(bounds, bounds[1:])
+        ]
+
+    def balance(self, ingredients: tuple, products: tuple) -> list[dict]:
+        """
+        Returns the net rate of every item consumed or produced by gathered rows,
+        products counting positive and ingredients negative.
+        """
+        _, consumed, consumed_rates = ingredients
+        _, produced, produced_rates = products
+        size = len(self.items)
+        net = np.bincount(produced, produced_rates, minlength=size) - np.bincount(
+            consumed, consumed_rates, minlength=size
+        )
+        touched = np.zeros(size, dtype=bool)
+        touched[consumed] = True
+        touched[produced] = True
+        columns = np.flatnonzero(touched)
+        return [
+            {"ITEM_ID": item_id, "RATE": rate}
+            for item_id, rate in zip(
+                self.items[columns].tolist(), net[columns].tolist()
+            )
+        ]
+
+    def _matrix(self, graph: RecipeGraph, kind: str) -> SparseRows:
+        recipes, items, rates = graph.edges(kind)
+        return SparseRows(
+            (len(self.recipes), len(self.items)),
+            np.searchsorted(self.recipes, np.array(recipes, dtype=np.int64)),
+            np.searchsorted(self.items, np.array(items, dtype=np.int64)),
+            rates,
+        )
@@ -1,8 +1,22 @@
+from collections.abc import Iterator
+
 from flask import abort
+import flask_smorest
 import pandas as pd
 
+from .base import batch_conflicts
 from .item import ItemTable
 from .recipe import RecipeTable
+from .storage import TableStorage, records
+from .transaction import transactional
+
+
+SCHEMA: dict[str, str] = {
+    "PRODUCT_ID": "int64",
+    "ITEM_ID": "int64",
+    "RECIPE_ID": "int64",
+    "RATE": "int32",
+}
 
 
 class ProductTable:
@@ -10,8 +24,10 @@ class ProductTable:
     Singleton class for managing the 'product' table.
     """
 
-    _products: pd.DataFrame = pd.DataFrame(
-        columns=["PRODUCT_ID", "ITEM_ID", "RECIPE_ID", "RATE"]
+    _products: TableStorage = TableStorage(
+        "PRODUCT_ID",
+        SCHEMA,
+        foreign=("ITEM_ID", "RECIPE_ID"),
     )
 
     def __init__(self):
@@ -19,119 +35,173 @@ class ProductTable:
         Initializes the singleton instance if it doesn't already exist.
         """
         if ProductTable._products is None:
-            ProductTable._products = pd.DataFrame(
-                columns=["PRODUCT_ID", "ITEM_ID", "RECIPE_ID", "RATE"]
+            ProductTable._products = TableStorage(
+                "PRODUCT_ID",
+                SCHEMA,
+                foreign=("ITEM_ID", "RECIPE_ID"),
             )
 
-    def get_many(self) -> list:
+    def storage(self) -> TableStorage:
+        """
+        Returns the storage backing the product table.
+        """
+        return ProductTable._products
+
+    def get_many(self, columns: list[str] | None = None) -> list:
         """
         Returns the current products DataFrame.
         """
-        return ProductTable._products.to_dict(orient="records")
+        return records(ProductTable._products.frame, columns)
+
+    def iter_many(
+        self, batch_size: int, columns: list[str] | None = None
+    ) -> Iterator[list]:
+        """
+        Yields every product in batches of at most batch_size records.
+        """
+        for frame in ProductTable._products.batches(batch_size):
+            yield records(frame, columns)
+
+    def get_page(
+        self, after: int | None, limit: int, columns: list[str] | None = None
+    ) -> tuple[list, int | None]:
+        """
+        Returns up to limit products with an ID greater than after, and the cursor
+        of the next page.
+        """
+        frame, cursor = ProductTable._products.page(after, limit)
+        return records(frame, columns), cursor
 
     def get_next_id(self) -> int:
         """
         Returns the next available PRODUCT_ID for a new product.
         """
-        if ProductTable._products.empty:
+        if not len(ProductTable._products):
             return 0
-        return ProductTable._products["PRODUCT_ID"].max() + 1
+        return ProductTable._products.frame["PRODUCT_ID"].max() + 1
 
+    @transactional
     def add_many(self, content: list) -> dict:
         """
         Adds multiple new products to the table.
-        """
-        for entry in content:
-            self.add_one(entry)
+
+        The whole batch is validated at once and appended with a single concat,
+        every conflicting row is reported in the error response.
+        """
+        rows = pd.DataFrame(content)
+        conflicts = batch_conflicts(
+            rows,
+            "PRODUCT_ID",
+            self,
+            {"ITEM_ID": (ItemTable(), "item"), "RECIPE_ID": (RecipeTable(), "recipe")},
+        )
+        if conflicts:
+            flask_smorest.abort(
+                409,
+                message=f"{len(conflicts)} products could not be added",
+                errors=conflicts,
+            )
+        ProductTable._products.extend(rows)
         return {"message": "Products added successfully"}
 
-    def get_one(self, entry_id: int) -> dict:
+    def get_one(self, entry_id: int, columns: list[str] | None = None) -> dict:
         """
         Returns the product with the specified PRODUCT_ID.
         """
-        product_row = ProductTable._products[
-            ProductTable._products["PRODUCT_ID"] == entry_id
-        ]
-        if product_row.empty:
+        snapshot = ProductTable._products.snapshot()
+        position = snapshot.locate(entry_id)
+        if position is None:
             abort(404, description=f"Product with id {entry_id} not found")
-        return product_row.to_dict(orient="records")[0]
+        return snapshot.row(position, columns)
 
+    @transactional
     def add_one(self, content: dict) -> dict:
         """
         Adds a new product to the table.
         """
-        if content["PRODUCT_ID"] in ProductTable._products["PRODUCT_ID"].values:
+        if content["PRODUCT_ID"] in ProductTable._products:
             abort(
                 409,
                 description=f"PRODUCT_ID {content['PRODUCT_ID']} already exists",
             )
         # Verrify that the RECEIPE_ID AND ITEM_ID exist in the respective tables
-        if not ItemTable().query({"ITEM_ID": content["ITEM_ID"]}):
+        if content["ITEM_ID"] not in ItemTable():
             abort(
                 409,
                 description=f"ITEM_ID {content['ITEM_ID']} does not exist in the item table",
             )
-        if not RecipeTable().query({"RECIPE_ID": content["RECIPE_ID"]}):
+        if content["RECIPE_ID"] not in RecipeTable():
             abort(
                 409,
                 description=f"RECIPE_ID {content['RECIPE_ID']} does not exist in the recipe table",
             )
-        ProductTable._products = pd.concat(
-            [
-                ProductTable._products,
-                pd.DataFrame([content]).reindex(columns=ProductTable._products.columns),
-            ],
-            ignore_index=True,
-        )
+        ProductTable._products.append(content)
         return {"message": "Product added successfully"}
 
+    @transactional
     def update_or_create(self, entry_id: int, content: dict) -> dict:
         """
         Updates or creates a product with the specified PRODUCT_ID.
         """
+        if content["ITEM_ID"] not in ItemTable():
+            abort(
+                409,
+                description=f"ITEM_ID {content['ITEM_ID']} does not exist in the item table",
+            )
+        if content["RECIPE_ID"] not in RecipeTable():
+            abort(
+                409,
+                description=f"RECIPE_ID {content['RECIPE_ID']} does not exist in the recipe table",
+            )
         if entry_id != content["PRODUCT_ID"]:
-            if entry_id not in ProductTable._products["PRODUCT_ID"].values:
+            if entry_id not in ProductTable._products:
                 abort(404, description=f"Product with id {entry_id} not found")
-            if content["PRODUCT_ID"] in ProductTable._products["PRODUCT_ID"].values:
+            if content["PRODUCT_ID"] in ProductTable._products:
                 abort(
                     409,
                     description=f"PRODUCT_ID {content['PRODUCT_ID']} already exists",
                 )
-            if not ItemTable().query({"ITEM_ID": content["ITEM_ID"]}):
-                abort(
-                    409,
-                    description=f"ITEM_ID {content['ITEM_ID']} does not exist in the item table",
-                )
-            if not RecipeTable().query({"RECIPE_ID": content["RECIPE_ID"]}):
-                abort(
-                    409,
-                    description=f"RECIPE_ID {content['RECIPE_ID']} does not exist in the recipe table",
-                )
             self.add_one(content)
             self.delete(entry_id)
             return {"message": "Product updated successfully"}
-        if entry_id in ProductTable._products["PRODUCT_ID"].values:
-            ProductTable._products.loc[
-                ProductTable._products["PRODUCT_ID"] == entry_id
-            ] = content
+        if entry_id in ProductTable._products:
+            ProductTable._products.update(entry_id, content)
             return {"message": "Product updated successfully"}
         return self.add_one(content)
 
+    @transactional
     def delete(self, entry_id: int) -> dict:
         """
         Deletes the product with the specified PRODUCT_ID.
         """
-        if entry_id not in ProductTable._products["PRODUCT_ID"].values:
+        if entry_id not in ProductTable._products:
             abort(404, description=f"Product with id {entry_id} not found")
-        ProductTable._products = ProductTable._products[
-            ProductTable._products["PRODUCT_ID"] != entry_id
-        ]
+        ProductTable._products.remove(entry_id)
         return {"message": "Product deleted successfully"}
 
-    def query(self, query: dict) -> list:
+    def __contains__(self, entry_id: int) -> bool:
+        """
+        Returns whether a product with the specified PRODUCT_ID exists.
+        """
+        return entry_id in ProductTable._products
+
+    def referencing(
+        self, column: str, key: int, columns: list[str] | None = None
+    ) -> list:
+        """
+        Returns the products whose ITEM_ID or RECIPE_ID column holds key, found
+        through the index on that column.
+        """
+        snapshot = ProductTable._products.snapshot()
+        return snapshot.rows(sorted(snapshot.positions(column, key)), columns)
+
+    def query(self, query: dict, columns: list[str] | None = None) -> list:
         """
         Queries the product table using the given query.
         """
-        return ProductTable._products.query(
-            " and ".join([f"{key} == {value}" for key, value in query.items()])
-        ).to_dict(orient="records")
+        return records(ProductTable._products.select(query), columns)
+
+
+# Items and recipes cannot be deleted while a product references them.
+ProductTable._products.refer("ITEM_ID", ItemTable().storage())
+ProductTable._products.refer("RECIPE_ID", RecipeTable().storage())
@@ -0,0 +1,132 @@
+"""
+Module for compiling table queries into cached predicates.
+
+A query maps column names to the value they must equal. A column name suffixed
+with one of the OPERATORS applies that comparison instead, e.g. RECIPE_ID_IN
+takes a list of ids and RATE_GT a lower bound.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+OPERATORS = {"IN": "in", "GT": "gt", "LT": "lt", "STARTSWITH": "startswith"}
+
+
+def parse(key: str, columns: tuple) -> tuple[str, str]:
+    """
+    Splits a query key into the column it filters and its operator.
+    """
+    if key in columns:
+        return key, "eq"
+    column, _, suffix = key.rpartition("_")
+    if column not in columns or suffix not in OPERATORS:
+        raise ValueError(f"Unknown query field {key}")
+    return column, OPERATORS[suffix]
+
+
+class Predicate:
+    """
+    Compiled plan for every query over the same set of keys.
+
+    Equality and membership on the primary key or a foreign key are resolved to row
+    positions through the hash indexes. Failing that, ranges and prefixes on one
+    column are resolved through its sorted index, when the snapshot has one at hand.
+    Every other clause is matched with a vectorized mask over the rows those
+    positions select.
+    """
+
+    def __init__(self, lookups: tuple, ranges: tuple, masks: tuple):
+        """
+        Creates a plan from the (key, column, operator) clauses of each stage.
+        """
+        self.lookups = lookups
+        self.ranges = ranges
+        self.masks = masks
+
+    def __call__(self, snapshot, query: dict) -> pd.DataFrame:
+        """
+        Returns the rows of the table snapshot matching every clause of the query.
+        """
+        positions = None
+        for key, column, operator in self.lookups:
+            matches = _lookup(snapshot, column, operator, query[key])
+            positions = matches if positions is None else positions & matches
+        masks = self.masks
+        index = None
+        if positions is None and self.ranges:
+            index = snapshot.range_index(self.ranges[0][1])
+        if positions is not None:
+            frame = snapshot.take(sorted(positions))
+        elif index is not None:
+            frame = snapshot.take(_scan(index, self.ranges, query))
+        else:
+            frame = snapshot.frame
+            masks = self.ranges + masks
+        if masks and len(frame):
+            mask = np.ones(len(frame), dtype=bool)
+            for key, column, operator in masks:
+                mask &= _mask(frame[column], operator, query[key])
+            frame = frame[mask]
+        return frame
+
+
+@lru_cache(maxsize=256)
+def compile_query(
+    keys: frozenset, columns: tuple, primary: str, foreign: tuple
+) -> Predicate:
+    """
+    Returns the predicate for a query over the given keys of a table with the given
+    columns, primary key and foreign key indexes, compiled once per query shape.
+    """
+    clauses = sorted((key, *parse(key, columns)) for key in keys)
+    lookups = tuple(
+        clause
+        for clause in clauses
+        if clause[2] in ("eq", "in") and clause[1] in (primary, *foreign)
+    )
+    ranges = ()
+    if not lookups:
+        ranged = [clause for clause in clauses if clause[2] not in ("eq", "in")]
+        if ranged:
+            ranges = tuple(clause for clause in ranged if clause[1] == ranged[0][1])
+    masks = tuple(
+        clause for clause in clauses if clause not in lookups and clause not in ranges
+    )
+    return Predicate(lookups, ranges, masks)
+
+
+def _lookup(snapshot, column: str, operator: str, value) -> set[int]:
+    values = value if operator == "in" else [value]
+    if column == snapshot.primary.column:
+        positions = (snapshot.locate(key) for key in values)
+        return {position for position in positions if position is not None}
+    return set().union(*(snapshot.positions(column, key) for key in values))
+
+
+def _scan(index, ranges: tuple, query: dict) -> np.ndarray:
+    bounds = {operator: query[key] for key, _, operator in ranges}
+    positions = None
+    if "gt" in bounds or "lt" in bounds:
+        positions = index.between(bounds.get("gt"), bounds.get("lt"))
+    if "startswith" in bounds:
+        prefixed = index.prefixed(bounds["startswith"])
+        positions = (
+            prefixed if positions is None else np.intersect1d(positions, prefixed)
+        )
+    return np.sort(positions)
+
+
+def _mask(series: pd.Series, operator: str, value) -> np.ndarray:
+    if operator == "eq":
+        matches = series == value
+    elif operator == "in":
+        matches = series.isin(value)
+    elif operator == "gt":
+        matches = series > value
+    elif operator == "lt":
+        matches = series < value
+    else:
+        matches = series.astype(str).str.startswith(value)
+    return matches.to_numpy(dtype=bool)
@@ -2,127 +2,165 @@
 Module for managing the 'item' table.
 """
 
+from collections.abc import Iterator
+
 from flask import abort
+import flask_smorest
 import pandas as pd
 
+from .base import batch_conflicts
+from .storage import TableStorage, records
+from .transaction import transactional
+
+
+SCHEMA: dict[str, str] = {
+    "RECIPE_ID": "int64",
+    "NAME": "object",
+    "DESCRIPTION": "category",
+}
+
 
 class RecipeTable:
     """
     Singleton class for managing the 'recipe' table.
     """
 
-    _recipes: pd.DataFrame = pd.DataFrame(columns=["RECIPE_ID", "NAME", "DESCRIPTION"])
+    _recipes: TableStorage = TableStorage(
+        "RECIPE_ID",
+        SCHEMA,
+        defaults={"NAME": "", "DESCRIPTION": ""},
+    )
 
     def __init__(self):
         """
         Initializes the singleton instance if it doesn't already exist.
         """
         if RecipeTable._recipes is None:
-            RecipeTable._recipes = pd.DataFrame(
-                columns=["RECIPE_ID", "NAME", "DESCRIPTION"]
+            RecipeTable._recipes = TableStorage(
+                "RECIPE_ID",
+                SCHEMA,
+                defaults={"NAME": "", "DESCRIPTION": ""},
             )
 
-    def get_many(self) -> dict:
+    def storage(self) -> TableStorage:
+        """
+        Returns the storage backing the recipe table.
+        """
+        return RecipeTable._recipes
+
+    def get_many(self, columns: list[str] | None = None) -> dict:
         """
         Returns the current recipes DataFrame.
         """
-        return RecipeTable._recipes.to_dict(orient="records")
+        return records(RecipeTable._recipes.frame, columns)
+
+    def iter_many(
+        self, batch_size: int, columns: list[str] | None = None
+    ) -> Iterator[list]:
+        """
+        Yields every recipe in batches of at most batch_size records.
+        """
+        for frame in RecipeTable._recipes.batches(batch_size):
+            yield records(frame, columns)
 
-    def get_one(self, entry_id: int) -> dict:
+    def get_page(
+        self, after: int | None, limit: int, columns: list[str] | None = None
+    ) -> tuple[list, int | None]:
+        """
+        Returns up to limit recipes with an ID greater than after, and the cursor
+        of the next page.
+        """
+        frame, cursor = RecipeTable._recipes.page(after, limit)
+        return records(frame, columns), cursor
+
+    def get_one(self, entry_id: int, columns: list[str] | None = None) -> dict:
         """
         Returns the recipe with the specified RECIPE_ID.
         """
-        recipe_row = RecipeTable._recipes[RecipeTable._recipes["RECIPE_ID"] == entry_id]
-        if recipe_row.empty:
+        snapshot = RecipeTable._recipes.snapshot()
+        position = snapshot.locate(entry_id)
+        if position is None:
             abort(404, description=f"Recipe with id  {entry_id}  not found")
-        return recipe_row.to_dict(orient="records")[0]
+        return snapshot.row(position, columns)
 
     def get_next_id(self) -> int:
         """
         Returns the next available RECIPE_ID for a new recipe.
         """
-        if RecipeTable._recipes.empty:
+        if not len(RecipeTable._recipes):
             return 0
-        return RecipeTable._recipes["RECIPE_ID"].max() + 1
+        return RecipeTable._recipes.frame["RECIPE_ID"].max() + 1
 
+    @transactional
     def add_one(self, content: dict) -> dict:
         """
         Adds a new recipe to the table.
         """
-        if content["RECIPE_ID"] in RecipeTable._recipes["RECIPE_ID"].values:
+        if content["RECIPE_ID"] in RecipeTable._recipes:
             abort(409, description=f"RECIPE_ID {content['RECIPE_ID']} already exists")
-        RecipeTable._recipes = pd.concat(
-            [
-                RecipeTable._recipes,
-                pd.DataFrame([content])
-                .reindex(columns=RecipeTable._recipes.columns)
-                .fillna(""),
-            ],
-            ignore_index=True,
-        )
+        RecipeTable._recipes.append(content)
         return {"message": "Recipe added successfully"}
 
+    @transactional
     def add_many(self, content: list) -> dict:
         """
         Adds multiple new recipes to the table.
-        """
-        for entry in content:
-            if entry["RECIPE_ID"] in RecipeTable._recipes["RECIPE_ID"].values:
-                abort(
-                    409,
-                    DESCRIPTION=f"RECIPE_ID {entry['RECIPE_ID']} already exists",
-                )
-        RecipeTable._recipes = pd.concat(
-            [
-                RecipeTable._recipes,
-                pd.DataFrame(content)
-                .reindex(columns=RecipeTable._recipes.columns)
-                .fillna(""),
-            ],
-            ignore_index=True,
-        )
+
+        Every RECIPE_ID repeated in the batch or already in the table is reported
+        in the error response.
+        """
+        rows = pd.DataFrame(content)
+        conflicts = batch_conflicts(rows, "RECIPE_ID", self, {})
+        if conflicts:
+            flask_smorest.abort(
+                409,
+                message=f"{len(conflicts)} recipes could not be added",
+                errors=conflicts,
+            )
+        RecipeTable._recipes.extend(rows)
         return {"message": "Recipes added successfully"}
 
+    @transactional
     def update_or_create(self, entry_id: int, content: dict) -> dict:
         """
         Updates or creates a recipe by its ID.
         """
         if entry_id != content["RECIPE_ID"]:
-            if entry_id not in RecipeTable._recipes["RECIPE_ID"].values:
+            if entry_id not in RecipeTable._recipes:
                 abort(404, description=f"RECIPE_ID  {entry_id}  not found")
-            if content["RECIPE_ID"] in RecipeTable._recipes["RECIPE_ID"].values:
+            if content["RECIPE_ID"] in RecipeTable._recipes:
                 abort(
                     409,
-                    DESCRIPTION=f"RECIPE_ID {content['RECIPE_ID']} already exists",
+                    description=f"RECIPE_ID {content['RECIPE_ID']} already exists",
                 )
             self.add_one(content)
             self.delete(entry_id)
             return {"message": "Recipe updated successfully"}
-        if entry_id in RecipeTable._recipes["RECIPE_ID"].values:
-            RecipeTable._recipes.loc[RecipeTable._recipes["RECIPE_ID"] == entry_id] = (
-                pd.DataFrame([content])
-                .reindex(columns=RecipeTable._recipes.columns)
-                .fillna("")
-                .values
-            )
+        if entry_id in RecipeTable._recipes:
+            RecipeTable._recipes.update(entry_id, content)
             return {"message": "Recipe updated successfully"}
         return self.add_one(content)
 
+    @transactional
     def delete(self, entry_id: int) -> dict:
         """
         Deletes a recipe by its ID.
         """
-        if entry_id not in RecipeTable._recipes["RECIPE_ID"].values:
+        if entry_id not in RecipeTable._recipes:
             abort(404, description=f"RECIPE_ID  {entry_id}  not found")
-        RecipeTable._recipes = RecipeTable._recipes[
-            RecipeTable._recipes["RECIPE_ID"] != entry_id
-        ]
+        if RecipeTable._recipes.referenced(entry_id):
+            abort(409, description=f"RECIPE_ID {entry_id} is still referenced")
+        RecipeTable._recipes.remove(entry_id)
         return {"message": "Recipe deleted successfully"}
 
-    def query(self, query: dict) -> dict:
+    def __contains__(self, entry_id: int) -> bool:
+        """
+        Returns whether a recipe with the specified RECIPE_ID exists.
+        """
+        return entry_id in RecipeTable._recipes
+
+    def query(self, query: dict, columns: list[str] | None = None) -> dict:
         """
         Queries the recipe table.
         """
-        return RecipeTable._recipes.query(
-            " and ".join([f"{key} == {value}" for key, value in query.items()])
-        ).to_dict(orient="records")
+        return records(RecipeTable._recipes.select(query), columns)
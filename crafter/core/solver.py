@@ -0,0 +1,121 @@
+"""
+Module for the linear programs solved to plan production.
+"""
+
+import numpy as np
+
+# Tolerance under which a value counts as zero.
+TOLERANCE = 1e-9
+
+# Smallest entry pivoted on, smaller ones are mostly rounding errors.
+PIVOT_TOLERANCE = 1e-7
+
+# Largest loosening of a constraint, relative to the right-hand side.
+PERTURBATION = 1e-7
+
+# Number of pivots after which the tableau is computed again from the basis.
+REFRESH = 100
+
+
+def simplex(c: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray | None:
+    """
+    Returns the x minimizing c·x subject to a·x >= b and x >= 0, where b >= 0 and
+    the objective is bounded below, or None when no x satisfies the constraints.
+
+    The dense two-phase simplex method first minimizes the sum of artificial
+    variables added to the constraints with a positive right-hand side to find a
+    feasible basis, then the objective from that basis. Pivots follow the most
+    negative reduced cost, and the tableau is computed again from the original
+    matrix every few pivots so rounding errors do not pile up.
+
+    Planning problems are highly degenerate, most constraints only ask for an item
+    not to run short. Every constraint is therefore loosened by a tiny random
+    amount so no pivot is degenerate, and the basic variables of the optimal basis
+    are solved again for the exact right-hand side.
+    """
+    m, n = a.shape
+    scale = max(1.0, float(b.max(initial=0)))
+    loosened = b - PERTURBATION * scale * (1 + np.random.default_rng(0).random(m))
+    # Rows with a negative right-hand side are negated so their surplus variable
+    # starts in the basis, the others start with an artificial one.
+    signs = np.where(loosened < 0, -1.0, 1.0)
+    artificial = np.flatnonzero(signs > 0)
+    matrix = np.zeros((m, n + m + len(artificial)))
+    matrix[:, :n] = a * signs[:, None]
+    matrix[:, n : n + m] = -np.diag(signs)
+    matrix[artificial, n + m + np.arange(len(artificial))] = 1
+    basis = np.arange(n, n + m)
+    basis[artificial] = n + m + np.arange(len(artificial))
+    cost = np.zeros(matrix.shape[1])
+    cost[n + m :] = 1
+    tableau = _optimize(matrix, loosened * signs, cost, basis, n + m)
+    if tableau[m, -1] < -TOLERANCE * scale * m:
+        return None
+    for row in np.flatnonzero(basis >= n + m):
+        columns = np.flatnonzero(np.abs(tableau[row, : n + m]) > PIVOT_TOLERANCE)
+        if len(columns):
+            column = columns[np.argmax(np.abs(tableau[row, columns]))]
+            _pivot(tableau, basis, row, column)
+    cost[:] = 0
+    cost[:n] = c
+    _optimize(matrix, loosened * signs, cost, basis, n + m)
+    solution = np.zeros(matrix.shape[1])
+    try:
+        solution[basis] = np.linalg.solve(matrix[:, basis], b * signs)
+    except np.linalg.LinAlgError:
+        return None
+    x = np.maximum(solution[:n], 0)
+    if np.any(a @ x < b - 1e-6 * scale):
+        return None
+    return x
+
+
+def _optimize(
+    matrix: np.ndarray,
+    rhs: np.ndarray,
+    cost: np.ndarray,
+    basis: np.ndarray,
+    columns: int,
+) -> np.ndarray:
+    # Pivots until no column before columns has a negative reduced cost, and
+    # returns the final tableau.
+    pivots = 0
+    while True:
+        if pivots % REFRESH == 0:
+            tableau = _tableau(matrix, rhs, cost, basis)
+        costs = tableau[-1, :columns]
+        candidates = np.flatnonzero(costs < -TOLERANCE)
+        if not len(candidates):
+            return tableau
+        column = candidates[np.argmin(costs[candidates])]
+        entries = tableau[:-1, column]
+        rows = np.flatnonzero(entries > PIVOT_TOLERANCE)
+        if not len(rows):
+            raise ValueError("The linear program is unbounded")
+        ratios = np.maximum(tableau[rows, -1], 0) / entries[rows]
+        best = rows[ratios <= ratios.min() + TOLERANCE]
+        _pivot(tableau, basis, best[np.argmax(entries[best])], column)
+        pivots += 1
+
+
+def _tableau(
+    matrix: np.ndarray, rhs: np.ndarray, cost: np.ndarray, basis: np.ndarray
+) -> np.ndarray:
+    # The tableau of the basis: the constraints solved for the basic variables,
+    # with the reduced costs and the opposite of the objective as the last row.
+    m = len(rhs)
+    tableau = np.empty((m + 1, matrix.shape[1] + 1))
+    tableau[:m] = np.linalg.solve(matrix[:, basis], np.column_stack([matrix, rhs]))
+    tableau[m, :-1] = cost - cost[basis] @ tableau[:m, :-1]
+    tableau[m, -1] = -cost[basis] @ tableau[:m, -1]
+    return tableau
+
+
+def _pivot(tableau: np.ndarray, basis: np.ndarray, row: int, column: int) -> None:
+    tableau[row] /= tableau[row, column]
+    # Only the rows with an entry in the pivot column change, few of them do in
+    # the sparse planning problems.
+    rows = np.flatnonzero(tableau[:, column])
+    rows = rows[rows != row]
+    tableau[rows] -= np.outer(tableau[rows, column], tableau[row])
+    basis[row] = column
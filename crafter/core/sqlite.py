@@ -0,0 +1,548 @@
+"""
+Module for the SQLite backend of the core tables.
+
+The same four tables are stored in a single database file with their foreign keys
+enforced and indexed, so the data does not have to fit in memory, readers in other
+threads and processes work alongside a writer, and a restart only opens the file.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+import functools
+import json
+import sqlite3
+import threading
+
+from flask import abort
+import flask_smorest
+import numpy as np
+import pandas as pd
+
+from .base import batch_conflicts
+from .graph import INGREDIENTS, PRODUCTS, RecipeGraph
+from .query import parse
+from .transaction import transaction
+
+# Batches arrive as frames, so their values can be numpy scalars.
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    ITEM_ID INTEGER PRIMARY KEY,
+    NAME TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recipes (
+    RECIPE_ID INTEGER PRIMARY KEY,
+    NAME TEXT NOT NULL,
+    DESCRIPTION TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingredients (
+    INGREDIENT_ID INTEGER PRIMARY KEY,
+    ITEM_ID INTEGER NOT NULL REFERENCES items (ITEM_ID),
+    RECIPE_ID INTEGER NOT NULL REFERENCES recipes (RECIPE_ID),
+    RATE INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ingredients_item ON ingredients (ITEM_ID);
+CREATE INDEX IF NOT EXISTS ingredients_recipe ON ingredients (RECIPE_ID);
+CREATE TABLE IF NOT EXISTS products (
+    PRODUCT_ID INTEGER PRIMARY KEY,
+    ITEM_ID INTEGER NOT NULL REFERENCES items (ITEM_ID),
+    RECIPE_ID INTEGER NOT NULL REFERENCES recipes (RECIPE_ID),
+    RATE INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_item ON products (ITEM_ID);
+CREATE INDEX IF NOT EXISTS products_recipe ON products (RECIPE_ID);
+"""
+
+
+class Database:
+    """
+    Connections to the database file, one per thread.
+
+    The database runs in WAL mode so readers are never blocked by a writer, and
+    every connection enforces the foreign keys.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the database at the given path, creating the tables if needed.
+        """
+        self.path = path
+        self.writes = 0
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._graph = RecipeGraph()
+        self._graph_writes: int | None = None
+        self._graph_lock = threading.Lock()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def release(self) -> None:
+        """
+        Closes the connection of the current thread, the next call to connection()
+        in the thread opens a new one.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        del self._local.connection
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        connection.close()
+
+    @contextmanager
+    def writing(self) -> Iterator[sqlite3.Connection]:
+        """
+        Runs the block in a single write transaction, nested blocks join the
+        outermost one.
+        """
+        connection = self.connection()
+        if connection.in_transaction:
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+        self.writes += 1
+
+    def graph(self) -> RecipeGraph:
+        """
+        Returns the recipe graph of the ingredients and products, reloaded from the
+        tables by the first call after a write made through this database.
+        """
+        with self._graph_lock:
+            if self._graph_writes != self.writes:
+                for kind, table in (
+                    (INGREDIENTS, SqliteIngredientTable),
+                    (PRODUCTS, SqliteProductTable),
+                ):
+                    self._graph.reload(
+                        kind,
+                        pd.read_sql_query(
+                            f"SELECT {table.KEY}, RECIPE_ID, ITEM_ID, RATE "
+                            f"FROM {table.TABLE}",
+                            self.connection(),
+                        ),
+                    )
+                self._graph_writes = self.writes
+            return self._graph
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether none of the tables hold a row yet.
+        """
+        return not any(
+            self.connection().execute(f"SELECT 1 FROM {table.TABLE} LIMIT 1").fetchone()
+            for _, table in tables
+        )
+
+    def close(self) -> None:
+        """
+        Closes the connections of every thread.
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+_database: Database | None = None
+
+
+def open_database(path: str) -> Database:
+    """
+    Opens the database backing the SQLite tables.
+    """
+    global _database
+    _database = Database(path)
+    return _database
+
+
+def database() -> Database:
+    """
+    Returns the database opened by open_database.
+    """
+    if _database is None:
+        raise RuntimeError("The SQLite database has not been opened")
+    return _database
+
+
+def writes(method):
+    """
+    Decorates a table method to run in a core transaction and a single database
+    transaction, which is rolled back if the method raises.
+    """
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with transaction(), database().writing():
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+@lru_cache(maxsize=256)
+def compile_where(keys: frozenset, columns: tuple) -> tuple[str, tuple]:
+    """
+    Returns the WHERE clause for a query over the given keys with a placeholder for
+    each parameter, and the (key, operator) each parameter is taken from.
+    """
+    clauses = []
+    parameters = []
+    for key in sorted(keys):
+        column, operator = parse(key, columns)
+        if operator == "eq":
+            clauses.append(f"{column} = ?")
+        elif operator == "in":
+            clauses.append(f"{column} IN (SELECT value FROM json_each(?))")
+        elif operator == "gt":
+            clauses.append(f"{column} > ?")
+        elif operator == "lt":
+            clauses.append(f"{column} < ?")
+        else:
+            clauses.append(f"{column} >= ? AND {column} < ?")
+            parameters.append((key, "prefix"))
+            operator = "prefix_end"
+        parameters.append((key, operator))
+    if not clauses:
+        return "", ()
+    return "WHERE " + " AND ".join(clauses), tuple(parameters)
+
+
+def _parameter(value, operator: str):
+    if operator == "in":
+        return json.dumps(list(value))
+    if operator == "prefix_end":
+        return value + chr(0x10FFFF)
+    return value
+
+
+class SqliteTable:
+    """
+    Implementation of the TableProtocol over one table of the database.
+
+    Subclasses name the table, its columns and the tables its foreign keys
+    reference, the behaviour matches the in-memory tables.
+    """
+
+    TABLE: str
+    KEY: str
+    COLUMNS: tuple[str, ...]
+    DEFAULTS: dict = {}
+    REFERENCES: dict[str, tuple[type, str]] = {}
+    LABEL: str
+    PLURAL: str
+
+    def get_many(self, columns: list[str] | None = None) -> list:
+        """
+        Returns every row of the table.
+        """
+        return self._select("", (), columns)
+
+    def iter_many(
+        self, batch_size: int, columns: list[str] | None = None
+    ) -> Iterator[list]:
+        """
+        Yields every row of the table in batches of at most batch_size records.
+        """
+        cursor = (
+            database()
+            .connection()
+            .execute(f"SELECT {self._columns(columns)} FROM {self.TABLE}")
+        )
+        while rows := cursor.fetchmany(batch_size):
+            yield [dict(row) for row in rows]
+
+    def get_page(
+        self, after: int | None, limit: int, columns: list[str] | None = None
+    ) -> tuple[list, int | None]:
+        """
+        Returns up to limit rows with an ID greater than after, and the cursor of
+        the next page.
+        """
+        where, parameters = (
+            ("", ()) if after is None else (f"WHERE {self.KEY} > ?", (after,))
+        )
+        keys = [self.KEY, *(column for column in columns or () if column != self.KEY)]
+        rows = self._select(
+            f"{where} ORDER BY {self.KEY} LIMIT ?",
+            (*parameters, limit + 1),
+            keys if columns else None,
+        )
+        cursor = rows[limit - 1][self.KEY] if len(rows) > limit else None
+        rows = rows[:limit]
+        if columns and self.KEY not in columns:
+            for row in rows:
+                del row[self.KEY]
+        return rows, cursor
+
+    def get_one(self, entry_id: int, columns: list[str] | None = None) -> dict:
+        """
+        Returns the row with the specified ID.
+        """
+        rows = self._select(f"WHERE {self.KEY} = ?", (entry_id,), columns)
+        if not rows:
+            abort(404, description=f"{self.LABEL} with id {entry_id} not found")
+        return rows[0]
+
+    def get_next_id(self) -> int:
+        """
+        Returns the next available ID for a new row.
+        """
+        return (
+            database()
+            .connection()
+            .execute(f"SELECT COALESCE(MAX({self.KEY}) + 1, 0) FROM {self.TABLE}")
+            .fetchone()[0]
+        )
+
+    @writes
+    def add_one(self, content: dict) -> dict:
+        """
+        Adds a new row to the table.
+        """
+        if content[self.KEY] in self:
+            abort(409, description=f"{self.KEY} {content[self.KEY]} already exists")
+        self._validate(content)
+        self._check_references(content)
+        self._insert([content])
+        return {"message": f"{self.LABEL} added successfully"}
+
+    @writes
+    def add_many(self, content: list) -> dict:
+        """
+        Adds multiple new rows to the table.
+        """
+        conflicts = batch_conflicts(
+            pd.DataFrame(content),
+            self.KEY,
+            self,
+            {
+                column: (table(), name)
+                for column, (table, name) in self.REFERENCES.items()
+            },
+        )
+        if conflicts:
+            flask_smorest.abort(
+                409,
+                message=f"{len(conflicts)} {self.PLURAL.lower()} could not be added",
+                errors=conflicts,
+            )
+        for entry in content:
+            self._validate(entry)
+        self._insert(content)
+        return {"message": f"{self.PLURAL} added successfully"}
+
+    @writes
+    def update_or_create(self, entry_id: int, content: dict) -> dict:
+        """
+        Updates or creates the row with the specified ID.
+        """
+        if entry_id != content[self.KEY]:
+            if entry_id not in self:
+                abort(404, description=f"{self.LABEL} with id {entry_id} not found")
+            if content[self.KEY] in self:
+                abort(409, description=f"{self.KEY} {content[self.KEY]} already exists")
+            self.add_one(content)
+            self.delete(entry_id)
+            return {"message": f"{self.LABEL} updated successfully"}
+        if entry_id in self:
+            self._validate(content)
+            self._check_references(content)
+            row = self._normalize(content)
+            assignments = ", ".join(f"{column} = ?" for column in self.COLUMNS)
+            database().connection().execute(
+                f"UPDATE {self.TABLE} SET {assignments} WHERE {self.KEY} = ?",
+                (*row, entry_id),
+            )
+            return {"message": f"{self.LABEL} updated successfully"}
+        return self.add_one(content)
+
+    @writes
+    def delete(self, entry_id: int) -> dict:
+        """
+        Deletes the row with the specified ID.
+        """
+        if entry_id not in self:
+            abort(404, description=f"{self.LABEL} with id {entry_id} not found")
+        try:
+            database().connection().execute(
+                f"DELETE FROM {self.TABLE} WHERE {self.KEY} = ?", (entry_id,)
+            )
+        except sqlite3.IntegrityError:
+            abort(409, description=f"{self.KEY} {entry_id} is still referenced")
+        return {"message": f"{self.LABEL} deleted successfully"}
+
+    def __contains__(self, entry_id: int) -> bool:
+        """
+        Returns whether a row with the specified ID exists.
+        """
+        return (
+            database()
+            .connection()
+            .execute(f"SELECT 1 FROM {self.TABLE} WHERE {self.KEY} = ?", (entry_id,))
+            .fetchone()
+            is not None
+        )
+
+    def referencing(
+        self, column: str, key: int, columns: list[str] | None = None
+    ) -> list:
+        """
+        Returns the rows whose foreign key column holds key, found through the index
+        on that column.
+        """
+        if column not in self.REFERENCES:
+            raise KeyError(column)
+        return self._select(f"WHERE {column} = ?", (key,), columns)
+
+    def query(self, query: dict, columns: list[str] | None = None) -> list:
+        """
+        Queries the table, supporting the same predicates as the in-memory tables.
+        """
+        where, parameters = compile_where(frozenset(query), self.COLUMNS)
+        values = tuple(_parameter(query[key], operator) for key, operator in parameters)
+        return self._select(where, values, columns)
+
+    def _select(self, clause: str, parameters: tuple, columns: list | None) -> list:
+        rows = (
+            database()
+            .connection()
+            .execute(
+                f"SELECT {self._columns(columns)} FROM {self.TABLE} {clause}",
+                parameters,
+            )
+        )
+        return [dict(row) for row in rows]
+
+    def _columns(self, columns: list[str] | None) -> str:
+        if not columns:
+            return ", ".join(self.COLUMNS)
+        return ", ".join(
+            column for column in dict.fromkeys(columns) if column in self.COLUMNS
+        )
+
+    def _normalize(self, content: dict) -> tuple:
+        return tuple(
+            content.get(column)
+            if content.get(column) is not None
+            else self.DEFAULTS.get(column)
+            for column in self.COLUMNS
+        )
+
+    def _insert(self, content: list) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        try:
+            database().connection().executemany(
+                f"INSERT INTO {self.TABLE} ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                (self._normalize(entry) for entry in content),
+            )
+        except sqlite3.IntegrityError as error:
+            # The database has the last word on the constraints checked above.
+            abort(409, description=f"{self.PLURAL} could not be added: {error}")
+
+    def _validate(self, content: dict) -> None:
+        pass
+
+    def _check_references(self, content: dict) -> None:
+        for column, (table, name) in self.REFERENCES.items():
+            if content[column] not in table():
+                abort(
+                    409,
+                    description=f"{column} {content[column]} does not exist in the {name} table",
+                )
+
+
+class SqliteItemTable(SqliteTable):
+    """
+    The 'item' table of the SQLite backend.
+    """
+
+    TABLE = "items"
+    KEY = "ITEM_ID"
+    COLUMNS = ("ITEM_ID", "NAME")
+    LABEL = "Item"
+    PLURAL = "Items"
+
+    def _validate(self, content: dict) -> None:
+        if not content["NAME"]:
+            abort(400, description="NAME cannot be empty")
+
+
+class SqliteRecipeTable(SqliteTable):
+    """
+    The 'recipe' table of the SQLite backend.
+    """
+
+    TABLE = "recipes"
+    KEY = "RECIPE_ID"
+    COLUMNS = ("RECIPE_ID", "NAME", "DESCRIPTION")
+    DEFAULTS = {"NAME": "", "DESCRIPTION": ""}
+    LABEL = "Recipe"
+    PLURAL = "Recipes"
+
+
+class SqliteIngredientTable(SqliteTable):
+    """
+    The 'ingredient' table of the SQLite backend.
+    """
+
+    TABLE = "ingredients"
+    KEY = "INGREDIENT_ID"
+    COLUMNS = ("INGREDIENT_ID", "ITEM_ID", "RECIPE_ID", "RATE")
+    REFERENCES = {
+        "ITEM_ID": (SqliteItemTable, "item"),
+        "RECIPE_ID": (SqliteRecipeTable, "recipe"),
+    }
+    LABEL = "Ingredient"
+    PLURAL = "Ingredients"
+
+
+class SqliteProductTable(SqliteTable):
+    """
+    The 'product' table of the SQLite backend.
+    """
+
+    TABLE = "products"
+    KEY = "PRODUCT_ID"
+    COLUMNS = ("PRODUCT_ID", "ITEM_ID", "RECIPE_ID", "RATE")
+    REFERENCES = {
+        "ITEM_ID": (SqliteItemTable, "item"),
+        "RECIPE_ID": (SqliteRecipeTable, "recipe"),
+    }
+    LABEL = "Product"
+    PLURAL = "Products"
+
+
+tables: list[tuple[str, type[SqliteTable]]] = [
+    ("items", SqliteItemTable),
+    ("recipes", SqliteRecipeTable),
+    ("ingredients", SqliteIngredientTable),
+    ("products", SqliteProductTable),
+]
@@ -0,0 +1,658 @@
+"""
+Module for the chunked storage underneath the core tables.
+"""
+
+from bisect import bisect_right
+from collections.abc import Callable, Iterator
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .index import ForeignKeyIndex, SortedIndex, UniqueIndex
+from .query import compile_query
+from .transaction import log, record
+
+
+class Snapshot:
+    """
+    Immutable view of the rows of a table storage at one version.
+
+    Readers take the current snapshot and read from it without locking. Writers
+    never modify the chunks or pending rows of a published snapshot, they publish a
+    new one instead. The hash indexes are shared between snapshots until a row is
+    removed and only grow in the meantime, so lookups ignore positions past the end
+    of the snapshot. Likewise the sorted indexes are handed down until a row is
+    removed or, for the index over a column, until an update changes a value in it,
+    and each snapshot only merges in the rows appended since.
+    """
+
+    def __init__(
+        self,
+        storage: "TableStorage",
+        version: int,
+        chunks: tuple[pd.DataFrame, ...],
+        offsets: tuple[int, ...],
+        pending: tuple[dict, ...],
+        primary: UniqueIndex,
+        foreign: dict[str, ForeignKeyIndex],
+        ordered: dict[str, SortedIndex] | None = None,
+    ):
+        """
+        Creates the snapshot of the given chunks and pending rows. The sorted
+        indexes of an earlier snapshot may be given as ordered, keyed by column, if
+        the rows they cover are still at the same positions with the same values.
+        """
+        self.storage = storage
+        self.version = version
+        self.chunks = chunks
+        self.offsets = offsets
+        self.pending = pending
+        self.primary = primary
+        self.foreign = foreign
+        self.ordered = ordered or {}
+        self.sealed = offsets[-1] + len(chunks[-1])
+        self._frame: pd.DataFrame | None = None
+        self._sorted: dict[str, SortedIndex] = {}
+        self._columns: dict[int, dict[str, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.sealed + len(self.pending)
+
+    def __contains__(self, key: int) -> bool:
+        return self.locate(key) is not None
+
+    def locate(self, key: int) -> int | None:
+        """
+        Returns the position of the row with the given primary key, or None.
+        """
+        position = self.primary.get(key)
+        if position is None or position >= len(self):
+            return None
+        return position
+
+    def positions(self, column: str, key: int) -> set[int]:
+        """
+        Returns the positions of the rows referencing key in the given foreign column.
+        """
+        positions = set(self.foreign[column].get(key))
+        if positions and max(positions) >= len(self):
+            positions = {position for position in positions if position < len(self)}
+        return positions
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        Returns every row as a single frame, concatenating the chunks on first use.
+        """
+        if self._frame is None:
+            if len(self.chunks) == 1 and not self.pending:
+                self._frame = self.chunks[0]
+            else:
+                chunks = [chunk for chunk in self.chunks if not chunk.empty]
+                if self.pending:
+                    chunks.append(self.storage.frame_of(self.pending))
+                if not chunks:
+                    self._frame = self.chunks[0]
+                elif len(chunks) == 1:
+                    self._frame = chunks[0]
+                else:
+                    self._frame = self.storage._typed(
+                        pd.concat(chunks, ignore_index=True)
+                    )
+                self.storage._compact(self, self._frame)
+        return self._frame
+
+    def batches(self, size: int) -> Iterator[pd.DataFrame]:
+        """
+        Yields every row in slices of at most size rows, without copying the columns.
+        """
+        frame = self.frame
+        for start in range(0, len(frame), size):
+            yield frame.iloc[start : start + size]
+
+    def row(self, position: int, columns: list[str] | None = None) -> dict:
+        """
+        Returns the row at the given position as a dict, limited to the given
+        columns if any.
+        """
+        return self.rows([position], columns)[0]
+
+    def rows(
+        self, positions: list[int], columns: list[str] | None = None
+    ) -> list[dict]:
+        """
+        Returns the rows at the given positions as dicts, reading single values out
+        of the column arrays so a handful of rows costs no frame operations.
+        """
+        columns = columns or self.storage.columns
+        rows = []
+        for position in positions:
+            if position >= self.sealed:
+                row = self.pending[position - self.sealed]
+                rows.append({column: row[column] for column in columns})
+                continue
+            owner = bisect_right(self.offsets, position) - 1
+            arrays = self._arrays(owner)
+            local = position - self.offsets[owner]
+            rows.append({column: _plain(arrays[column][local]) for column in columns})
+        return rows
+
+    def take(self, positions: list[int]) -> pd.DataFrame:
+        """
+        Returns the rows at the given positions, in order, without merging chunks.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        sealed = positions[positions < self.sealed]
+        owners = np.searchsorted(self.offsets, sealed, side="right") - 1
+        parts = [
+            self.chunks[owner].iloc[sealed[owners == owner] - self.offsets[owner]]
+            for owner in np.unique(owners)
+        ]
+        pending = positions[positions >= self.sealed] - self.sealed
+        if len(pending):
+            parts.append(
+                pd.DataFrame(
+                    [self.pending[local] for local in pending],
+                    columns=self.storage.columns,
+                )
+            )
+        if not parts:
+            return self.chunks[0].iloc[0:0]
+        if len(parts) == 1:
+            return parts[0]
+        return pd.concat(parts, ignore_index=True)
+
+    def select(self, query: dict) -> pd.DataFrame:
+        """
+        Returns the rows matching every clause of the query, an empty query selects
+        every row. The plan for each set of query keys is compiled only once.
+        """
+        predicate = compile_query(
+            frozenset(query),
+            tuple(self.storage.columns),
+            self.storage.key,
+            self.storage.foreign_columns,
+        )
+        return predicate(self, query)
+
+    def page(self, after: int | None, limit: int) -> tuple[pd.DataFrame, int | None]:
+        """
+        Returns up to limit rows with a primary key greater than after, ordered by
+        primary key, and the cursor of the next page or None if this is the last.
+        """
+        key = self.storage.key
+        positions = self.sorted_index(key).following(after, limit + 1)
+        frame = self.take(np.sort(positions)).sort_values(key, kind="stable")
+        if len(frame) <= limit:
+            return frame, None
+        frame = frame.iloc[:limit]
+        return frame, frame[key].iloc[-1].item()
+
+    def sorted_index(self, column: str) -> SortedIndex:
+        """
+        Returns the sorted index over the given column, extended from the one handed
+        down by an earlier snapshot if any, or else built on first use.
+        """
+        if column not in self._sorted:
+            if column in self.ordered:
+                index = self.ordered[column]
+                added = np.arange(len(index), len(self), dtype=np.int64)
+                if len(added):
+                    values = self.take(added)[column].to_numpy()
+                    index = index.extended(values, added)
+            else:
+                index = SortedIndex(self.frame, column)
+            self._sorted[column] = index
+        return self._sorted[column]
+
+    def range_index(self, column: str) -> SortedIndex | None:
+        """
+        Returns the sorted index over the given column to answer a range query if
+        the snapshot holds or was handed one, or if the column was already scanned
+        since its index was last dropped. Otherwise returns None, a single query is
+        cheaper to answer with a scan than by sorting the column.
+        """
+        if column in self._sorted or column in self.ordered:
+            return self.sorted_index(column)
+        scans = self.storage.scans
+        scans[column] = scans.get(column, 0) + 1
+        if scans[column] > 1:
+            return self.sorted_index(column)
+        return None
+
+    def handed_down(self, changed: tuple[str, ...] = ()) -> dict[str, SortedIndex]:
+        """
+        Returns the most recent sorted indexes this snapshot holds or was given,
+        except the ones over the changed columns.
+        """
+        indexes = {**self.ordered, **self._sorted}
+        for column in changed:
+            indexes.pop(column, None)
+        return indexes
+
+    def memory_usage(self) -> int:
+        """
+        Returns the number of bytes held by the stored columns.
+        """
+        return int(self.frame.memory_usage(deep=True, index=False).sum())
+
+    def _arrays(self, owner: int) -> dict[str, np.ndarray]:
+        arrays = self._columns.get(owner)
+        if arrays is None:
+            chunk = self.chunks[owner]
+            arrays = {column: chunk[column].to_numpy() for column in chunk.columns}
+            self._columns[owner] = arrays
+        return arrays
+
+
+class TableStorage:
+    """
+    Append-friendly storage for the rows of a single table.
+
+    Single rows are written to a pending buffer which is sealed into a chunk once it
+    fills up, and batches are added as chunks of their own. The chunks are only
+    concatenated into one frame when a full read needs it or when too many of them
+    pile up, so inserts never copy the whole table. Batches and merged frames are
+    sliced into chunks of at most chunk_size rows, views of the same columns, so an
+    update copies one slice instead of the whole table.
+
+    Row positions are stable across appends and merges and are what the indexes
+    point to, only removing a row shifts the positions behind it.
+
+    Every chunk is stored with the dtypes of the table schema, so ids and rates are
+    packed integer arrays instead of boxed ints. Repetitive text is stored as a
+    categorical, other text columns keep object dtype with their strings interned.
+
+    Reads go through an immutable Snapshot of the rows. Writers are serialized by a
+    lock and publish each change as a new snapshot with a single assignment, copying
+    only the chunk they modify, so readers in other threads never see a partial
+    write. Listeners are then called with the change, still under the lock, to keep
+    structures derived from the rows up to date.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        schema: dict[str, str],
+        foreign: tuple[str, ...] = (),
+        defaults: dict | None = None,
+        buffer_size: int = 1024,
+        max_chunks: int = 16,
+        chunk_size: int = 65536,
+    ):
+        """
+        Creates empty storage for a table with the given primary key and schema.
+        """
+        self.key = key
+        self.schema = schema
+        self.columns = list(schema)
+        self.foreign_columns = tuple(foreign)
+        self.defaults = defaults or {}
+        self.buffer_size = buffer_size
+        self.max_chunks = max_chunks
+        self.chunk_size = chunk_size
+        self.scans: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._listeners: list[Callable[[str, object], None]] = []
+        self._referrers: list[tuple[TableStorage, str]] = []
+        self._snapshot = Snapshot(
+            self,
+            0,
+            (self._typed(pd.DataFrame(columns=self.columns)),),
+            (0,),
+            (),
+            UniqueIndex(key),
+            {column: ForeignKeyIndex(column) for column in foreign},
+        )
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._snapshot
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns the current snapshot, which later writes leave untouched.
+        """
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """
+        Returns the version of the current snapshot, incremented by every write.
+        """
+        return self._snapshot.version
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        Returns every row of the current snapshot as a single frame.
+        """
+        return self._snapshot.frame
+
+    def batches(self, size: int) -> Iterator[pd.DataFrame]:
+        """
+        Yields the rows of the current snapshot in slices of at most size rows.
+        """
+        return self._snapshot.batches(size)
+
+    def select(self, query: dict) -> pd.DataFrame:
+        """
+        Returns the rows of the current snapshot matching the query.
+        """
+        return self._snapshot.select(query)
+
+    def page(self, after: int | None, limit: int) -> tuple[pd.DataFrame, int | None]:
+        """
+        Returns a page of the current snapshot ordered by primary key.
+        """
+        return self._snapshot.page(after, limit)
+
+    def memory_usage(self) -> int:
+        """
+        Returns the number of bytes held by the stored columns.
+        """
+        return self._snapshot.memory_usage()
+
+    def listen(self, listener: Callable[[str, object], None]) -> None:
+        """
+        Calls listener after every write with the operation and its payload: the row
+        for append and update, the frame for extend, the key for remove, and for
+        restore the snapshot rolled back to.
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def refer(self, column: str, target: "TableStorage") -> None:
+        """
+        Declares that the foreign key column references the primary key of target,
+        whose referenced() then looks the key up in this storage.
+        """
+        with target._lock:
+            target._referrers.append((self, column))
+
+    def referenced(self, key: int) -> bool:
+        """
+        Returns whether a row of a storage declared with refer() references the
+        given primary key.
+        """
+        return any(
+            storage.snapshot().positions(column, key)
+            for storage, column in self._referrers
+        )
+
+    def merge(self) -> None:
+        """
+        Compacts the pending buffer and all chunks into a single frame.
+        """
+        snapshot = self._snapshot
+        self._compact(snapshot, snapshot.frame)
+
+    def append(self, content: dict) -> None:
+        """
+        Appends a single row to the pending buffer and indexes it.
+        """
+        row = self._normalize(content)
+        with self._lock:
+            current = self._snapshot
+            record(self, current)
+            log(self, "append", row)
+            position = len(current)
+            current.primary.add(row[self.key], position)
+            for column, index in current.foreign.items():
+                index.add(row[column], position)
+            self._publish(
+                current, current.chunks, current.offsets, current.pending + (row,)
+            )
+            self._notify("append", row)
+
+    def extend(self, rows: pd.DataFrame) -> None:
+        """
+        Appends a batch of rows as a new chunk and indexes it.
+        """
+        rows = rows.reindex(columns=self.columns)
+        if self.defaults:
+            rows = rows.fillna(self.defaults)
+        for column, dtype in self.schema.items():
+            if dtype == "object":
+                rows[column] = rows[column].map(_intern)
+        chunk = self._typed(rows.reset_index(drop=True))
+        with self._lock:
+            current = self._snapshot
+            record(self, current)
+            log(self, "extend", rows)
+            chunks, offsets = self._sealed(current)
+            start = len(current)
+            current.primary.extend(rows, start)
+            for index in current.foreign.values():
+                index.extend(rows, start)
+            if not chunk.empty:
+                sliced, starts = self._split(chunk, start)
+                chunks, offsets = chunks + sliced, offsets + starts
+            self._publish(current, chunks, offsets, ())
+            self._notify("extend", chunk)
+
+    def update(self, key: int, content: dict) -> None:
+        """
+        Overwrites the row with the given primary key, which the content keeps.
+        """
+        row = self._normalize(content)
+        with self._lock:
+            current = self._snapshot
+            record(self, current)
+            log(self, "update", row)
+            position = current.locate(key)
+            if position is None:
+                raise KeyError(key)
+            previous = current.row(position)
+            changed = tuple(
+                column for column in self.columns if previous[column] != row[column]
+            )
+            foreign = {
+                column: index.replaced(position, previous[column], row[column])
+                for column, index in current.foreign.items()
+            }
+            if position >= current.sealed:
+                pending = list(current.pending)
+                pending[position - current.sealed] = row
+                self._publish(
+                    current,
+                    current.chunks,
+                    current.offsets,
+                    tuple(pending),
+                    foreign=foreign,
+                    changed=changed,
+                )
+                self._notify("update", row)
+                return
+            owner = bisect_right(current.offsets, position) - 1
+            chunk = current.chunks[owner].copy()
+            for column, dtype in self.schema.items():
+                if (
+                    dtype == "category"
+                    and row[column] not in chunk[column].cat.categories
+                ):
+                    chunk[column] = chunk[column].cat.add_categories([row[column]])
+            chunk.iloc[position - current.offsets[owner]] = [
+                row[column] for column in self.columns
+            ]
+            chunks = current.chunks[:owner] + (chunk,) + current.chunks[owner + 1 :]
+            self._publish(
+                current,
+                chunks,
+                current.offsets,
+                current.pending,
+                foreign=foreign,
+                changed=changed,
+            )
+            self._notify("update", row)
+
+    def remove(self, key: int) -> None:
+        """
+        Removes the row with the given primary key and re-indexes the rows behind it.
+        """
+        with self._lock:
+            current = self._snapshot
+            record(self, current)
+            log(self, "remove", key)
+            position = current.locate(key)
+            if position is None:
+                raise KeyError(key)
+            frame = current.frame
+            frame = self._typed(
+                frame.drop(frame.index[position]).reset_index(drop=True)
+            )
+            self._publish(current, *self._split(frame), (), *self._indexes(frame))
+            self._notify("remove", key)
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Publishes the rows of an earlier snapshot again to roll back the writes made
+        since. The indexes are rebuilt, appends made since went into the shared ones.
+        """
+        with self._lock:
+            current = self._snapshot
+            if current is snapshot:
+                return
+            frame = snapshot.frame
+            self._publish(current, *self._split(frame), (), *self._indexes(frame))
+            self._notify("restore", snapshot)
+
+    def frame_of(self, rows: tuple[dict, ...]) -> pd.DataFrame:
+        """
+        Returns a typed frame holding the given normalized rows.
+        """
+        return self._typed(pd.DataFrame(list(rows), columns=self.columns))
+
+    def _notify(self, operation: str, payload) -> None:
+        for listener in self._listeners:
+            listener(operation, payload)
+
+    def _indexes(
+        self, frame: pd.DataFrame
+    ) -> tuple[UniqueIndex, dict[str, ForeignKeyIndex]]:
+        primary = UniqueIndex(self.key)
+        primary.rebuild(frame)
+        foreign = {}
+        for column in self.foreign_columns:
+            foreign[column] = ForeignKeyIndex(column)
+            foreign[column].rebuild(frame)
+        return primary, foreign
+
+    def _typed(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.astype(self.schema)
+        for column, dtype in self.schema.items():
+            if dtype == "category":
+                frame[column] = frame[column].cat.remove_unused_categories()
+        return frame
+
+    def _normalize(self, content: dict) -> dict:
+        row = {column: content.get(column) for column in self.columns}
+        for column, value in self.defaults.items():
+            if row[column] is None:
+                row[column] = value
+        for column, dtype in self.schema.items():
+            if dtype == "object":
+                row[column] = _intern(row[column])
+        return row
+
+    def _sealed(self, snapshot: Snapshot) -> tuple[tuple, tuple]:
+        if not snapshot.pending:
+            return snapshot.chunks, snapshot.offsets
+        return (
+            snapshot.chunks + (self.frame_of(snapshot.pending),),
+            snapshot.offsets + (snapshot.sealed,),
+        )
+
+    def _publish(
+        self,
+        current: Snapshot,
+        chunks: tuple,
+        offsets: tuple,
+        pending: tuple,
+        primary: UniqueIndex | None = None,
+        foreign: dict[str, ForeignKeyIndex] | None = None,
+        changed: tuple[str, ...] = (),
+    ) -> None:
+        snapshot = Snapshot(
+            self,
+            current.version + 1,
+            chunks,
+            offsets,
+            pending,
+            current.primary if primary is None else primary,
+            current.foreign if foreign is None else foreign,
+            current.handed_down(changed) if primary is None else None,
+        )
+        for column in self.columns if primary is not None else changed:
+            self.scans.pop(column, None)
+        if len(pending) >= self.buffer_size:
+            snapshot = Snapshot(
+                self,
+                snapshot.version,
+                *self._sealed(snapshot),
+                (),
+                snapshot.primary,
+                snapshot.foreign,
+                snapshot.ordered,
+            )
+        self._snapshot = snapshot
+        if len(snapshot.chunks) > self.max_chunks + len(snapshot) // self.chunk_size:
+            self._compact(snapshot, snapshot.frame)
+
+    def _compact(self, snapshot: Snapshot, frame: pd.DataFrame) -> None:
+        # Swaps in an equivalent snapshot holding the concatenated frame so later
+        # snapshots start from it. Readers call this too and never wait for the lock.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self._snapshot is snapshot and (
+                len(snapshot.chunks) > 1 or snapshot.pending
+            ):
+                compacted = Snapshot(
+                    self,
+                    snapshot.version,
+                    *self._split(frame),
+                    (),
+                    snapshot.primary,
+                    snapshot.foreign,
+                    snapshot.ordered,
+                )
+                compacted._frame = frame
+                compacted._sorted = snapshot._sorted
+                self._snapshot = compacted
+        finally:
+            self._lock.release()
+
+    def _split(self, frame: pd.DataFrame, start: int = 0) -> tuple[tuple, tuple]:
+        # Slices the frame into chunks of at most chunk_size rows starting at
+        # position start, the slices are views of its columns.
+        if len(frame) <= self.chunk_size:
+            return (frame,), (start,)
+        bounds = range(0, len(frame), self.chunk_size)
+        return (
+            tuple(frame.iloc[begin : begin + self.chunk_size] for begin in bounds),
+            tuple(start + begin for begin in bounds),
+        )
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def records(frame: pd.DataFrame, columns: list[str] | None = None) -> list[dict]:
+    """
+    Converts the rows of the frame to dicts, projecting the frame down to the given
+    columns first so the others are never converted.
+    """
+    if columns:
+        frame = frame[list(dict.fromkeys(columns))]
+    return frame.to_dict(orient="records")
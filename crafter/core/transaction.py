@@ -0,0 +1,178 @@
+"""
+Module for coordinating writes across the core tables.
+
+Every table write runs inside transaction(), which holds the write side of a single
+reader-writer lock shared by all tables. Checks against other tables and the write
+that depends on them therefore happen atomically, and a transaction that raises
+leaves every table it touched as it found it.
+
+Single reads do not need the lock since they go through immutable snapshots. Reads
+that have to see several tables at the same point, between two transactions, hold
+the read side with reading().
+
+When a journal is attached, the changes of each transaction are appended to it as it
+commits, and the transaction waits for them to be synced once it has released the
+lock, so concurrent transactions share the fsync.
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import functools
+import threading
+
+
+class ReadWriteLock:
+    """
+    Lock admitting any number of readers at once, or a single writer.
+
+    Waiting writers hold back new readers so a steady stream of reads cannot starve
+    them. The writer may re-enter the lock and read under it, readers may re-enter
+    the read side, but a reader cannot upgrade to a writer.
+    """
+
+    def __init__(self):
+        """
+        Creates an unlocked lock.
+        """
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer: int | None = None
+        self._writes = 0
+        self._waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """
+        Holds the read side of the lock for the duration of the block.
+        """
+        me = threading.get_ident()
+        depth = getattr(self._local, "reads", 0)
+        with self._condition:
+            if self._writer != me and not depth:
+                while self._writer is not None or self._waiting:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.reads = depth + 1
+        try:
+            yield
+        finally:
+            self._local.reads = depth
+            if self._writer != me and not depth:
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+        Holds the write side of the lock for the duration of the block.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                if getattr(self._local, "reads", 0):
+                    raise RuntimeError("Cannot write while holding the read lock")
+                self._waiting += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._waiting -= 1
+                self._writer = me
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writes -= 1
+                if not self._writes:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+LOCK = ReadWriteLock()
+
+_state = threading.local()
+
+_journal = None
+
+
+def attach(journal) -> None:
+    """
+    Sets the journal committed transactions are appended to, or None for no journal.
+    """
+    global _journal
+    _journal = journal
+
+
+@contextmanager
+def transaction() -> Iterator[None]:
+    """
+    Runs the block as a single write transaction over the core tables. Nested
+    transactions join the outermost one, which rolls back every table written to
+    if the block raises, or else commits its changes to the journal.
+    """
+    sequence = None
+    with LOCK.write():
+        if getattr(_state, "touched", None) is not None:
+            yield
+            return
+        _state.touched = {}
+        _state.changes = []
+        journal = _journal
+        try:
+            yield
+            if journal is not None and _state.changes:
+                sequence = journal.append(_state.changes)
+        except BaseException:
+            for storage, snapshot in _state.touched.items():
+                storage.restore(snapshot)
+            raise
+        finally:
+            _state.touched = None
+            _state.changes = None
+    if sequence is not None:
+        journal.sync(sequence)
+
+
+@contextmanager
+def reading() -> Iterator[None]:
+    """
+    Holds off writers for the duration of the block, so reads across several
+    tables see them at the same point.
+    """
+    with LOCK.read():
+        yield
+
+
+def transactional(method: Callable) -> Callable:
+    """
+    Decorates a table method to run inside a transaction.
+    """
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with transaction():
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def record(storage, snapshot) -> None:
+    """
+    Remembers the snapshot of a storage before the current transaction first writes
+    to it, so it can be restored on rollback.
+    """
+    touched = getattr(_state, "touched", None)
+    if touched is not None and storage not in touched:
+        touched[storage] = snapshot
+
+
+def log(storage, operation: str, payload) -> None:
+    """
+    Remembers a change made to a storage by the current transaction, to be
+    appended to the journal when it commits.
+    """
+    changes = getattr(_state, "changes", None)
+    if changes is not None and _journal is not None:
+        changes.append((storage, operation, payload))
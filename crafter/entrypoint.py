@@ -2,12 +2,14 @@ import argparse
 import atexit
 import signal
 import sys
-from flask import Flask
-from flask_smorest import Api
 
-from utils import ARCHIVE_PATH, HOST, PORT
+from utils import ARCHIVE_PATH, BACKEND, CHECKPOINT_INTERVAL, DATABASE_PATH, HOST, PORT
 
-from . import blueprints, core, __version__, MAJOR_VERSION
+from . import __version__, MAJOR_VERSION
+from .profiling import StartupProfiler
+
+# Kept in step with core.backends, which is not imported before it is needed.
+BACKENDS = ("memory", "sqlite")
 
 
 def parse_args():
@@ -22,6 +24,37 @@ def parse_args():
     parser.add_argument(
         "--archive", type=str, default=ARCHIVE_PATH, help="Path to archive on exit"
     )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=BACKEND,
+        help="Storage backend for the tables",
+    )
+    parser.add_argument(
+        "--database",
+        type=str,
+        default=DATABASE_PATH or None,
+        help="Path to the SQLite database, next to the archive by default",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=CHECKPOINT_INTERVAL,
+        help="Seconds between archive checkpoints of the memory backend, 0 disables",
+    )
+
+    parser.add_argument(
+        "--export",
+        type=str,
+        default=None,
+        help="Export the tables as YAML to this directory and exit",
+    )
+
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report the time spent importing each module and starting up, then exit",
+    )
 
     parser.add_argument(
         "--api-title", type=str, default="Crafter API", help="Title for the API"
@@ -38,7 +71,19 @@ def parse_args():
     return parser.parse_args()
 
 
-def run_flask(args):
+def create_app(args, profiler: StartupProfiler, read_only: bool = False):
+    """
+    Import the server modules, load the tables and register the blueprints, timing
+    each phase with the profiler. A read-only app leaves the archive untouched.
+    """
+    with profiler.phase("import flask"):
+        from flask import Flask
+        from flask_smorest import Api
+    with profiler.phase("import crafter.core"):
+        from . import core
+    with profiler.phase("import crafter.blueprints"):
+        from . import blueprints
+
     base_url = args.base_url.rstrip("/")
     app = Flask(f"{args.host} {args.api_title}")
     app.logger.setLevel("DEBUG")
@@ -51,17 +96,54 @@ def run_flask(args):
         OPENAPI_SWAGGER_UI_PATH="/docs",
         OPENAPI_SWAGGER_UI_URL="https://cdnjs.cloudflare.com/ajax/libs/swagger-ui/3.25.0/",
     )
-    atexit.register(core.init(args.archive))
+    with profiler.phase("core.init"):
+        atexit.register(
+            core.init(
+                args.archive,
+                args.backend,
+                args.database,
+                0 if read_only else args.checkpoint_interval,
+                read_only,
+            )
+        )
     signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
-    api = Api(app)
-    blueprints.init(api, app, base_url=base_url)
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    with profiler.phase("blueprints.init"):
+        api = Api(app)
+        blueprints.init(api, app, base_url=base_url)
+    return app
+
+
+def run_flask(args):
+    app = create_app(args, StartupProfiler())
+    app.run(host=args.host, port=args.port, debug=args.debug, threaded=True)
+
+
+def profile_startup(args):
+    """
+    Start the server without serving, then print how long each phase and each
+    module import took. The archive is only read.
+    """
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        create_app(args, profiler, read_only=True)
+    finally:
+        profiler.uninstall()
+    print(profiler.report())
 
 
 def main():
     args = parse_args()
 
-    if args.deploy:
+    if args.profile_startup:
+        profile_startup(args)
+    elif args.export:
+        from . import core
+
+        offload = core.init(args.archive, interval=0)
+        core.export(args.export)
+        offload()
+    elif args.deploy:
         print("Deployment mode not implemented yet.")
         sys.exit(0)
     else:
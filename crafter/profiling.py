@@ -0,0 +1,118 @@
+"""
+Module for profiling the startup of the server.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import sys
+import threading
+import time
+
+
+class StartupProfiler:
+    """
+    Times the phases of the startup and, once installed, the import of every module
+    imported after it.
+
+    The time of a module covers running its top-level code. Its self time leaves
+    out the modules it imports in turn, its cumulative time includes them.
+    """
+
+    def __init__(self):
+        """
+        Creates a profiler with nothing timed yet.
+        """
+        self.phases: dict[str, float] = {}
+        self.modules: dict[str, tuple[float, float]] = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times the block as the startup phase with the given name.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def install(self) -> None:
+        """
+        Starts timing the modules imported from now on.
+        """
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        """
+        Stops timing imports.
+        """
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name: str, path, target=None):
+        """
+        Finds the module with the finders behind this one and wraps its loader so
+        executing the module is timed.
+        """
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(self, spec.loader)
+        return spec
+
+    def report(self, limit: int = 40) -> str:
+        """
+        Returns the phase times and the modules slowest to import as a table.
+        """
+        lines = [f"{'phase':<50} {'ms':>10}"]
+        for name, elapsed in self.phases.items():
+            lines.append(f"{name:<50} {elapsed * 1000:>10.1f}")
+        lines.append(f"{'total':<50} {sum(self.phases.values()) * 1000:>10.1f}")
+        lines.append("")
+        lines.append(f"{'module':<50} {'self ms':>10} {'cumulative ms':>14}")
+        slowest = sorted(self.modules.items(), key=lambda item: -item[1][1])
+        for name, (own, cumulative) in slowest[:limit]:
+            lines.append(f"{name:<50} {own * 1000:>10.1f} {cumulative * 1000:>14.1f}")
+        lines.append(f"{len(self.modules)} modules imported")
+        return "\n".join(lines)
+
+    def _timed(self, name: str, execute) -> None:
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            execute()
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            self.modules[name] = (elapsed - children, elapsed)
+            if stack:
+                stack[-1] += elapsed
+
+
+class _TimedLoader:
+    # Stands in for the loader of a module until it is executed, then puts the
+    # original loader back so the module looks as if imported normally.
+
+    def __init__(self, profiler: StartupProfiler, loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._profiler._timed(module.__name__, lambda: self._loader.exec_module(module))
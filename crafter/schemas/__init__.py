@@ -1,15 +1,47 @@
 from .ingredient import IngredientSchema, IngredientQuery
-from .item import ItemSchema, ItemQuery
+from .item import ItemRecipeSchema, ItemSchema, ItemQuery
 from .recipe import RecipeSchema, RecipeQuery
 from .product import ProductSchema, ProductQuery
+from .page import PageQuery, ProjectionQuery
+from .craft import (
+    CraftBatchQuery,
+    CraftBatchSchema,
+    CraftCycleSchema,
+    CraftPathSchema,
+    CraftQuerySchema,
+    CraftRateSchema,
+    CraftSchema,
+    CraftSolveQuerySchema,
+    CraftTargetSchema,
+    CraftTotalsSchema,
+    CraftTreeNodeSchema,
+    CraftTreeQuerySchema,
+    CraftTreeSchema,
+)
 
 __all__ = [
     "IngredientSchema",
     "IngredientQuery",
     "ItemSchema",
     "ItemQuery",
+    "ItemRecipeSchema",
     "RecipeSchema",
     "RecipeQuery",
     "ProductSchema",
     "ProductQuery",
+    "PageQuery",
+    "ProjectionQuery",
+    "CraftBatchQuery",
+    "CraftBatchSchema",
+    "CraftCycleSchema",
+    "CraftPathSchema",
+    "CraftQuerySchema",
+    "CraftRateSchema",
+    "CraftSchema",
+    "CraftSolveQuerySchema",
+    "CraftTargetSchema",
+    "CraftTotalsSchema",
+    "CraftTreeNodeSchema",
+    "CraftTreeQuerySchema",
+    "CraftTreeSchema",
 ]
@@ -2,7 +2,10 @@
 Module for the Base schema, to provide additional functionality for all schemas.
 """
 
-from marshmallow import Schema
+from marshmallow import Schema, validate
+
+# Rates are stored as int32 columns by the core tables.
+INT32_RANGE = validate.Range(min=-(2**31), max=2**31 - 1)
 
 
 class Base(Schema):
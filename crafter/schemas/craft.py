@@ -0,0 +1,272 @@
+"""
+This module contains the schemas for crafting recipes.
+"""
+
+from marshmallow import fields, validate
+from .base import Base
+
+
+class CraftPathSchema(Base):
+    """
+    Schema for the recipe to craft and the scale it is crafted at.
+    """
+
+    recipe_id = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the recipe"}
+    )
+    scale = fields.Float(
+        required=True,
+        validate=validate.Range(min=0, min_inclusive=False),
+        metadata={"Description": "How many times the recipe is crafted"},
+    )
+
+
+class CraftRateSchema(Base):
+    """
+    Schema for the rate at which crafting consumes or produces an item.
+    """
+
+    ITEM_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the item"}
+    )
+    RATE = fields.Float(
+        required=True,
+        metadata={"Description": "The scaled rate of the item, summed over the rows"},
+    )
+
+
+class CraftSchema(Base):
+    """
+    Schema for the items consumed and produced by crafting a recipe.
+    """
+
+    RECIPE_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the crafted recipe"}
+    )
+    SCALE = fields.Float(
+        required=True, metadata={"Description": "How many times the recipe is crafted"}
+    )
+    INGREDIENTS = fields.List(
+        fields.Nested(CraftRateSchema),
+        required=True,
+        metadata={"Description": "The items consumed, per item"},
+    )
+    PRODUCTS = fields.List(
+        fields.Nested(CraftRateSchema),
+        required=True,
+        metadata={"Description": "The items produced, per item"},
+    )
+
+
+class CraftQuerySchema(Base):
+    """
+    Schema for a recipe to craft and the scale it is crafted at.
+    """
+
+    RECIPE_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the recipe"}
+    )
+    SCALE = fields.Float(
+        required=True,
+        validate=validate.Range(min=0, min_inclusive=False),
+        metadata={"Description": "How many times the recipe is crafted"},
+    )
+
+
+class CraftBatchQuery(Base):
+    """
+    Schema for the options of a batch of crafts.
+    """
+
+    balance = fields.Bool(
+        load_default=False,
+        metadata={"Description": "Whether to return the net rate of every item"},
+    )
+
+
+class CraftBatchSchema(Base):
+    """
+    Schema for the results of a batch of crafts.
+    """
+
+    RESULTS = fields.List(
+        fields.Nested(CraftSchema),
+        required=True,
+        metadata={"Description": "The result of every craft, in the order requested"},
+    )
+    BALANCE = fields.List(
+        fields.Nested(CraftRateSchema),
+        metadata={
+            "Description": "The products minus the ingredients of the whole batch, per item"
+        },
+    )
+
+
+class CraftTreeQuerySchema(CraftQuerySchema):
+    """
+    Schema for the recipe whose craft tree is resolved.
+    """
+
+    DEPTH = fields.Int(
+        load_default=None,
+        validate=validate.Range(min=0),
+        metadata={
+            "Description": "How many levels of precursor recipes to expand, all by default"
+        },
+    )
+
+
+class CraftTreeIngredientSchema(Base):
+    """
+    Schema for an ingredient of a craft tree and the recipe supplying it.
+    """
+
+    ITEM_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the item"}
+    )
+    RATE = fields.Float(
+        required=True, metadata={"Description": "The scaled rate of the item"}
+    )
+    RECIPE = fields.Nested(
+        lambda: CraftTreeNodeSchema(),
+        allow_none=True,
+        metadata={
+            "Description": "The precursor recipe producing the item, null for a leaf"
+        },
+    )
+
+
+class CraftTreeNodeSchema(Base):
+    """
+    Schema for a recipe of a craft tree.
+    """
+
+    RECIPE_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the recipe"}
+    )
+    SCALE = fields.Float(
+        required=True, metadata={"Description": "How many times the recipe is crafted"}
+    )
+    INGREDIENTS = fields.List(
+        fields.Nested(CraftTreeIngredientSchema),
+        required=True,
+        metadata={"Description": "The items consumed, per item"},
+    )
+    PRODUCTS = fields.List(
+        fields.Nested(CraftRateSchema),
+        required=True,
+        metadata={"Description": "The items produced, per item"},
+    )
+    CYCLE = fields.List(
+        fields.Nested(lambda: CraftTotalRecipeSchema()),
+        metadata={
+            "Description": "The crafts of every recipe of the cycle the node collapses, "
+            "if any"
+        },
+    )
+
+
+class CraftTotalRecipeSchema(Base):
+    """
+    Schema for the total crafts of a recipe in a craft tree.
+    """
+
+    RECIPE_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the recipe"}
+    )
+    SCALE = fields.Float(
+        required=True,
+        metadata={"Description": "How many times the recipe is crafted in the tree"},
+    )
+
+
+class CraftTotalsSchema(Base):
+    """
+    Schema for the flattened totals of a craft tree.
+    """
+
+    RECIPES = fields.List(
+        fields.Nested(CraftTotalRecipeSchema),
+        required=True,
+        metadata={"Description": "The crafts of every recipe in the tree"},
+    )
+    INGREDIENTS = fields.List(
+        fields.Nested(CraftRateSchema),
+        required=True,
+        metadata={"Description": "The items consumed from outside of the tree"},
+    )
+    PRODUCTS = fields.List(
+        fields.Nested(CraftRateSchema),
+        required=True,
+        metadata={"Description": "The items produced net of the ones used up inside"},
+    )
+
+
+class CraftTreeSchema(Base):
+    """
+    Schema for a craft tree and its flattened totals.
+    """
+
+    TREE = fields.Nested(
+        CraftTreeNodeSchema,
+        required=True,
+        metadata={"Description": "The recipe with its precursors expanded"},
+    )
+    TOTALS = fields.Nested(
+        CraftTotalsSchema,
+        required=True,
+        metadata={"Description": "The totals of the whole tree"},
+    )
+
+
+class CraftTargetSchema(Base):
+    """
+    Schema for an item to produce and the rate it is produced at.
+    """
+
+    ITEM_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the item"}
+    )
+    RATE = fields.Float(
+        required=True,
+        validate=validate.Range(min=0, min_inclusive=False),
+        metadata={"Description": "The rate to produce the item at"},
+    )
+
+
+class CraftSolveQuerySchema(Base):
+    """
+    Schema for the target rates a production plan is solved for.
+    """
+
+    TARGETS = fields.List(
+        fields.Nested(CraftTargetSchema),
+        required=True,
+        validate=validate.Length(min=1),
+        metadata={"Description": "The items to produce and their rates"},
+    )
+    MODE = fields.Str(
+        load_default="tree",
+        validate=validate.OneOf(["tree", "lp"]),
+        metadata={
+            "Description": "tree walks back through the recipe with the lowest ID "
+            "producing each item, lp weighs alternative recipes and byproducts"
+        },
+    )
+
+
+class CraftCycleSchema(Base):
+    """
+    Schema for a cycle of recipes depending on each other through their items.
+    """
+
+    RECIPES = fields.List(
+        fields.Int(),
+        required=True,
+        metadata={"Description": "The unique IDs of the recipes of the cycle"},
+    )
+    ITEMS = fields.List(
+        fields.Int(),
+        required=True,
+        metadata={"Description": "The unique IDs of the items passed around the cycle"},
+    )
@@ -3,7 +3,7 @@ This module contains the schema for ingrdient objects.
 """
 
 from marshmallow import fields
-from .base import Base
+from .base import INT32_RANGE, Base
 
 
 class IngredientSchema(Base):
@@ -29,6 +29,7 @@ class IngredientSchema(Base):
     # Data fields
     RATE = fields.Int(
         required=True,
+        validate=INT32_RANGE,
         metadata={
             "Description": "The rate at which the ingridient is used in the recipe"
         },
@@ -59,3 +60,49 @@ class IngredientQuery(Base):
             "Description": "The rate at which the ingridient is used in the recipe"
         },
     )
+    INGREDIENT_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these ingredient IDs"},
+    )
+    INGREDIENT_ID_GT = fields.Int(
+        required=False,
+        metadata={"Description": "Matches ingredient IDs greater than this"},
+    )
+    INGREDIENT_ID_LT = fields.Int(
+        required=False,
+        metadata={"Description": "Matches ingredient IDs less than this"},
+    )
+    ITEM_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these item IDs"},
+    )
+    ITEM_ID_GT = fields.Int(
+        required=False, metadata={"Description": "Matches item IDs greater than this"}
+    )
+    ITEM_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches item IDs less than this"}
+    )
+    RECIPE_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these recipe IDs"},
+    )
+    RECIPE_ID_GT = fields.Int(
+        required=False, metadata={"Description": "Matches recipe IDs greater than this"}
+    )
+    RECIPE_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches recipe IDs less than this"}
+    )
+    RATE_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these rates"},
+    )
+    RATE_GT = fields.Int(
+        required=False, metadata={"Description": "Matches rates greater than this"}
+    )
+    RATE_LT = fields.Int(
+        required=False, metadata={"Description": "Matches rates less than this"}
+    )
@@ -28,3 +28,41 @@ class ItemQuery(Base):
         required=False, metadata={"Description": "The unique ID of the item"}
     )
     NAME = fields.Str(required=False, metadata={"Description": "The name of the item"})
+    ITEM_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these item IDs"},
+    )
+    ITEM_ID_GT = fields.Int(
+        required=False, metadata={"Description": "Matches item IDs greater than this"}
+    )
+    ITEM_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches item IDs less than this"}
+    )
+    NAME_IN = fields.List(
+        fields.Str(),
+        required=False,
+        metadata={"Description": "Matches any of these item names"},
+    )
+    NAME_STARTSWITH = fields.Str(
+        required=False,
+        metadata={"Description": "Matches item names starting with this prefix"},
+    )
+
+
+class ItemRecipeSchema(Base):
+    """
+    Schema for a recipe consuming or producing an item, with the rate it does so.
+    """
+
+    RECIPE_ID = fields.Int(
+        required=True, metadata={"Description": "The unique ID of the recipe"}
+    )
+    NAME = fields.Str(required=True, metadata={"Description": "The name of the recipe"})
+    DESCRIPTION = fields.Str(
+        required=False, metadata={"Description": "The description of the recipe"}
+    )
+    RATE = fields.Float(
+        required=True,
+        metadata={"Description": "The rate of the item, summed over the rows"},
+    )
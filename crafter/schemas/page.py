@@ -0,0 +1,42 @@
+"""
+This module contains the schemas for the read options of the endpoints.
+"""
+
+from marshmallow import fields, validate
+from webargs.fields import DelimitedList
+from .base import Base
+
+
+class ProjectionQuery(Base):
+    """
+    Schema for the fields returned by a read.
+    """
+
+    columns = DelimitedList(
+        fields.Str(),
+        data_key="fields",
+        required=False,
+        metadata={"Description": "Comma separated fields to return, all by default"},
+    )
+
+
+class PageQuery(ProjectionQuery):
+    """
+    Schema for the paging and streaming options of a collection endpoint.
+    """
+
+    limit = fields.Int(
+        required=False,
+        validate=validate.Range(min=1, max=10000),
+        metadata={"Description": "The maximum number of entries in the page"},
+    )
+    after = fields.Int(
+        required=False,
+        metadata={
+            "Description": "The cursor of the previous page, entries with a greater ID are returned"
+        },
+    )
+    stream = fields.Bool(
+        required=False,
+        metadata={"Description": "Stream the whole table as newline delimited JSON"},
+    )
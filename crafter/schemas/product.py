@@ -3,7 +3,7 @@ This module contains the schema for product objects.
 """
 
 from marshmallow import fields
-from .base import Base
+from .base import INT32_RANGE, Base
 
 
 class ProductSchema(Base):
@@ -31,6 +31,7 @@ class ProductSchema(Base):
     # Data fields
     RATE = fields.Int(
         required=True,
+        validate=INT32_RANGE,
         metadata={
             "Description": "The rate at which the product is produced in the recipe"
         },
@@ -63,3 +64,48 @@ class ProductQuery(Base):
             "Description": "The rate at which the product is produced in the recipe"
         },
     )
+    PRODUCT_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these product IDs"},
+    )
+    PRODUCT_ID_GT = fields.Int(
+        required=False,
+        metadata={"Description": "Matches product IDs greater than this"},
+    )
+    PRODUCT_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches product IDs less than this"}
+    )
+    ITEM_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these item IDs"},
+    )
+    ITEM_ID_GT = fields.Int(
+        required=False, metadata={"Description": "Matches item IDs greater than this"}
+    )
+    ITEM_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches item IDs less than this"}
+    )
+    RECIPE_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these recipe IDs"},
+    )
+    RECIPE_ID_GT = fields.Int(
+        required=False, metadata={"Description": "Matches recipe IDs greater than this"}
+    )
+    RECIPE_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches recipe IDs less than this"}
+    )
+    RATE_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these rates"},
+    )
+    RATE_GT = fields.Int(
+        required=False, metadata={"Description": "Matches rates greater than this"}
+    )
+    RATE_LT = fields.Int(
+        required=False, metadata={"Description": "Matches rates less than this"}
+    )
@@ -38,3 +38,23 @@ class RecipeQuery(Base):
     DESCRIPTION = fields.Str(
         required=False, metadata={"Description": "The description of the recipe"}
     )  # The description of the recipe
+    RECIPE_ID_IN = fields.List(
+        fields.Int(),
+        required=False,
+        metadata={"Description": "Matches any of these recipe IDs"},
+    )
+    RECIPE_ID_GT = fields.Int(
+        required=False, metadata={"Description": "Matches recipe IDs greater than this"}
+    )
+    RECIPE_ID_LT = fields.Int(
+        required=False, metadata={"Description": "Matches recipe IDs less than this"}
+    )
+    NAME_IN = fields.List(
+        fields.Str(),
+        required=False,
+        metadata={"Description": "Matches any of these recipe names"},
+    )
+    NAME_STARTSWITH = fields.Str(
+        required=False,
+        metadata={"Description": "Matches recipe names starting with this prefix"},
+    )
@@ -8,6 +8,7 @@ from .common_tags import (
     UnorderedList,
 )
 from .form import Form
+from .formatting import prettify
 from .heading import Heading
 from .html_root import HTMLRoot
 from .input import Input
@@ -33,4 +34,5 @@ __all__ = [
     "Input",
     "Link",
     "Form",
+    "prettify",
 ]
@@ -0,0 +1,10 @@
+def prettify(markup: str) -> str:
+    """
+    Parses the rendered markup as a browser would and returns it indented.
+
+    BeautifulSoup and html5lib are imported on the first page rendered, the API
+    alone never needs them.
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(markup, "html5lib").prettify()
@@ -0,0 +1,77 @@
+import os
+
+import pandas as pd
+import pytest
+from flask import Flask
+from flask_smorest import Api
+
+from crafter import MAJOR_VERSION, blueprints, core
+
+API = f"/api/v{MAJOR_VERSION}"
+
+# The memory tables are singletons, every test starts again from their empty rows.
+EMPTY = {name: table().storage().snapshot() for name, table in core.tables}
+
+
+def reset():
+    for name, table in core.tables:
+        table().storage().restore(EMPTY[name])
+
+
+def contents(path):
+    return {name: (path / name).read_bytes() for name in sorted(os.listdir(path))}
+
+
+@pytest.fixture(params=sorted(core.backends))
+def backend(request, tmp_path):
+    reset()
+    offload = core.init(str(tmp_path), request.param, interval=0)
+    yield request.param
+    offload()
+
+
+@pytest.fixture
+def client(backend):
+    app = Flask(__name__)
+    app.config.update(
+        API_TITLE="Crafter API", API_VERSION="v1", OPENAPI_VERSION="3.0.3"
+    )
+    blueprints.init(Api(app), app)
+    return app.test_client()
+
+
+@pytest.fixture
+def catalog(client):
+    """
+    Fills the tables with items 0 to 9 and recipes 0 to 4, without any ingredient
+    or product.
+    """
+    client.post(
+        f"{API}/items/", json=[{"ITEM_ID": i, "NAME": f"item {i}"} for i in range(10)]
+    )
+    client.post(
+        f"{API}/recipes/",
+        json=[
+            {"RECIPE_ID": i, "NAME": f"recipe {i}", "DESCRIPTION": ""} for i in range(5)
+        ],
+    )
+    return client
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """
+    Returns the path of an archive holding two items and a recipe as YAML, with
+    the memory tables emptied again.
+    """
+    reset()
+    core.ItemTable().storage().extend(
+        pd.DataFrame({"ITEM_ID": [1, 2], "NAME": ["a", "b"]})
+    )
+    core.RecipeTable().storage().extend(
+        pd.DataFrame({"RECIPE_ID": [0], "NAME": ["r"], "DESCRIPTION": [""]})
+    )
+    core.export(str(tmp_path))
+    reset()
+    yield tmp_path
+    reset()
@@ -0,0 +1,119 @@
+import warnings
+
+import pandas as pd
+from conftest import contents, reset
+
+from crafter import core
+from crafter.core import IngredientTable, ItemTable, ProductTable, RecipeTable
+
+
+def test_load_yaml_without_forking_threads(archive):
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        core.load_snapshot(str(archive))
+    assert not [w for w in caught if "multi-threaded" in str(w.message)]
+    assert ItemTable().get_many() == [
+        {"ITEM_ID": 1, "NAME": "a"},
+        {"ITEM_ID": 2, "NAME": "b"},
+    ]
+
+
+def test_load_snapshot_without_processes(archive, monkeypatch):
+    core.load_snapshot(str(archive))
+    core.export(str(archive), core.SNAPSHOT)
+    reset()
+    monkeypatch.setattr(core, "ProcessPoolExecutor", None)
+    core.load_snapshot(str(archive))
+    assert RecipeTable().get_many() == [
+        {"RECIPE_ID": 0, "NAME": "r", "DESCRIPTION": ""}
+    ]
+
+
+def test_read_only_init(archive):
+    journal = archive / core.JOURNAL
+    journal.write_bytes(
+        b'[["items","append",{"ITEM_ID":3,"NAME":"c"}]]\n[["items","app'
+    )
+    before = contents(archive)
+    offload = core.init(str(archive), read_only=True)
+    try:
+        assert [row["ITEM_ID"] for row in ItemTable().get_many()] == [1, 2, 3]
+        ItemTable().add_one({"ITEM_ID": 4, "NAME": "d"})
+    finally:
+        offload()
+    assert contents(archive) == before
+
+
+def frames():
+    return {name: table().storage().frame for name, table in core.tables}
+
+
+def test_snapshot_round_trip(tmp_path):
+    reset()
+    ItemTable().storage().extend(
+        pd.DataFrame({"ITEM_ID": [1, 5, 2], "NAME": ["a", "é ✓", ""]})
+    )
+    RecipeTable().storage().extend(
+        pd.DataFrame({"RECIPE_ID": [0], "NAME": ["r"], "DESCRIPTION": ["long " * 50]})
+    )
+    for table, key in (
+        (IngredientTable, "INGREDIENT_ID"),
+        (ProductTable, "PRODUCT_ID"),
+    ):
+        table().storage().extend(
+            pd.DataFrame(
+                {key: [3, 4], "ITEM_ID": [1, 5], "RECIPE_ID": [0, 0], "RATE": [2, 7]}
+            )
+        )
+    before = frames()
+    core.export(str(tmp_path), core.SNAPSHOT)
+    ItemTable().storage().update(1, {"ITEM_ID": 1, "NAME": "only in yaml"})
+    core.export(str(tmp_path))
+    reset()
+    try:
+        assert core.load_snapshot(str(tmp_path)) == {}
+        for name, frame in frames().items():
+            pd.testing.assert_frame_equal(
+                frame.reset_index(drop=True), before[name].reset_index(drop=True)
+            )
+    finally:
+        reset()
+
+
+def test_integrity_report(archive):
+    core.load_snapshot(str(archive))
+    assert core.integrity_report() == {}
+    IngredientTable().storage().extend(
+        pd.DataFrame(
+            {
+                "INGREDIENT_ID": [0, 1, 1],
+                "ITEM_ID": [1, 9, 9],
+                "RECIPE_ID": [0, 0, 7],
+                "RATE": [1, 1, 1],
+            }
+        )
+    )
+    ItemTable().storage().extend(pd.DataFrame({"ITEM_ID": [2], "NAME": ["again"]}))
+    assert core.integrity_report() == {
+        "items": {"ITEM_ID": [2]},
+        "ingredients": {"INGREDIENT_ID": [1], "ITEM_ID": [9], "RECIPE_ID": [7]},
+    }
+
+
+def test_load_reports_orphans(archive, caplog):
+    core.load_snapshot(str(archive))
+    ProductTable().storage().extend(
+        pd.DataFrame(
+            {
+                "PRODUCT_ID": [0, 1],
+                "ITEM_ID": [1, 3],
+                "RECIPE_ID": [0, 0],
+                "RATE": [1, 1],
+            }
+        )
+    )
+    core.export(str(archive))
+    reset()
+    assert core.load_snapshot(str(archive)) == {"products": {"ITEM_ID": [3]}}
+    assert len(ProductTable().get_many()) == 2
+    assert "products: 1 invalid ITEM_ID values, such as [3]" in caplog.text
@@ -0,0 +1,74 @@
+import os
+
+import pandas as pd
+import pytest
+
+from crafter.core.checkpoint import Checkpointer
+from crafter.core.journal import Journal
+from crafter.core.storage import TableStorage
+from crafter.core.transaction import attach, transaction
+from utils import pd_read
+
+SCHEMAS = {
+    "items": ("ITEM_ID", {"ITEM_ID": "int64", "NAME": "object"}),
+    "recipes": ("RECIPE_ID", {"RECIPE_ID": "int64", "NAME": "object"}),
+}
+
+
+@pytest.fixture
+def checkpointer(tmp_path):
+    storages = {
+        name: TableStorage(key, schema) for name, (key, schema) in SCHEMAS.items()
+    }
+    journal = Journal(str(tmp_path / "journal.log"), storages)
+    attach(journal)
+    yield Checkpointer(str(tmp_path), "npz", storages, journal, 0)
+    attach(None)
+    journal.close()
+
+
+def test_first_checkpoint_writes_every_table(checkpointer, tmp_path):
+    assert checkpointer.dirty() == ["items", "recipes"]
+    assert checkpointer.checkpoint() == ["items", "recipes"]
+    assert checkpointer.dirty() == []
+    assert sorted(os.listdir(tmp_path)) == [
+        "items.npz",
+        "journal.log",
+        "recipes.npz",
+    ]
+
+
+def test_checkpoint_writes_dirty_tables(checkpointer, tmp_path):
+    checkpointer.checkpoint()
+    recipes = os.stat(tmp_path / "recipes.npz").st_mtime_ns
+    items = checkpointer.storages["items"]
+    with transaction():
+        items.extend(pd.DataFrame({"ITEM_ID": [1, 2], "NAME": ["a", "b"]}))
+        items.update(2, {"ITEM_ID": 2, "NAME": "renamed"})
+    assert checkpointer.dirty() == ["items"]
+    assert os.path.getsize(checkpointer.journal.path) > 0
+
+    assert checkpointer.checkpoint() == ["items"]
+    assert checkpointer.dirty() == []
+    assert checkpointer.checkpoint() == []
+    assert os.stat(tmp_path / "recipes.npz").st_mtime_ns == recipes
+    assert os.path.getsize(checkpointer.journal.path) == 0
+    assert not os.path.exists(checkpointer.journal.rotated)
+
+    frame = pd_read(str(tmp_path / "items.npz"))
+    assert frame.to_dict(orient="records") == [
+        {"ITEM_ID": 1, "NAME": "a"},
+        {"ITEM_ID": 2, "NAME": "renamed"},
+    ]
+    assert frame["ITEM_ID"].dtype == "int64"
+
+
+def test_existing_files_are_clean(checkpointer, tmp_path):
+    checkpointer.checkpoint()
+    reopened = Checkpointer(
+        str(tmp_path), "npz", checkpointer.storages, checkpointer.journal, 0
+    )
+    assert reopened.dirty() == []
+    assert Checkpointer(
+        str(tmp_path), "yaml", checkpointer.storages, checkpointer.journal, 0
+    ).dirty() == ["items", "recipes"]
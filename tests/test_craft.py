@@ -0,0 +1,156 @@
+import sys
+import threading
+
+from conftest import API
+
+from crafter import core
+
+
+def test_batch_without_edges(catalog):
+    response = catalog.post(
+        f"{API}/craft/batch?balance=true", json=[{"RECIPE_ID": 1, "SCALE": 1}]
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "RESULTS": [{"RECIPE_ID": 1, "SCALE": 1.0, "INGREDIENTS": [], "PRODUCTS": []}],
+        "BALANCE": [],
+    }
+
+
+def edges(client, ingredients=(), products=()):
+    """
+    Adds the ingredients and products given as (recipe, item, rate) triples.
+    """
+    client.post(
+        f"{API}/ingredients/",
+        json=[
+            {"INGREDIENT_ID": key, "RECIPE_ID": r, "ITEM_ID": i, "RATE": rate}
+            for key, (r, i, rate) in enumerate(ingredients)
+        ],
+    )
+    client.post(
+        f"{API}/products/",
+        json=[
+            {"PRODUCT_ID": key, "RECIPE_ID": r, "ITEM_ID": i, "RATE": rate}
+            for key, (r, i, rate) in enumerate(products)
+        ],
+    )
+
+
+def test_solve_unbounded(catalog):
+    edges(catalog, ingredients=[(0, 0, -3)], products=[(0, 1, 1)])
+    response = catalog.post(
+        f"{API}/craft/solve",
+        json={"TARGETS": [{"ITEM_ID": 1, "RATE": 1}], "MODE": "lp"},
+    )
+    assert response.status_code == 422
+    assert "unbounded" in response.get_json()["message"]
+
+
+def ring(client, size):
+    """
+    Adds recipes 0 to size - 1 and a cycle through them, recipe r turning one of
+    item r into two of the next item.
+    """
+    client.post(
+        f"{API}/items/", json=[{"ITEM_ID": i, "NAME": "x"} for i in range(size)]
+    )
+    client.post(
+        f"{API}/recipes/",
+        json=[{"RECIPE_ID": r, "NAME": "x", "DESCRIPTION": ""} for r in range(size)],
+    )
+    edges(
+        client,
+        ingredients=[(r, r, 1) for r in range(size)],
+        products=[(r, (r + 1) % size, 2) for r in range(size)],
+    )
+
+
+def test_tree_collapses_cycle(client):
+    ring(client, 3)
+    response = client.put(f"{API}/craft/tree", json={"RECIPE_ID": 0, "SCALE": 1})
+    assert response.status_code == 200
+    tree = response.get_json()
+    assert [recipe["RECIPE_ID"] for recipe in tree["TREE"]["CYCLE"]] == [0, 1, 2]
+    assert tree["TOTALS"]["INGREDIENTS"] == []
+
+
+def test_tree_cycle_too_large(client):
+    ring(client, 250)
+    response = client.put(f"{API}/craft/tree", json={"RECIPE_ID": 0, "SCALE": 1})
+    assert response.status_code == 422
+    assert len(response.get_json()["errors"]["cycle"]) == 250
+
+
+def test_tree_concurrent(client):
+    """
+    Threads sharing the expansion of one graph version all get the right tree,
+    recipe r turning item r into item r + 1, or item 0 for recipes 0, 50 and so on,
+    while recipes 10, 20 and so on need one of their own product to run.
+    """
+    size = 200
+    client.post(
+        f"{API}/items/", json=[{"ITEM_ID": i, "NAME": "x"} for i in range(size + 1)]
+    )
+    client.post(
+        f"{API}/recipes/",
+        json=[{"RECIPE_ID": r, "NAME": "x", "DESCRIPTION": ""} for r in range(size)],
+    )
+    catalysts = range(10, size, 10)
+    edges(
+        client,
+        ingredients=[(r, 0 if r % 50 == 0 else r, 1) for r in range(size)]
+        + [(r, r + 1, 1) for r in catalysts],
+        products=[(r, r + 1, 2 if r in catalysts else 1) for r in range(size)],
+    )
+    engine = core.engine()
+    failures = []
+
+    def craft(offset):
+        with client.application.app_context():
+            for recipe_id in range(offset, size, 4):
+                try:
+                    totals = engine.tree(recipe_id, 1)["TOTALS"]
+                    assert totals["INGREDIENTS"] == [{"ITEM_ID": 0, "RATE": 1.0}]
+                except BaseException as error:
+                    failures.append((recipe_id, error))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=craft, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert failures == []
+
+
+def test_deep_tree(client):
+    size = 400
+    client.post(
+        f"{API}/items/", json=[{"ITEM_ID": i, "NAME": "x"} for i in range(size + 1)]
+    )
+    client.post(
+        f"{API}/recipes/",
+        json=[{"RECIPE_ID": r, "NAME": "x", "DESCRIPTION": ""} for r in range(size)],
+    )
+    edges(
+        client,
+        ingredients=[(r, r, 1) for r in range(size)],
+        products=[(r, r + 1, 1) for r in range(size)],
+    )
+    root = {"RECIPE_ID": size - 1, "SCALE": 1}
+    assert client.put(f"{API}/craft/tree", json=root).status_code == 422
+    response = client.put(f"{API}/craft/tree", json={**root, "DEPTH": 64})
+    assert response.status_code == 200
+    assert response.get_json()["TOTALS"]["INGREDIENTS"] == [
+        {"ITEM_ID": size - 65, "RATE": 1.0}
+    ]
+    response = client.post(
+        f"{API}/craft/solve", json={"TARGETS": [{"ITEM_ID": size, "RATE": 2}]}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["INGREDIENTS"] == [{"ITEM_ID": 0, "RATE": 2.0}]
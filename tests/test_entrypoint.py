@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+from conftest import contents, reset
+
+from crafter import core, entrypoint
+from crafter.profiling import StartupProfiler
+
+
+def test_lazy_imports():
+    modules = ("pandas", "flask", "flask_smorest", "bs4", "crafter.core")
+    script = (
+        "import sys, crafter.entrypoint; "
+        f"print([name for name in {modules!r} if name in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        text=True,
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_profiler_times_imports(tmp_path, monkeypatch):
+    (tmp_path / "profiled_outer.py").write_text("import profiled_inner\n")
+    (tmp_path / "profiled_inner.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        with profiler.phase("import"):
+            import profiled_outer  # noqa: F401
+    finally:
+        profiler.uninstall()
+    assert profiler not in sys.meta_path
+    outer = profiler.modules["profiled_outer"]
+    assert outer[1] >= profiler.modules["profiled_inner"][1]
+    assert outer[0] <= outer[1]
+    assert "profiled_outer" in profiler.report()
+
+
+def test_profile_startup(archive, monkeypatch, capsys):
+    (archive / core.JOURNAL).write_bytes(
+        b'[["items","append",{"ITEM_ID":3,"NAME":"c"}]]\n'
+    )
+    before = contents(archive)
+    monkeypatch.setattr(
+        sys, "argv", ["server", "--profile-startup", "--archive", str(archive)]
+    )
+    try:
+        entrypoint.main()
+    finally:
+        reset()
+    report = capsys.readouterr().out
+    for phase in ("core.init", "blueprints.init", "total", "module"):
+        assert phase in report
+    assert contents(archive) == before
@@ -0,0 +1,66 @@
+import pytest
+from conftest import API
+
+from crafter import core
+from crafter.core.graph import RecipeGraph
+
+
+def bridge(path, key, recipe, item, rate):
+    column = "INGREDIENT_ID" if path == "ingredients" else "PRODUCT_ID"
+    return {column: key, "RECIPE_ID": recipe, "ITEM_ID": item, "RATE": rate}
+
+
+@pytest.mark.parametrize(
+    "path, edges, neighbours",
+    [
+        ("ingredients", "ingredients", "consumers"),
+        ("products", "products", "producers"),
+    ],
+)
+def test_graph_follows_writes(catalog, backend, monkeypatch, path, edges, neighbours):
+    if backend == "memory":
+        # Every write is applied to the memory graph as it is, never by a reload.
+        monkeypatch.setattr(RecipeGraph, "reload", None)
+    catalog.post(
+        f"{API}/{path}/",
+        json=[bridge(path, 0, 1, 2, 1), bridge(path, 1, 1, 2, 3)],
+    )
+    graph = core.graph()
+    assert getattr(graph, edges)(1) == {2: 4}
+    assert getattr(graph, neighbours)(2) == {1: 4}
+    version = core.graph().version
+
+    catalog.put(f"{API}/{path}/1", json=bridge(path, 1, 1, 3, 5))
+    graph = core.graph()
+    assert graph.version > version
+    assert getattr(graph, edges)(1) == {2: 1, 3: 5}
+    assert getattr(graph, neighbours)(2) == {1: 1}
+    assert getattr(graph, neighbours)(3) == {1: 5}
+
+    catalog.put(f"{API}/{path}/0", json=bridge(path, 0, 4, 2, 2))
+    graph = core.graph()
+    assert getattr(graph, edges)(1) == {3: 5}
+    assert getattr(graph, neighbours)(2) == {4: 2}
+
+    catalog.delete(f"{API}/{path}/0")
+    catalog.delete(f"{API}/{path}/1")
+    graph = core.graph()
+    assert getattr(graph, neighbours)(2) == {}
+    assert getattr(graph, edges)(1) == {}
+    assert graph.recipes() == set()
+    assert graph.items() == set()
+
+
+def test_graph_cached(catalog):
+    computed = []
+
+    def compute(graph):
+        computed.append(graph.version)
+        return sorted(graph.recipes())
+
+    assert core.graph().cached("recipes", compute) == []
+    assert core.graph().cached("recipes", compute) == []
+    assert len(computed) == 1
+    catalog.post(f"{API}/products/", json=[bridge("products", 0, 3, 1, 1)])
+    assert core.graph().cached("recipes", compute) == [3]
+    assert len(computed) == 2
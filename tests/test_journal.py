@@ -0,0 +1,117 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from crafter.core.journal import Journal
+from crafter.core.storage import TableStorage
+from crafter.core.transaction import attach, transaction
+
+SCHEMA = {"ITEM_ID": "int64", "NAME": "object"}
+
+
+def restart(path):
+    """
+    Returns a new storage with the journal at path replayed over it, as after a
+    crash that lost every row held in memory, and the number of lines applied.
+    """
+    storage = TableStorage("ITEM_ID", SCHEMA)
+    journal = Journal(path, {"items": storage})
+    applied = journal.replay()
+    journal.close()
+    return storage, applied
+
+
+def rows(storage):
+    return storage.frame.to_dict(orient="records")
+
+
+@pytest.fixture
+def journal(tmp_path):
+    storage = TableStorage("ITEM_ID", SCHEMA)
+    journal = Journal(str(tmp_path / "journal.log"), {"items": storage})
+    attach(journal)
+    yield journal
+    attach(None)
+    journal.close()
+
+
+def write(journal, count, start=0):
+    storage = journal.storages["items"]
+    for key in range(start, start + count):
+        with transaction():
+            storage.append({"ITEM_ID": key, "NAME": f"item {key}"})
+
+
+def test_replay_after_crash(journal):
+    storage = journal.storages["items"]
+    write(journal, 5)
+    with transaction():
+        storage.update(1, {"ITEM_ID": 1, "NAME": "renamed"})
+        storage.remove(3)
+        storage.extend(pd.DataFrame({"ITEM_ID": [5, 6], "NAME": ["x", "y"]}))
+    restored, applied = restart(journal.path)
+    assert applied == 6
+    assert rows(restored) == rows(storage)
+
+
+def test_replay_twice(journal):
+    write(journal, 3)
+    restored = TableStorage("ITEM_ID", SCHEMA)
+    again = Journal(journal.path, {"items": restored})
+    assert again.replay() == 3
+    assert again.replay() == 3
+    again.close()
+    assert rows(restored) == rows(journal.storages["items"])
+
+
+def test_torn_line(journal):
+    write(journal, 4)
+    end = os.path.getsize(journal.path)
+    with open(journal.path, "ab") as file:
+        file.write(b'[["items","append",{"ITEM_ID":4,"NA')
+    restored, applied = restart(journal.path)
+    assert applied == 4
+    assert os.path.getsize(journal.path) == end
+    write(journal, 1, start=4)
+    restored, applied = restart(journal.path)
+    assert applied == 5
+    assert restored.frame["ITEM_ID"].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_rotate(journal):
+    write(journal, 2)
+    journal.rotate()
+    write(journal, 1, start=2)
+    journal.rotate()
+    write(journal, 1, start=3)
+    restored, applied = restart(journal.path)
+    assert applied == 4
+    assert restored.frame["ITEM_ID"].tolist() == [0, 1, 2, 3]
+    journal.release()
+    assert not os.path.exists(journal.rotated)
+    restored, applied = restart(journal.path)
+    assert applied == 1
+    assert restored.frame["ITEM_ID"].tolist() == [3]
+
+
+def test_group_sync(journal, monkeypatch):
+    syncs = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (syncs.append(fd), fsync(fd)))
+    storage = journal.storages["items"]
+    sequences = [journal.append([(storage, "remove", key)]) for key in range(3)]
+    journal.sync(sequences[0])
+    journal.sync(sequences[-1])
+    assert len(syncs) == 1
+
+    threads = [
+        threading.Thread(target=write, args=(journal, 20, 100 * n)) for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert journal._synced == journal._written == 83
+    assert restart(journal.path)[1] == 83
@@ -0,0 +1,108 @@
+import pytest
+from conftest import API
+
+from crafter.core.query import compile_query
+
+
+@pytest.fixture
+def recipes(catalog):
+    """
+    Adds ingredients of recipes 0 to 4 on items 0 to 9, at rates 1 to 10.
+    """
+    catalog.post(
+        f"{API}/ingredients/",
+        json=[
+            {"INGREDIENT_ID": i, "ITEM_ID": i, "RECIPE_ID": i % 5, "RATE": i + 1}
+            for i in range(10)
+        ],
+    )
+    return catalog
+
+
+def keys(response, key="INGREDIENT_ID"):
+    assert response.status_code == 200
+    return sorted(entry[key] for entry in response.get_json())
+
+
+def test_query_equality(recipes):
+    response = recipes.post(f"{API}/ingredients/query", json={"RECIPE_ID": 2})
+    assert keys(response) == [2, 7]
+    response = recipes.post(
+        f"{API}/ingredients/query", json={"RECIPE_ID": 2, "RATE": 8}
+    )
+    assert keys(response) == [7]
+    response = recipes.post(f"{API}/ingredients/query", json={"ITEM_ID": 20})
+    assert keys(response) == []
+
+
+@pytest.mark.parametrize("name", ["it's", 'say "hi"', "a == a or True", "`NAME`"])
+def test_query_quoted_name(catalog, name):
+    catalog.put(f"{API}/items/20", json={"ITEM_ID": 20, "NAME": name})
+    response = catalog.post(f"{API}/items/query", json={"NAME": name})
+    assert keys(response, "ITEM_ID") == [20]
+
+
+def test_query_compiled_once(recipes, backend):
+    if backend != "memory":
+        pytest.skip("Only the memory tables compile predicates")
+    compile_query.cache_clear()
+    for rate in range(1, 4):
+        response = recipes.post(
+            f"{API}/ingredients/query", json={"RECIPE_ID": rate, "RATE": rate + 1}
+        )
+        assert keys(response) == [rate]
+    assert compile_query.cache_info().misses == 1
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ({"RECIPE_ID_IN": [1, 3]}, [1, 3, 6, 8]),
+        ({"RECIPE_ID_IN": []}, []),
+        ({"INGREDIENT_ID_IN": [0, 4, 99]}, [0, 4]),
+        ({"RATE_GT": 3, "RATE_LT": 7}, [3, 4, 5]),
+        ({"RATE_GT": 8}, [8, 9]),
+        ({"ITEM_ID_LT": 2}, [0, 1]),
+        ({"RECIPE_ID_IN": [0, 1, 2], "RATE_GT": 5}, [5, 6, 7]),
+        ({"INGREDIENT_ID_GT": 2, "INGREDIENT_ID_LT": 6, "RATE_IN": [4, 6]}, [3, 5]),
+    ],
+)
+def test_query_operators(recipes, query, expected):
+    response = recipes.post(f"{API}/ingredients/query", json=query)
+    assert keys(response) == expected
+
+
+def test_query_startswith(catalog):
+    catalog.put(f"{API}/items/10", json={"ITEM_ID": 10, "NAME": "iron"})
+    catalog.put(f"{API}/items/11", json={"ITEM_ID": 11, "NAME": "item%_"})
+    response = catalog.post(f"{API}/items/query", json={"NAME_STARTSWITH": "item 1"})
+    assert keys(response, "ITEM_ID") == [1]
+    response = catalog.post(f"{API}/items/query", json={"NAME_STARTSWITH": "i"})
+    assert keys(response, "ITEM_ID") == list(range(12))
+    response = catalog.post(
+        f"{API}/items/query", json={"NAME_STARTSWITH": "item%", "ITEM_ID_GT": 5}
+    )
+    assert keys(response, "ITEM_ID") == [11]
+
+
+def test_query_range_after_writes(recipes):
+    """
+    Ranges stay right across writes, whether they are resolved by a scan or through
+    the sorted index built once scans are repeated.
+    """
+    for _ in range(3):
+        response = recipes.post(f"{API}/ingredients/query", json={"RATE_GT": 8})
+        assert keys(response) == [8, 9]
+    recipes.put(
+        f"{API}/ingredients/3",
+        json={"INGREDIENT_ID": 3, "ITEM_ID": 3, "RECIPE_ID": 3, "RATE": 20},
+    )
+    recipes.delete(f"{API}/ingredients/9")
+    for _ in range(3):
+        response = recipes.post(f"{API}/ingredients/query", json={"RATE_GT": 8})
+        assert keys(response) == [3, 8]
+
+
+def test_query_unknown_operator(catalog):
+    response = catalog.post(f"{API}/items/query", json={"NAME_GT": "a"})
+    assert response.status_code == 422
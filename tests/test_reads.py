@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from conftest import API
+
+from crafter.blueprints.item import api as item_api
+from crafter.blueprints.streaming import NDJSON
+
+
+def lines(response):
+    assert response.status_code == 200
+    assert response.mimetype == NDJSON
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize(
+    "options", [{"query_string": {"stream": 1}}, {"headers": {"Accept": NDJSON}}]
+)
+def test_stream(catalog, monkeypatch, options):
+    monkeypatch.setattr(item_api, "BATCH_SIZE", 3)
+    response = catalog.get(f"{API}/items/", **options)
+    assert response.is_streamed
+    assert lines(response) == catalog.get(f"{API}/items/").get_json()
+
+
+@pytest.mark.parametrize("path", ["recipes", "ingredients", "products"])
+def test_stream_tables(catalog, path):
+    catalog.post(
+        f"{API}/products/",
+        json=[{"PRODUCT_ID": 0, "RECIPE_ID": 1, "ITEM_ID": 2, "RATE": 1}],
+    )
+    catalog.post(
+        f"{API}/ingredients/",
+        json=[{"INGREDIENT_ID": 0, "RECIPE_ID": 1, "ITEM_ID": 3, "RATE": 2}],
+    )
+    response = catalog.get(f"{API}/{path}/", query_string={"stream": 1})
+    assert lines(response) == catalog.get(f"{API}/{path}/").get_json()
+
+
+def test_stream_empty(client):
+    assert lines(client.get(f"{API}/items/", query_string={"stream": 1})) == []
+
+
+def test_stream_not_accepted(catalog):
+    response = catalog.get(f"{API}/items/", headers={"Accept": "application/json"})
+    assert response.mimetype == "application/json"
+    assert len(response.get_json()) == 10
+
+
+@pytest.mark.parametrize(
+    "path, fields",
+    [
+        ("items/", "NAME"),
+        ("items/3", "ITEM_ID,NAME"),
+        ("recipes/", "RECIPE_ID"),
+        ("recipes/1", "NAME,RECIPE_ID"),
+    ],
+)
+def test_fields(catalog, path, fields):
+    response = catalog.get(f"{API}/{path}", query_string={"fields": fields})
+    assert response.status_code == 200
+    full = catalog.get(f"{API}/{path}").get_json()
+    columns = fields.split(",")
+    if isinstance(full, dict):
+        assert response.get_json() == {column: full[column] for column in columns}
+    else:
+        assert response.get_json() == [
+            {column: entry[column] for column in columns} for entry in full
+        ]
+
+
+def test_fields_page_and_query(catalog):
+    response = catalog.get(
+        f"{API}/items/", query_string={"fields": "ITEM_ID", "limit": 3}
+    )
+    assert response.get_json() == [{"ITEM_ID": 0}, {"ITEM_ID": 1}, {"ITEM_ID": 2}]
+    assert response.headers["X-Next-Cursor"] == "2"
+    response = catalog.post(
+        f"{API}/items/query",
+        query_string={"fields": "NAME"},
+        json={"ITEM_ID_IN": [4, 5]},
+    )
+    assert sorted(entry["NAME"] for entry in response.get_json()) == [
+        "item 4",
+        "item 5",
+    ]
+    assert all(list(entry) == ["NAME"] for entry in response.get_json())
+
+
+def test_fields_stream(catalog):
+    response = catalog.get(
+        f"{API}/items/", query_string={"stream": 1, "fields": "ITEM_ID"}
+    )
+    assert lines(response) == [{"ITEM_ID": i} for i in range(10)]
+
+
+@pytest.mark.parametrize("path", ["items/", "items/3", "recipes/"])
+def test_fields_unknown(catalog, path):
+    response = catalog.get(f"{API}/{path}", query_string={"fields": "NAME,COLOR"})
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["query"]["fields"] == ["Unknown field COLOR."]
+
+
+def test_fields_unknown_query(catalog):
+    response = catalog.post(
+        f"{API}/items/query", query_string={"fields": "RATE"}, json={"ITEM_ID": 1}
+    )
+    assert response.status_code == 422
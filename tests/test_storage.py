@@ -0,0 +1,111 @@
+import pandas as pd
+
+from crafter.core.storage import TableStorage
+
+SCHEMA = {"ITEM_ID": "int64", "NAME": "object"}
+
+
+def items(keys):
+    return pd.DataFrame({"ITEM_ID": list(keys), "NAME": [f"item {k}" for k in keys]})
+
+
+def test_update_copies_one_chunk():
+    storage = TableStorage("ITEM_ID", SCHEMA, buffer_size=2, chunk_size=4)
+    storage.extend(items(range(10)))
+    for key in range(10, 13):
+        storage.append({"ITEM_ID": key, "NAME": f"item {key}"})
+    storage.merge()
+    before = storage.snapshot()
+    assert [len(chunk) for chunk in before.chunks] == [4, 4, 4, 1]
+
+    storage.update(5, {"ITEM_ID": 5, "NAME": "renamed"})
+    after = storage.snapshot()
+    assert [chunk is old for chunk, old in zip(after.chunks, before.chunks)] == [
+        True,
+        False,
+        True,
+        True,
+    ]
+    assert before.row(5)["NAME"] == "item 5"
+    assert after.row(5)["NAME"] == "renamed"
+    assert after.frame["ITEM_ID"].tolist() == list(range(13))
+
+
+def test_remove_keeps_chunks_bounded():
+    storage = TableStorage("ITEM_ID", SCHEMA, chunk_size=4)
+    storage.extend(items(range(10)))
+    storage.remove(0)
+    assert [len(chunk) for chunk in storage.snapshot().chunks] == [4, 4, 1]
+    assert storage.snapshot().offsets == (0, 4, 8)
+    assert storage.snapshot().locate(9) == 8
+    assert storage.snapshot().row(8) == {"ITEM_ID": 9, "NAME": "item 9"}
+
+
+def test_page_after_writes():
+    storage = TableStorage("ITEM_ID", SCHEMA, buffer_size=3, chunk_size=4)
+    storage.extend(items([7, 3, 11, 1, 9]))
+    expected = {7, 3, 11, 1, 9}
+
+    def pages():
+        keys, cursor = [], None
+        while True:
+            frame, cursor = storage.page(cursor, 2)
+            keys.extend(frame["ITEM_ID"].tolist())
+            if cursor is None:
+                return keys
+
+    assert pages() == sorted(expected)
+    index = storage.snapshot().sorted_index("ITEM_ID")
+    for key in (5, 0, 13, 4):
+        storage.append({"ITEM_ID": key, "NAME": f"item {key}"})
+        expected.add(key)
+    storage.extend(items([12, 2]))
+    storage.update(3, {"ITEM_ID": 3, "NAME": "renamed"})
+    expected |= {12, 2}
+    assert storage.snapshot().ordered["ITEM_ID"] is index
+    assert pages() == sorted(expected)
+
+    storage.remove(11)
+    expected.discard(11)
+    assert storage.snapshot().ordered == {}
+    assert pages() == sorted(expected)
+
+
+def test_range_index_handed_down():
+    schema = {"ITEM_ID": "int64", "NAME": "object", "RATE": "int32"}
+    storage = TableStorage("ITEM_ID", schema, buffer_size=3, chunk_size=4)
+    storage.extend(
+        pd.DataFrame(
+            {
+                "ITEM_ID": range(10),
+                "NAME": [f"n{k % 3}" for k in range(10)],
+                "RATE": range(10, 0, -1),
+            }
+        )
+    )
+
+    def between(low, high):
+        return sorted(storage.select({"RATE_GT": low, "RATE_LT": high})["ITEM_ID"])
+
+    assert between(3, 7) == [4, 5, 6]
+    assert "RATE" not in storage.snapshot().ordered
+    assert between(3, 7) == [4, 5, 6]
+    index = storage.snapshot().sorted_index("RATE")
+
+    storage.append({"ITEM_ID": 10, "NAME": "n1", "RATE": 5})
+    storage.update(0, {"ITEM_ID": 0, "NAME": "renamed", "RATE": 10})
+    assert storage.snapshot().ordered["RATE"] is index
+    assert between(3, 7) == [4, 5, 6, 10]
+    assert sorted(storage.select({"NAME_STARTSWITH": "n1"})["ITEM_ID"]) == [
+        1,
+        4,
+        7,
+        10,
+    ]
+
+    storage.update(5, {"ITEM_ID": 5, "NAME": "n2", "RATE": 1})
+    assert "RATE" not in storage.snapshot().ordered
+    assert between(3, 7) == [4, 6, 10]
+    storage.remove(4)
+    assert storage.snapshot().ordered == {}
+    assert between(3, 7) == [6, 10]
@@ -0,0 +1,152 @@
+import os
+import threading
+
+import pytest
+from conftest import API
+
+from crafter.core import sqlite
+
+
+@pytest.fixture
+def referenced(catalog):
+    """
+    Adds an ingredient and a product of recipe 1 on item 2, so both are referenced.
+    """
+    for path, key in (("ingredients", "INGREDIENT_ID"), ("products", "PRODUCT_ID")):
+        catalog.post(
+            f"{API}/{path}/", json=[{key: 0, "RECIPE_ID": 1, "ITEM_ID": 2, "RATE": 1}]
+        )
+    return catalog
+
+
+@pytest.mark.parametrize("path, key", [("items", 2), ("recipes", 1)])
+def test_delete_referenced(referenced, path, key):
+    assert referenced.delete(f"{API}/{path}/{key}").status_code == 409
+    assert referenced.get(f"{API}/{path}/{key}").status_code == 200
+    referenced.delete(f"{API}/ingredients/0")
+    assert referenced.delete(f"{API}/{path}/{key}").status_code == 409
+    referenced.delete(f"{API}/products/0")
+    assert referenced.delete(f"{API}/{path}/{key}").status_code == 200
+
+
+@pytest.mark.parametrize(
+    "path, content",
+    [
+        ("items", {"ITEM_ID": 20, "NAME": "renamed"}),
+        ("recipes", {"RECIPE_ID": 20, "NAME": "renamed", "DESCRIPTION": ""}),
+    ],
+)
+def test_rekey_referenced(referenced, path, content):
+    key = 2 if path == "items" else 1
+    assert referenced.put(f"{API}/{path}/{key}", json=content).status_code == 409
+    assert referenced.get(f"{API}/{path}/{key}").status_code == 200
+    assert referenced.get(f"{API}/{path}/20").status_code == 404
+
+
+def test_add_many_existing(catalog):
+    response = catalog.post(
+        f"{API}/items/",
+        json=[{"ITEM_ID": 10, "NAME": "new"}, {"ITEM_ID": 3, "NAME": "taken"}],
+    )
+    assert response.status_code == 409
+    assert catalog.get(f"{API}/items/10").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "path, entry",
+    [
+        ("items", {"NAME": "new"}),
+        ("recipes", {"NAME": "new", "DESCRIPTION": ""}),
+    ],
+)
+def test_add_many_repeated(catalog, path, entry):
+    key = "ITEM_ID" if path == "items" else "RECIPE_ID"
+    response = catalog.post(
+        f"{API}/{path}/",
+        json=[{key: 20, **entry}, {key: 21, **entry}, {key: 20, **entry}],
+    )
+    assert response.status_code == 409
+    assert set(response.get_json()["errors"]) == {"0", "2"}
+    assert catalog.get(f"{API}/{path}/20").status_code == 404
+    assert catalog.get(f"{API}/{path}/21").status_code == 404
+
+
+@pytest.mark.parametrize("path", ["items", "recipes", "ingredients", "products"])
+def test_add_many_empty(client, path):
+    assert client.post(f"{API}/{path}/", json=[]).status_code == 200
+
+
+def test_threads_release_connections(catalog, backend):
+    """
+    Requests served by short-lived threads, as the threaded development server
+    does, leave no database connection or file descriptor behind.
+    """
+    catalog.get(f"{API}/items/")
+    descriptors = len(os.listdir("/proc/self/fd"))
+
+    def read():
+        assert catalog.get(f"{API}/items/3").status_code == 200
+
+    for _ in range(4):
+        threads = [threading.Thread(target=read) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if backend == "sqlite":
+        assert len(sqlite.database()._connections) <= 1
+    assert len(os.listdir("/proc/self/fd")) <= descriptors
+
+
+@pytest.mark.parametrize("path", ["ingredients", "products"])
+@pytest.mark.parametrize("column", ["ITEM_ID", "RECIPE_ID"])
+def test_update_missing_reference(referenced, path, column):
+    key = "INGREDIENT_ID" if path == "ingredients" else "PRODUCT_ID"
+    entry = {key: 0, "RECIPE_ID": 1, "ITEM_ID": 2, "RATE": 1}
+    response = referenced.put(f"{API}/{path}/0", json={**entry, column: 999})
+    assert response.status_code == 409
+    assert referenced.get(f"{API}/{path}/0").get_json()[column] == entry[column]
+
+
+def recipe(recipe_id, rate):
+    return {
+        "RECIPE_ID": recipe_id,
+        "NAME": f"recipe {recipe_id}",
+        "DESCRIPTION": "",
+        "RATE": rate,
+    }
+
+
+def test_producers_and_consumers(catalog):
+    rows = [(0, 1, 2, 1), (1, 1, 2, 2), (2, 3, 2, 5), (3, 0, 4, 1)]
+    catalog.post(
+        f"{API}/products/",
+        json=[
+            {"PRODUCT_ID": key, "RECIPE_ID": recipe_id, "ITEM_ID": item, "RATE": rate}
+            for key, recipe_id, item, rate in rows
+        ],
+    )
+    catalog.post(
+        f"{API}/ingredients/",
+        json=[{"INGREDIENT_ID": 0, "RECIPE_ID": 4, "ITEM_ID": 2, "RATE": 7}],
+    )
+    producers = catalog.get(f"{API}/items/2/producers")
+    assert producers.status_code == 200
+    assert producers.get_json() == [recipe(1, 3), recipe(3, 5)]
+    assert catalog.get(f"{API}/items/2/consumers").get_json() == [recipe(4, 7)]
+    assert catalog.get(f"{API}/items/5/producers").get_json() == []
+    assert catalog.get(f"{API}/items/5/consumers").get_json() == []
+
+    catalog.delete(f"{API}/products/2")
+    catalog.put(
+        f"{API}/ingredients/0",
+        json={"INGREDIENT_ID": 0, "RECIPE_ID": 4, "ITEM_ID": 4, "RATE": 7},
+    )
+    assert catalog.get(f"{API}/items/2/producers").get_json() == [recipe(1, 3)]
+    assert catalog.get(f"{API}/items/2/consumers").get_json() == []
+    assert catalog.get(f"{API}/items/4/consumers").get_json() == [recipe(4, 7)]
+
+
+@pytest.mark.parametrize("relation", ["producers", "consumers"])
+def test_producers_and_consumers_missing_item(catalog, relation):
+    assert catalog.get(f"{API}/items/99/{relation}").status_code == 404
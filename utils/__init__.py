@@ -1,14 +1,23 @@
 from .envs import (
     ARCHIVE_PATH,
+    BACKEND,
+    CHECKPOINT_INTERVAL,
+    DATABASE_PATH,
     HOST,
     PORT,
 )
-from .file_management import read, write
+from .file_management import frame_columns, pd_read, read, write, write_atomic
 
 __all__ = [
     "read",
+    "pd_read",
+    "frame_columns",
     "write",
+    "write_atomic",
     "ARCHIVE_PATH",
+    "BACKEND",
+    "CHECKPOINT_INTERVAL",
+    "DATABASE_PATH",
     "HOST",
     "PORT",
 ]
@@ -11,7 +11,13 @@ if env_path and path.exists(env_path):
     ARCHIVE_PATH = env.get("ARCHIVE_PATH", "")
     HOST = env.get("HOST", "0.0.0.0")
     PORT = env.get("PORT", 5000)
+    BACKEND = env.get("BACKEND", "memory")
+    DATABASE_PATH = env.get("DATABASE_PATH", "")
+    CHECKPOINT_INTERVAL = env.get("CHECKPOINT_INTERVAL", 60)
 else:
     ARCHIVE_PATH = getenv("ARCHIVE_PATH", "")
     HOST = getenv("SERVER_HOST", "0.0.0.0")
     PORT = getenv("SERVER_PORT") or 5000
+    BACKEND = getenv("STORAGE_BACKEND", "memory")
+    DATABASE_PATH = getenv("DATABASE_PATH", "")
+    CHECKPOINT_INTERVAL = getenv("CHECKPOINT_INTERVAL") or 60
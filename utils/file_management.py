@@ -1,11 +1,19 @@
 """
 Utility function to read a file and return its contents.
+
+numpy, pandas and yaml are imported by the functions needing them, so importing
+this module, e.g. to read the environment, stays cheap.
 """
 
 import json
 import os
-import pandas as pd
-import yaml
+
+
+def _load_yaml(file):
+    import yaml
+
+    # The libyaml bindings parse the same safe subset several times faster.
+    return yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
 
 
 def read(path, encoding="utf-8"):
@@ -17,7 +25,7 @@ def read(path, encoding="utf-8"):
     extension = path.split(".")[-1]
     if extension == "yaml":
         with open(path, "r", encoding=encoding) as file:
-            return yaml.safe_load(file)
+            return _load_yaml(file)
     elif extension == "json":
         with open(path, "r", encoding=encoding) as file:
             return json.load(file)
@@ -30,6 +38,11 @@ def read(path, encoding="utf-8"):
     elif extension == "tsv":
         with open(path, "r", encoding=encoding) as file:
             return file.read()
+    elif extension == "npz":
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as archive:
+            return {name: archive[name] for name in archive.files}
     else:
         raise ValueError("File type not supported")
 
@@ -38,12 +51,14 @@ def pd_read(path, encoding="utf-8"):
     """
     read a file and return its contents as a pandas DataFrame
     """
+    import pandas as pd
+
     if os.path.isdir(path):
         raise ValueError("Path is a directory")
     extension = path.split(".")[-1]
     if extension == "yaml":
         with open(path, "r", encoding=encoding) as file:
-            content = yaml.safe_load(file)
+            content = _load_yaml(file)
             return pd.DataFrame(content, columns=content[0].keys())
     elif extension == "json":
         with open(path, "r", encoding=encoding) as file:
@@ -53,6 +68,8 @@ def pd_read(path, encoding="utf-8"):
         return pd.read_csv(path)
     elif extension == "tsv":
         return pd.read_csv(path, sep="\t")
+    elif extension == "npz":
+        return pd.DataFrame(read(path))
     else:
         raise ValueError("File type not supported")
 
@@ -65,6 +82,8 @@ def write(path, content, encoding="utf-8"):
         raise ValueError("Path is a directory")
     extension = path.split(".")[-1]
     if extension == "yaml":
+        import yaml
+
         with open(path, "w", encoding=encoding) as file:
             yaml.dump(content, file)
     elif extension == "json":
@@ -79,10 +98,33 @@ def write(path, content, encoding="utf-8"):
     elif extension == "tsv":
         with open(path, "w", encoding=encoding) as file:
             file.write(content)
+    elif extension == "npz":
+        import numpy as np
+
+        with open(path, "wb") as file:
+            np.savez(file, **content)
     else:
         raise ValueError("File type not supported")
 
 
+def write_atomic(path, content, encoding="utf-8"):
+    """
+    Write to a file through a temporary file renamed over it, so readers and a
+    crash only ever see the old or the new content.
+    """
+    directory, name = os.path.split(path)
+    temporary = os.path.join(directory, f".{name}")
+    write(temporary, content, encoding=encoding)
+    with open(temporary, "rb") as file:
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    descriptor = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
 def pd_write(path, content, encoding="utf-8"):
     """
     Write a pandas DataFrame to a file.
@@ -91,6 +133,8 @@ def pd_write(path, content, encoding="utf-8"):
         raise ValueError("Path is a directory")
     extension = path.split(".")[-1]
     if extension == "yaml":
+        import yaml
+
         yaml.dump(content.to_dict(orient="records"), path, encoding=encoding)
     elif extension == "json":
         json.dump(content.to_dict(orient="records"), path, encoding=encoding)
@@ -98,5 +142,24 @@ def pd_write(path, content, encoding="utf-8"):
         content.to_csv(path, index=False)
     elif extension == "tsv":
         content.to_csv(path, sep="\t", index=False)
+    elif extension == "npz":
+        write(path, frame_columns(content))
     else:
         raise ValueError("File type not supported")
+
+
+def frame_columns(frame):
+    """
+    Returns the columns of a pandas DataFrame as numpy arrays, with text and
+    categorical columns as fixed-width unicode arrays so no pickling is needed.
+    """
+    import pandas as pd
+
+    return {
+        name: (
+            series.to_numpy(dtype=str)
+            if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype)
+            else series.to_numpy()
+        )
+        for name, series in frame.items()
+    }